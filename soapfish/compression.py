@@ -0,0 +1,143 @@
+"""
+HTTP content codings (gzip and deflate) for SOAP messages.
+"""
+
+import zlib
+
+__all__ = [
+    'ENCODINGS', 'CompressionError', 'ContentTooLarge', 'Decompressor', 'compress', 'compress_chunks', 'decompress',
+    'negotiate',
+]
+
+# supported content codings in order of preference
+ENCODINGS = ('gzip', 'deflate')
+
+_ALIASES = {'x-gzip': 'gzip'}
+
+
+class CompressionError(ValueError):
+    pass
+
+
+class ContentTooLarge(CompressionError):
+    pass
+
+
+def _normalize(encoding):
+    encoding = encoding.strip().lower()
+    encoding = _ALIASES.get(encoding, encoding)
+    if encoding not in ENCODINGS:
+        raise CompressionError(f'Unsupported content encoding: {encoding}')
+    return encoding
+
+
+def compress(content, encoding, level=6):
+    """Compress `content` (bytes) with the given content coding."""
+    encoding = _normalize(encoding)
+    # gzip uses a gzip container, deflate a zlib container (see RFC 9110, section 8.4.1)
+    wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    return compressor.compress(content) + compressor.flush()
+
+
+def compress_chunks(chunks, encoding, level=6):
+    """Compress an iterable of byte chunks incrementally, generating the compressed chunks."""
+    encoding = _normalize(encoding)
+    wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def decompress(content, encoding, max_size=None):
+    """Decompress `content` (bytes), raising CompressionError if it is invalid or exceeds `max_size` bytes."""
+    decompressor = Decompressor(encoding, max_size=max_size)
+    return decompressor.decompress(content) + decompressor.flush()
+
+
+class Decompressor:
+    """
+    Incremental decoder for a content coding.
+
+    Some clients send raw deflate data for `Content-Encoding: deflate` instead of the zlib format, so the format is
+    detected from the first bytes.
+    """
+
+    def __init__(self, encoding, max_size=None):
+        self.encoding = _normalize(encoding)
+        self.max_size = max_size
+        self.size = 0
+        self._decompressor = None
+        self._pending = b''
+
+    def _create(self, head):
+        if self.encoding == 'gzip':
+            wbits = 16 + zlib.MAX_WBITS
+        elif head[0] & 0x0f == 8 and (head[0] << 8 | head[1]) % 31 == 0:
+            wbits = zlib.MAX_WBITS
+        else:
+            wbits = -zlib.MAX_WBITS
+        return zlib.decompressobj(wbits)
+
+    def decompress(self, chunk):
+        if self._decompressor is None:
+            self._pending += chunk
+            if len(self._pending) < 2:
+                return b''
+            self._decompressor = self._create(self._pending)
+            chunk, self._pending = self._pending, b''
+        try:
+            if self.max_size is None:
+                data = self._decompressor.decompress(chunk)
+            else:
+                data = self._decompressor.decompress(chunk, self.max_size - self.size + 1)
+        except zlib.error as e:
+            raise CompressionError(f'Invalid {self.encoding} data: {e}') from e
+        self.size += len(data)
+        if self.max_size is not None and (self.size > self.max_size or self._decompressor.unconsumed_tail):
+            raise ContentTooLarge(f'Decompressed content exceeds {self.max_size} bytes')
+        return data
+
+    def flush(self):
+        if self._decompressor is None:
+            if self._pending:
+                raise CompressionError(f'Invalid {self.encoding} data: truncated')
+            return b''
+        data = self._decompressor.flush()
+        if not self._decompressor.eof:
+            raise CompressionError(f'Invalid {self.encoding} data: truncated')
+        return data
+
+
+def negotiate(accept_encoding, encodings=ENCODINGS):
+    """
+    Select the content coding for a response from the value of an `Accept-Encoding` header.
+
+    Returns the acceptable encoding with the highest quality value (preferring the order of `encodings` if equal) or
+    None if the response should not be compressed.
+    """
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[_ALIASES.get(coding, coding)] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
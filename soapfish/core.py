@@ -4,6 +4,8 @@ __all__ = ['SOAPError', 'SOAPRequest', 'SOAPResponse']
 
 
 class SOAPError(Exception):
+    http_status_code = 500  # of the fault response
+
     def __init__(self, code, message, actor=None):
         super().__init__(code, message, actor)
         self.code = code
@@ -22,6 +24,11 @@ class SOAPResponse:
         self.http_headers = {} if http_headers is None else http_headers
         self.http_content = http_content
 
+    @property
+    def is_streaming(self):
+        """Whether `http_content` is an iterable of byte chunks instead of the complete body."""
+        return self.http_content is not None and not isinstance(self.http_content, (bytes, str))
+
     @property
     def http_status_text(self):
         text = http.client.responses.get(self.http_status_code)
@@ -29,10 +36,31 @@ class SOAPResponse:
 
 
 class SOAPRequest:
-    def __init__(self, environ, http_content):
+    def __init__(self, environ, http_content, xmlelement=None):
         self.environ = environ
         self.http_content = http_content
+        # the parsed http content if the request was parsed while reading it
+        self.xmlelement = xmlelement
         self.soap_header = None
         self.soap_body = None
         self.dispatcher = None
         self.method = None
+
+    @property
+    def soap_header(self):
+        # The header is parsed on first access only (see `set_lazy_soap_header()`).
+        if self._soap_header_factory is not None:
+            # the factory is kept if it raises, so every access reports the same error
+            self._soap_header = self._soap_header_factory()
+            self._soap_header_factory = None
+        return self._soap_header
+
+    @soap_header.setter
+    def soap_header(self, value):
+        self._soap_header_factory = None
+        self._soap_header = value
+
+    def set_lazy_soap_header(self, factory):
+        """Set a callable returning the SOAP header which is called when `soap_header` is accessed first."""
+        self._soap_header_factory = factory
+        self._soap_header = None
@@ -1,5 +1,5 @@
 from .core import SOAPRequest
-from .soap_dispatch import SOAPDispatcher
+from .soap_dispatch import lazy_dispatcher
 
 __all__ = ['django_dispatcher']
 
@@ -17,16 +17,20 @@ class DjangoEnvironWrapper:
 
 
 def django_dispatcher(service, **dispatcher_kwargs):
-    from django.http import HttpResponse
+    from django.http import HttpResponse, StreamingHttpResponse
     from django.views.decorators.csrf import csrf_exempt
 
+    get_dispatcher = lazy_dispatcher(service, **dispatcher_kwargs)
+
     def django_dispatch(request):
         soap_request = SOAPRequest(DjangoEnvironWrapper(request.META), request.body)
         soap_request._original_request = request
-        soap_dispatcher = SOAPDispatcher(service, **dispatcher_kwargs)
-        soap_response = soap_dispatcher.dispatch(soap_request)
+        soap_response = get_dispatcher().dispatch(soap_request)
 
-        response = HttpResponse(soap_response.http_content)
+        if soap_response.is_streaming:
+            response = StreamingHttpResponse(soap_response.http_content)
+        else:
+            response = HttpResponse(soap_response.http_content)
         response.status_code = soap_response.http_status_code
         for k, v in soap_response.http_headers.items():
             response[k] = v
@@ -1,5 +1,5 @@
 from .core import SOAPRequest
-from .soap_dispatch import SOAPDispatcher
+from .soap_dispatch import lazy_dispatcher
 
 __all__ = ['flask_dispatcher']
 
@@ -7,11 +7,12 @@ __all__ = ['flask_dispatcher']
 def flask_dispatcher(service, **dispatcher_kwargs):
     from flask import Response, request
 
+    get_dispatcher = lazy_dispatcher(service, **dispatcher_kwargs)
+
     def flask_dispatch():
         soap_request = SOAPRequest(request.environ, request.data)
         soap_request._original_request = request
-        soap_dispatcher = SOAPDispatcher(service, **dispatcher_kwargs)
-        soap_response = soap_dispatcher.dispatch(soap_request)
+        soap_response = get_dispatcher().dispatch(soap_request)
 
         response = Response(soap_response.http_content)
         response.status_code = soap_response.http_status_code
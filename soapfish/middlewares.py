@@ -1,3 +1,4 @@
+import inspect
 import logging
 import traceback
 
@@ -10,15 +11,27 @@ class ExceptionToSoapFault:
 
     def __call__(self, request, next_call):
         try:
-            return next_call(request)
-        except core.SOAPError as e:
-            return e
+            response = next_call(request)
+        except Exception as e:
+            return self._handle(request, e)
+        if inspect.isawaitable(response):
+            return self._await(request, response)
+        return response
+
+    async def _await(self, request, response):
+        try:
+            return await response
         except Exception as e:
-            if self.traceback:
-                message = traceback.format_exc()
-            else:
-                message = f'{e.__class__.__name__}: {e}'
-            return core.SOAPError(request.dispatcher.service.version.Code.SERVER, message)
+            return self._handle(request, e)
+
+    def _handle(self, request, e):
+        if isinstance(e, core.SOAPError):
+            return e
+        if self.traceback:
+            message = traceback.format_exc()
+        else:
+            message = f'{e.__class__.__name__}: {e}'
+        return core.SOAPError(request.dispatcher.service.version.Code.SERVER, message)
 
 
 class ExceptionLogger:
@@ -31,11 +44,24 @@ class ExceptionLogger:
 
     def __call__(self, request, next_call):
         try:
-            return next_call(request)
+            response = next_call(request)
         except self.exceptions as e:
-            message = f'{e.__class__.__name__}: {e}'
-            if self.traceback:
-                self.logger.exception(message)
-            else:
-                self.logger.error(message)
+            self._log(e)
+            raise
+        if inspect.isawaitable(response):
+            return self._await(response)
+        return response
+
+    async def _await(self, response):
+        try:
+            return await response
+        except self.exceptions as e:
+            self._log(e)
             raise
+
+    def _log(self, e):
+        message = f'{e.__class__.__name__}: {e}'
+        if self.traceback:
+            self.logger.exception(message)
+        else:
+            self.logger.error(message)
@@ -0,0 +1,77 @@
+"""
+Preconfigured XML parsers shared by all soapfish entry points.
+
+Creating an `etree.XMLParser` is not free and parsers must not be used by several threads at the same time, so every
+thread keeps one parser per set of options (and schema). The defaults are safe for untrusted input: entities are not
+resolved, there is no network access, `xml:id` attributes are not collected and libxml2's limits for huge documents
+apply. They can be changed process-wide with `configure()` or per use, e.g. `fromstring(xml, huge_tree=True)`.
+
+A parser returned by `get_parser()` may be returned again later on the same thread, i.e. it must not be kept in the
+middle of an incremental parse (see `discard()`).
+"""
+
+import threading
+
+from lxml import etree
+
+__all__ = ['DEFAULT_OPTIONS', 'configure', 'discard', 'fromstring', 'get_parser', 'options']
+
+DEFAULT_OPTIONS = {
+    'remove_blank_text': False,
+    'resolve_entities': False,
+    'no_network': True,
+    'huge_tree': False,
+    'collect_ids': False,
+}
+
+# the parsers of a thread are dropped if there are more, e.g. because many schemas were used
+MAX_PARSERS_PER_THREAD = 32
+
+_options = dict(DEFAULT_OPTIONS)
+_generation = 0
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def options(**overrides):
+    """Return the current parser options with `overrides` applied (e.g. for `etree.iterparse()`)."""
+    unknown = overrides.keys() - _options.keys()
+    if unknown:
+        raise TypeError(f'Unknown parser option(s): {", ".join(sorted(unknown))}')
+    return {**_options, **overrides}
+
+
+def configure(**overrides):
+    """Change the parser options for all threads, already created parsers are replaced on their next use."""
+    global _generation, _options
+    with _lock:
+        _options = options(**overrides)
+        _generation += 1
+
+
+def get_parser(schema=None, **overrides):
+    """Return the parser of the current thread for the given options and (optional) `etree.XMLSchema`."""
+    key = (schema, tuple(sorted(overrides.items()))) if overrides else schema
+    parsers = getattr(_local, 'parsers', None)
+    if parsers is None or _local.generation != _generation:
+        parsers = _local.parsers = {}
+        _local.generation = _generation
+    parser = parsers.get(key)
+    if parser is None:
+        if len(parsers) >= MAX_PARSERS_PER_THREAD:
+            parsers.clear()
+        parser = parsers[key] = etree.XMLParser(schema=schema, **options(**overrides))
+    return parser
+
+
+def fromstring(text, schema=None, **overrides):
+    """Parse a document (str or bytes) like `etree.fromstring()` with the parser of the current thread."""
+    return etree.fromstring(text, get_parser(schema, **overrides))
+
+
+def discard(parser):
+    """Abort an incremental parse (`feed()`) so the parser starts with a new document when it is used again."""
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
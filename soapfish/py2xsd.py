@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 
 import argparse
+import collections
 import inspect
 import logging
 import sys
+import threading
 from importlib.machinery import SourceFileLoader
 
 from lxml import etree
@@ -211,12 +213,7 @@ def generate_xsd(schema):
     return xmlelement
 
 
-def schema_validator(schemas):
-    """
-    Return a callable for the specified soapfish schemas which can be used to validate (etree) xml documents.
-
-    The method takes care of resolving imported (soapfish) schemas but prevents any unwanted network access.
-    """
+def _compile_schema(schemas):
     class SchemaResolver(etree.Resolver):
 
         def __init__(self, schemas, *args, **kwargs):
@@ -249,8 +246,74 @@ def schema_validator(schemas):
     # conflicting namespace urls).
     schema_xml = b''.join(etree.tostring(generate_xsd(s)) for s in schemas)
     schema_element = etree.fromstring(schema_xml, parser)
-    xml_schema = etree.XMLSchema(schema_element)
-    return xml_schema.assertValid
+    return etree.XMLSchema(schema_element)
+
+
+class SchemaCache:
+    """
+    Thread-safe cache of compiled `etree.XMLSchema` objects, keyed by the identity of the soapfish schemas.
+
+    Schemas are compiled only once even if they are requested concurrently, the oldest entries are dropped if there
+    are more than `maxsize`. The cache keeps references to the soapfish schemas so their ids can not be reused while
+    they are cached. Changes to a schema after it was compiled are not noticed, call `invalidate()` in this case.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(schemas):
+        return tuple(id(schema) for schema in schemas)
+
+    def get(self, schemas):
+        """Return the compiled schema for a soapfish schema (or a sequence of schemas)."""
+        schemas = (schemas,) if isinstance(schemas, xsd.Schema) else tuple(schemas)
+        key = self._key(schemas)
+        entry = self._entries.get(key)
+        if entry is None:
+            # compiling while holding the lock ensures every schema is compiled once
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = (schemas, _compile_schema(schemas))
+                    self._entries[key] = entry
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        return entry[1]
+
+    def invalidate(self, schema=None):
+        """Drop all compiled schemas which contain `schema` (all compiled schemas if `schema` is None)."""
+        with self._lock:
+            if schema is None:
+                self._entries.clear()
+                return
+            for key, (schemas, _) in list(self._entries.items()):
+                if any(s is schema for s in schemas):
+                    del self._entries[key]
+
+
+# process-wide cache shared by ComplexType.parsexml(), schema_validator() and SOAPDispatcher
+schema_cache = SchemaCache()
+
+
+def compiled_schema(schemas):
+    """Return the (cached) `etree.XMLSchema` for a soapfish schema or a sequence of schemas."""
+    return schema_cache.get(schemas)
+
+
+def schema_validator(schemas):
+    """
+    Return a callable for the specified soapfish schemas which can be used to validate (etree) xml documents.
+
+    The method takes care of resolving imported (soapfish) schemas but prevents any unwanted network access. The
+    compiled schema is cached process-wide, see `SchemaCache`.
+    """
+    return compiled_schema(schemas).assertValid
 
 
 # --- Program -----------------------------------------------------------------
@@ -1,11 +1,16 @@
 """SOAP protocol implementation, dispatchers and client stub."""
 
+import asyncio
+import functools
+import itertools
 import logging
 import string
+import threading
 
 import httpx
 
 from . import core, namespaces as ns, soap11, soap12, wsa
+from .compression import ENCODINGS, compress
 from .utils import uncapitalize
 
 SOAP_HTTP_Transport = ns.wsdl_soap_http
@@ -54,12 +59,34 @@ class Service:
             output_header = wsa.WSAHeader
         self.input_header = input_header
         self.output_header = output_header
+        self._index = None
+
+    @property
+    def index(self):
+        """Lookup tables for methods and elements, built on first use (see `reindex()`)."""
+        if self._index is None:
+            self._index = ServiceIndex(self)
+        return self._index
+
+    def reindex(self):
+        """Rebuild the lookup tables, required after methods or schemas were modified in place."""
+        self._index = ServiceIndex(self)
+        return self._index
 
     def get_method(self, operationName):
-        return next(m for m in self.methods if m.operationName == operationName)
+        index = self.index
+        method = index.operations.get(operationName)
+        if method is not None:
+            return method
+        # a miss is final unless the methods were changed without reindex()
+        methods = () if index.is_current(self) else self.methods
+        return next(m for m in methods if m.operationName == operationName)
 
     def find_element_by_name(self, name):
-        element = None
+        index = self.index
+        element = index.elements.get(name)
+        if element is not None or index.is_current(self):
+            return element
         for schema in self.schemas:
             element = schema.get_element_by_name(name)
             if element is not None:
@@ -77,18 +104,119 @@ class Service:
         return wrapper
 
 
+class ServiceIndex:
+    """
+    Precomputed lookup tables for the methods of a service.
+
+    Maps operation names, SOAP actions and the qualified (and local) tag names of input elements - including members of
+    their substitution groups - to the `xsd.Method`, so routing a request does not need to scan all methods/schemas.
+    """
+
+    def __init__(self, service):
+        self._source = self._snapshot(service)
+        self.operations = {}
+        self.actions = {}
+        self.elements = {}
+        self.tags = {}
+        self.localnames = {}
+
+        for method in service.methods:
+            self.operations.setdefault(method.operationName, method)
+            if method.soapAction:
+                self.actions.setdefault(method.soapAction, method)
+
+        seen = set()
+        for schema in service.schemas:
+            self._add_elements(schema, seen)
+
+        for method in service.methods:
+            if isinstance(method.input, str):
+                self._add_tag(method.input, method)
+        for name, element in self.elements.items():
+            if element.substitutionGroup is None:
+                continue
+            method = self.localnames.get(element.substitutionGroup.split(':')[-1])
+            if method is not None:
+                self._add_tag(name, method)
+
+    def _add_elements(self, schema, seen):
+        # same precedence as Schema.get_element_by_name(): own elements first, then imports and includes
+        if id(schema) in seen:
+            return
+        seen.add(id(schema))
+        for name, element in schema.elements.items():
+            self.elements.setdefault(name, element)
+        for item in itertools.chain(schema.imports, schema.includes):
+            self._add_elements(item, seen)
+
+    def _add_tag(self, name, method):
+        self.localnames.setdefault(name, method)
+        element = self.elements.get(name)
+        if element is not None and element.namespace:
+            self.tags.setdefault(f'{{{element.namespace}}}{name}', method)
+
+    @staticmethod
+    def _snapshot(service):
+        return (service.methods, len(service.methods), service.schemas,
+                tuple(len(schema.elements) for schema in service.schemas))
+
+    def is_current(self, service):
+        """
+        Return whether the methods and schemas of the service were not replaced, added or removed since indexing.
+
+        Other changes in place (e.g. of a method or imported schema) are not detected, these require `reindex()`.
+        """
+        methods, methods_count, schemas, element_counts = self._source
+        if service.methods is not methods or len(methods) != methods_count or service.schemas is not schemas:
+            return False
+        return tuple(len(schema.elements) for schema in schemas) == element_counts
+
+    def find_method_by_action(self, action):
+        return self.actions.get(action)
+
+    def find_method_by_tag(self, tag):
+        """Return the method for a body root tag (in Clark notation), falling back to its local name."""
+        method = self.tags.get(tag)
+        if method is None:
+            method = self.localnames.get(tag.rsplit('}', 1)[-1])
+        return method
+
+
 class Stub:
-    """Client stub. Handles only document style calls."""
+    """
+    Client stub. Handles only document style calls.
+
+    Calls are sent through a pooled `httpx.Client` which keeps connections alive between calls. Pass `client` to share
+    a client (it is not closed by the stub) or let the stub create one from `limits`, `timeout` and `http2` on the
+    first call. A stub can be used from multiple threads and should be closed (or used as a context manager) when it is
+    no longer needed.
+    """
 
     SERVICE = None
     SCHEME = 'http'
     HOST = 'www.example.net'
 
-    def __init__(self, username=None, password=None, service=None, location=None):
+    def __init__(self, username=None, password=None, service=None, location=None, compression=None,
+                 accept_encoding=None, client=None, limits=None, timeout=None, http2=False):
+        # compression is the content coding used for requests (e.g. 'gzip'), accept_encoding the value of the
+        # Accept-Encoding header sent to the server (e.g. 'gzip, deflate'). Compressed responses are decoded by httpx.
+        if compression is not None and compression not in ENCODINGS:
+            raise ValueError(f'Unsupported compression: {compression}')
         self.username = username
         self.password = password
+        self.compression = compression
+        self.accept_encoding = accept_encoding
         self.service = service if service else self.SERVICE
 
+        self._client = client
+        self._owns_client = client is None
+        self._client_options = {'http2': http2}
+        if limits is not None:
+            self._client_options['limits'] = limits
+        if timeout is not None:
+            self._client_options['timeout'] = timeout
+        self._client_lock = threading.Lock()
+
         context = {'scheme': self.SCHEME, 'host': self.HOST}
         if location is None:
             location = lambda template, context: string.Template(template).safe_substitute(**context)
@@ -100,6 +228,32 @@ class Stub:
         else:
             raise TypeError('Expected string or callable for location.')
 
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client(**self._client_options)
+        return self._client
+
+    def _create_client(self, **options):
+        return httpx.Client(**options)
+
+    def close(self):
+        """Close the connections of the HTTP client if it was created by the stub."""
+        if not self._owns_client:
+            return
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def _handle_response(self, method, http_headers, content):
         soap = self.service.version
         envelope = soap.Envelope.parsexml(content)
@@ -122,7 +276,7 @@ class Stub:
         body = envelope.Body.parse_as(_type)
         return core.SOAPResponse(body, soap_header=response_header)
 
-    def call(self, operationName, parameter, header=None):
+    def _prepare_call(self, operationName, parameter, header=None):
         soap = self.service.version
         method = self.service.get_method(operationName)
         tagname = method.input if isinstance(method.input, str) else uncapitalize(parameter.__class__.__name__)
@@ -130,11 +284,81 @@ class Stub:
         auth = (self.username, self.password) if self.username else None
         data = soap.Envelope.response(tagname, parameter, header=header)
         headers = soap.build_http_request_headers(method.soapAction)
+        if self.accept_encoding is not None:
+            headers['Accept-Encoding'] = self.accept_encoding
 
         logger.info("Call '%s' on '%s'", operationName, self.location)
         logger.debug('Request Headers: %s', headers)
         logger.debug('Request Envelope: %s', data)
-        r = httpx.post(self.location, auth=auth, headers=headers, data=data)
+        if self.compression is not None:
+            data = compress(data, self.compression)
+            headers['Content-Encoding'] = self.compression
+        return method, auth, headers, data
+
+    def call(self, operationName, parameter, header=None, timeout=httpx.USE_CLIENT_DEFAULT):
+        method, auth, headers, data = self._prepare_call(operationName, parameter, header)
+        r = self.client.post(self.location, auth=auth, headers=headers, content=data, timeout=timeout)
         logger.debug('Response Headers: %s', r.headers)
         logger.debug('Response Envelope: %s', r.content)
         return self._handle_response(method, r.headers, r.content)
+
+
+class AsyncStub(Stub):
+    """
+    Asynchronous client stub using a pooled `httpx.AsyncClient`.
+
+    `call()` is a coroutine, otherwise the stub behaves like `Stub`. Responses of at least `offload_threshold` bytes
+    are parsed in `executor` (None: the default executor of the event loop) so the event loop stays responsive.
+    """
+
+    def __init__(self, *args, executor=None, offload_threshold=64 * 1024, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+
+    def _create_client(self, **options):
+        return httpx.AsyncClient(**options)
+
+    async def aclose(self):
+        """Close the connections of the HTTP client if it was created by the stub."""
+        if not self._owns_client:
+            return
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        raise TypeError('Use aclose() to close an AsyncStub.')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def call(self, operationName, parameter, header=None, timeout=httpx.USE_CLIENT_DEFAULT):
+        method, auth, headers, data = self._prepare_call(operationName, parameter, header)
+        r = await self.client.post(self.location, auth=auth, headers=headers, content=data, timeout=timeout)
+        logger.debug('Response Headers: %s', r.headers)
+        logger.debug('Response Envelope: %s', r.content)
+        if self.offload_threshold is not None and len(r.content) >= self.offload_threshold:
+            loop = asyncio.get_running_loop()
+            handle_response = functools.partial(self._handle_response, method, r.headers, r.content)
+            return await loop.run_in_executor(self.executor, handle_response)
+        return self._handle_response(method, r.headers, r.content)
+
+
+async def gather(*aws, limit=None, return_exceptions=False):
+    """
+    Like `asyncio.gather()`, but awaits at most `limit` of the awaitables (e.g. `AsyncStub.call()` coroutines) at a
+    time.
+    """
+    if limit is None:
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(aw):
+        async with semaphore:
+            return await aw
+    return await asyncio.gather(*(bounded(aw) for aw in aws), return_exceptions=return_exceptions)
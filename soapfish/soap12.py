@@ -72,6 +72,17 @@ class Envelope(xsd.ComplexType):
         return envelope.xml('Envelope', namespace=ENVELOPE_NAMESPACE,
                             elementFormDefault=xsd.ElementFormDefault.QUALIFIED, pretty_print=False)
 
+    @classmethod
+    def iter_response(cls, tagname, return_object, header=None, chunk_size=64 * 1024):
+        """Like `response()` but generate the envelope incrementally, see `xsd.ComplexType.iterxml()`."""
+        envelope = cls()
+        if header is not None:
+            envelope.Header = header
+        envelope.Body = Body()
+        envelope.Body.message = xsd.NamedType(name=tagname, value=return_object)
+        return envelope.iterxml('Envelope', namespace=ENVELOPE_NAMESPACE,
+                                elementFormDefault=xsd.ElementFormDefault.QUALIFIED, chunk_size=chunk_size)
+
     @classmethod
     def error_response(cls, code, message, header=None, actor=None):
         envelope = cls()
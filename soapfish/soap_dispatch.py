@@ -1,30 +1,212 @@
+import asyncio
+import collections
+import concurrent.futures
+import email.utils
+import enum
 import functools
+import hashlib
+import inspect
 import logging
+import random
 import re
 import string
+import threading
+import time
+import types
 from urllib.parse import parse_qs
 
 from lxml import etree
 
-from . import py2wsdl, py2xsd, wsa
+from . import compression, parsers, py2wsdl, py2xsd, wsa, xsd
 from .core import SOAPError, SOAPRequest, SOAPResponse
 from .utils import uncapitalize, walk_schema_tree
 
-__all__ = ['SOAPDispatcher']
+__all__ = [
+    'AsgiSoapApplication', 'SOAPDispatcher', 'ValidationMode', 'ValidationPolicy', 'WsgiSoapApplication',
+    'lazy_dispatcher',
+]
 
 logger = logging.getLogger(__name__)
 
+# default limit for the size of decompressed request bodies (see SOAPDispatcher)
+DEFAULT_MAX_DECOMPRESSED_SIZE = 32 * 1024 * 1024
+
 
 def call_method(request):
     request.dispatcher._prepare_request(request)
     response = request.method.function(request, request.soap_body)
+    if inspect.isawaitable(response):
+        if inspect.iscoroutine(response):
+            response.close()  # never awaited
+        raise TypeError(f'Handler of {request.method.operationName!r} is asynchronous, use AsgiSoapApplication.')
+    return response if isinstance(response, SOAPResponse) else SOAPResponse(response)
+
+
+async def call_method_async(request):
+    await request._run_blocking(request.dispatcher._prepare_request, request)
+    response = request.method.function(request, request.soap_body)
+    if inspect.isawaitable(response):
+        response = await response
     return response if isinstance(response, SOAPResponse) else SOAPResponse(response)
 
 
+def _async_layer(middleware, next_call):
+    # Each layer can be called with await, regardless whether the middleware itself is asynchronous or not.
+    async def layer(request):
+        response = middleware(request, next_call=next_call)
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+    return layer
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_qs(qs):
+    # The result is shared between calls, so it is read-only (name -> tuple of values).
+    return types.MappingProxyType({name: tuple(values) for name, values in parse_qs(qs, keep_blank_values=True).items()})
+
+
+class CachedDocument:
+    """A rendered WSDL/XSD document with its pre-compressed variant and entity tag."""
+
+    __slots__ = ['content', 'gzip_content', 'etag']
+
+    def __init__(self, content):
+        self.content = content
+        self.gzip_content = compression.compress(content, 'gzip', level=9)
+        self.etag = '"%s"' % hashlib.sha1(content).hexdigest()
+
+
+class DocumentCache:
+    """Thread-safe LRU cache for rendered documents, holding at most `maxsize` entries."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._documents = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def get(self, key, render):
+        """Return the cached document for key, calling `render()` to create its content if it is not cached yet."""
+        with self._lock:
+            document = self._documents.get(key)
+            if document is not None:
+                self._documents.move_to_end(key)
+                return document
+        document = CachedDocument(render())
+        with self._lock:
+            self._documents[key] = document
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+        return document
+
+
+class ValidationMode(str, enum.Enum):
+    ALWAYS = 'always'
+    SAMPLE = 'sample'
+    SHADOW = 'shadow'
+    NEVER = 'never'
+
+
+class ValidationPolicy:
+    """
+    Decide if (and when) incoming messages are validated against the schema.
+
+    - ALWAYS: validate every request, invalid requests are rejected with a SOAP fault.
+    - SAMPLE: validate (and possibly reject) only a fraction `rate` (0..1) of the requests.
+    - SHADOW: never reject requests, validate after the handler was called and only log/count failures. Validation
+      runs in the `executor` (by default a single background thread shared by all policies), so it never delays the
+      response or blocks an event loop. At most `max_pending` requests wait for validation, further requests are not
+      validated if it falls behind (counted as `shadow_dropped`). The parsed header and body of a request are handed
+      to the executor as they are, i.e. they must not be modified after the handler returned (e.g. by hooks).
+    - NEVER: skip validation completely.
+
+    A policy can be set per dispatcher and per `xsd.Method` (which takes precedence). The `counters` show how many
+    requests were validated, rejected or skipped.
+    """
+
+    def __init__(self, mode=ValidationMode.ALWAYS, rate=1.0, executor=None, max_pending=100):
+        mode = ValidationMode(mode)
+        if not 0 <= rate <= 1:
+            raise ValueError(f'Sample rate must be between 0 and 1, not {rate!r}.')
+        self.mode = mode
+        self.rate = rate
+        self.executor = executor
+        self.counters = collections.Counter()
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}<{self.mode.value}>'
+
+    def select(self):
+        """Return ALWAYS (validate now), SHADOW (validate after the handler) or NEVER for the next request."""
+        if self.mode == ValidationMode.SAMPLE:
+            if random.random() < self.rate:
+                return ValidationMode.ALWAYS
+            self.count('skipped')
+            return ValidationMode.NEVER
+        if self.mode == ValidationMode.NEVER:
+            self.count('skipped')
+        return self.mode
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+_shadow_executor_lock = threading.Lock()
+_default_shadow_executor = None
+
+
+def _shadow_executor():
+    """Return the executor for shadow validation of policies without an executor (created on first use)."""
+    global _default_shadow_executor
+    if _default_shadow_executor is None:
+        with _shadow_executor_lock:
+            if _default_shadow_executor is None:
+                _default_shadow_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='soapfish-shadow-validation')
+    return _default_shadow_executor
+
+
+def lazy_dispatcher(service, **dispatcher_kwargs):
+    """
+    Return a callable which builds a SOAPDispatcher on first use and returns the same instance afterwards.
+
+    Building a dispatcher generates the WSDL, all XSDs and the schema validator so it should be done only once per
+    process. The dispatcher is built lazily (e.g. so that handlers can still be bound via `Service.route()`) and the
+    construction is guarded by a lock so concurrent first requests share one instance.
+    """
+    lock = threading.Lock()
+    dispatcher = None
+
+    def get_dispatcher():
+        nonlocal dispatcher
+        if dispatcher is None:
+            with lock:
+                if dispatcher is None:
+                    dispatcher = SOAPDispatcher(service, **dispatcher_kwargs)
+        return dispatcher
+
+    return get_dispatcher
+
+
 class SOAPDispatcher:
-    def __init__(self, service, middlewares=None, hooks=None, wsdl=None, xsds=None, strict_soap_header=True):
+    def __init__(self, service, middlewares=None, hooks=None, wsdl=None, xsds=None, strict_soap_header=True,
+                 validation=None, document_cache_size=64, compression_threshold=None,
+                 max_decompressed_size=DEFAULT_MAX_DECOMPRESSED_SIZE):
         # If set, strict_soap_header causes an exception to be raised if a header part is not in the schema.
+        # validation is the default ValidationPolicy for all methods (see also: xsd.Method.validation).
+        # SOAP responses of at least compression_threshold bytes are compressed if the client accepts it.
+        # Compressed requests inflating to more than max_decompressed_size bytes are rejected (413), None disables
+        # the limit. WsgiSoapApplication uses its max_body_size instead if set.
+        # If list fields of a response body are iterators (e.g. generators) the response is streamed: `http_content`
+        # is then an iterable of chunks which are rendered while the response is sent (see SOAPResponse.is_streaming).
         self.service = service
+        self.index = service.reindex()
         self.middlewares = middlewares if middlewares is not None else []
         self.schema_validator = py2xsd.schema_validator(self.service.schemas)
 
@@ -51,71 +233,144 @@ class SOAPDispatcher:
         self.xsds = xsds
 
         self.strict_soap_header = strict_soap_header
+        self.validation = validation if validation is not None else ValidationPolicy()
+        self.compression_threshold = compression_threshold
+        self.max_decompressed_size = max_decompressed_size
+        # rendered WSDL (per scheme and host) and XSD documents
+        self.documents = DocumentCache(document_cache_size)
+        self._last_modified_time = int(time.time())  # HTTP dates have a resolution of seconds
+        self.last_modified = email.utils.formatdate(self._last_modified_time, usegmt=True)
+
+        SOAP = self.service.version
+        self._envelope_tag = f'{{{SOAP.ENVELOPE_NAMESPACE}}}Envelope'
+        self._header_tag = f'{{{SOAP.ENVELOPE_NAMESPACE}}}Header'
+        self._body_tag = f'{{{SOAP.ENVELOPE_NAMESPACE}}}Body'
+
+    @property
+    def middlewares(self):
+        return self._middlewares
+
+    @middlewares.setter
+    def middlewares(self, middlewares):
+        self._middlewares = middlewares  # not copied, so changes of the caller's list are picked up
+        self._chains = {}  # (async, first middleware) -> (middlewares of the chain, chain)
+
+    @staticmethod
+    def _compile_middlewares(middlewares):
+        next_call = call_method  # at the end call the method
+        for middleware in reversed(middlewares):
+            next_call = functools.partial(middleware, next_call=next_call)
+        return next_call
+
+    @staticmethod
+    def _compile_async_middlewares(middlewares):
+        next_call = call_method_async
+        for middleware in reversed(middlewares):
+            next_call = _async_layer(middleware, next_call)
+        return next_call
+
+    def _compiled_chain(self, is_async, i):
+        middlewares = tuple(self._middlewares[i:])
+        compiled = self._chains.get((is_async, i))
+        if compiled is None or compiled[0] != middlewares:
+            compile_chain = self._compile_async_middlewares if is_async else self._compile_middlewares
+            compiled = self._chains[is_async, i] = (middlewares, compile_chain(middlewares))
+        return compiled[1]
 
     def middleware(self, i=0):
-        if i == len(self.middlewares):
-            # at the end call the method
-            return call_method
-        return functools.partial(self.middlewares[i], next_call=self.middleware(i + 1))
+        """
+        Return the (outermost) callable of the middleware chain starting with the middleware at index `i`.
+
+        Chains are built once and only recompiled if the list of middlewares was changed since then.
+        """
+        return self._compiled_chain(False, i)
+
+    def async_middleware(self):
+        """Return the (outermost) coroutine function of the middleware chain used by `handle_soap_request_async()`."""
+        return self._compiled_chain(True, 0)
 
     def _parse_soap_content(self, xml):
+        """Parse the SOAP envelope and return its Header (or None) and Body elements."""
         SOAP = self.service.version
-        try:
-            # note : no validation is performed
-            envelope = SOAP.Envelope.parsexml(xml)
-        except etree.XMLSyntaxError as e:
-            raise SOAPError(SOAP.Code.CLIENT, f'{e.__class__.__name__}: {e}') from e
-        # Actually this is more a stopgap measure than a real fix. The real
-        # fix is to change SOAP.Envelope/ComplexType so it raises some kind of
-        # validation error. A missing SOAP body is not allowed by the SOAP
-        # specs (according to my interpretation):
+        if not isinstance(xml, etree._Element):
+            try:
+                xml = parsers.fromstring(xml)
+            except etree.XMLSyntaxError as e:
+                raise SOAPError(SOAP.Code.CLIENT, f'{e.__class__.__name__}: {e}') from e
+
+        header = body = None
+        if xml.tag == self._envelope_tag:
+            for child in xml:
+                if child.tag == self._header_tag:
+                    header = child
+                elif child.tag == self._body_tag:
+                    body = child
+        # A missing SOAP body is not allowed by the SOAP specs (according to my interpretation):
         # SOAP 1.1: http://schemas.xmlsoap.org/soap/envelope/
         # SOAP 1.2: http://www.w3.org/2003/05/soap-envelope/
-        if envelope.Body is None:
+        if body is None:
             raise SOAPError(SOAP.Code.CLIENT, 'Missing SOAP body')
-        return envelope
+        return header, body
+
+    def _get_body_content(self, body):
+        content = next((child for child in body if isinstance(child.tag, str)), None)
+        if content is None:
+            raise SOAPError(self.service.version.Code.CLIENT, 'Missing SOAP body content')
+        return content
+
+    def _decode_content(self, request):
+        encoding = request.environ.get('HTTP_CONTENT_ENCODING', '').strip()
+        if not encoding or encoding.lower() == 'identity':
+            return request.http_content
+        max_size = getattr(request, '_max_decompressed_size', None) or self.max_decompressed_size
+        try:
+            return compression.decompress(request.http_content, encoding, max_size=max_size)
+        except compression.ContentTooLarge as e:
+            error = SOAPError(self.service.version.Code.CLIENT, str(e))
+            error.http_status_code = 413
+            raise error from e
+        except compression.CompressionError as e:
+            raise SOAPError(self.service.version.Code.CLIENT, str(e)) from e
 
     def _find_handler_for_request(self, request, body):
         # TODO: Properly handle invalid XML.
         SOAP = self.service.version
 
         action = SOAP.determine_soap_action(request)
-        root_tag = etree.QName(body.tag).localname
-
         if action:
             logger.debug('Finding handler using SOAP action found in HTTP headers: %s', action)
-            try:
-                return next(m for m in self.service.methods if m.soapAction == action)
-            except StopIteration as e:
-                raise SOAPError(SOAP.Code.CLIENT, f'Invalid SOAP action: {action}') from e
-
+            method = self.index.find_method_by_action(action)
+            if method is None:
+                raise SOAPError(SOAP.Code.CLIENT, f'Invalid SOAP action: {action}')
         else:
-            logger.debug('Finding handler using root tag of the SOAP body: %s', root_tag)
-            try:
-                return next(m for m in self.service.methods if m.input == root_tag)
-            except StopIteration:
-                pass  # fall through and check for substitution group element
-            try:
-                # FIXME: Improve handling of namespaces to be less hacky...
-                e = next(e for s in self.service.schemas for n, e in s.elements.items() if n == root_tag)
-                return next(m for m in self.service.methods if m.input == e.substitutionGroup.split(':')[-1])
-            except StopIteration as e:
-                raise SOAPError(SOAP.Code.CLIENT, f'Missing SOAP action and invalid root tag: {root_tag}') from e
+            logger.debug('Finding handler using root tag of the SOAP body: %s', body.tag)
+            method = self.index.find_method_by_tag(body.tag)
+            if method is None:
+                root_tag = etree.QName(body.tag).localname
+                raise SOAPError(SOAP.Code.CLIENT, f'Missing SOAP action and invalid root tag: {root_tag}')
+        return method
 
     def _parse_header(self, handler, soap_header):
         # TODO return soap fault if header is required but missing in the input
         if soap_header is None:
             return None
-        if handler.input_header:
-            return soap_header.parse_as(handler.input_header)
-        elif self.service.input_header:
-            return soap_header.parse_as(self.service.input_header)
+        input_header = handler.input_header or self.service.input_header
+        if not input_header:
+            return None
+        try:
+            return input_header.parse_xmlelement(soap_header)
+        except (ValueError, etree.XMLSyntaxError) as e:
+            # the header is parsed when the handler accesses it, report it as an invalid request nevertheless
+            raise SOAPError(self.service.version.Code.CLIENT, f'{e.__class__.__name__}: {e}') from e
 
-    def _parse_input(self, method, message):
+    def _parse_input(self, method, message, trusted=False):
         input_parser = method.input
         if isinstance(method.input, str):
             element = self.service.find_element_by_name(method.input)
             input_parser = element._type
+        if trusted:
+            # the message was validated already, there is no need to check the values again
+            return input_parser.parse_xmlelement(message, trusted=True)
         return input_parser.parse_xmlelement(message)
 
     def _validate_response(self, return_object, tagname):
@@ -129,8 +384,11 @@ class SOAPDispatcher:
     def _validate_header(self, soap_header):
         if soap_header is None:
             return
-        for children in soap_header._xmlelement.getchildren():
-            namespace = children.nsmap.get(children.prefix)
+        soap_header = getattr(soap_header, '_xmlelement', soap_header)
+        for children in soap_header:
+            if not isinstance(children.tag, str):
+                continue  # comments and processing instructions
+            namespace = etree.QName(children).namespace
             if namespace == wsa.NAMESPACE:
                 wsa.XML_SCHEMA.assertValid(children)
             else:
@@ -141,52 +399,156 @@ class SOAPDispatcher:
                         raise
 
     def _validate_body(self, soap_body):
-        self.schema_validator(soap_body.content())
+        self.schema_validator(soap_body)
 
-    def _validate_input(self, envelope):
-        self._validate_header(envelope.Header)
-        self._validate_body(envelope.Body)
+    def _validate_input(self, soap_header, soap_body):
+        self._validate_header(soap_header)
+        self._validate_body(soap_body)
+
+    def _validation_policy(self, method):
+        if method is not None and method.validation is not None:
+            return method.validation
+        return self.validation
 
     def _prepare_request(self, request):
         SOAP = self.service.version
 
-        soap_envelope = self._parse_soap_content(request.http_content)
-        soap_header = soap_envelope.Header
-        soap_body = soap_envelope.Body.content()
+        xml = request.xmlelement if request.xmlelement is not None else self._decode_content(request)
+        soap_header, soap_body = self._parse_soap_content(xml)
+        soap_body = self._get_body_content(soap_body)
 
         try:
-            self._validate_input(soap_envelope)
-        except (etree.DocumentInvalid, etree.XMLSyntaxError) as e:
-            raise SOAPError(SOAP.Code.CLIENT, f'{e.__class__.__name__}: {e}') from e
+            request.method = self._find_handler_for_request(request, soap_body)
+        except SOAPError as e:
+            # Report invalid messages first, even if no method matches.
+            routing_error = e
+        else:
+            routing_error = None
 
-        request.method = self._find_handler_for_request(request, soap_body)
-        request.soap_header = self._parse_header(request.method, soap_header)
-        request.soap_body = self._parse_input(request.method, soap_body)
+        policy = self._validation_policy(request.method)
+        mode = policy.select()
+        validated = mode == ValidationMode.ALWAYS
+        if validated:
+            try:
+                self._validate_input(soap_header, soap_body)
+            except (etree.DocumentInvalid, etree.XMLSyntaxError) as e:
+                policy.count('invalid')
+                raise SOAPError(SOAP.Code.CLIENT, f'{e.__class__.__name__}: {e}') from e
+            policy.count('validated')
+        elif mode == ValidationMode.SHADOW:
+            request._shadow_validation = (policy, soap_header, soap_body)
+
+        if routing_error is not None:
+            raise routing_error
+        request.set_lazy_soap_header(functools.partial(self._parse_header, request.method, soap_header))
+        request.soap_body = self._parse_input(request.method, soap_body, trusted=validated)
+
+    def _shadow_validate(self, request):
+        shadow_validation = getattr(request, '_shadow_validation', None)
+        if shadow_validation is None:
+            return
+        request._shadow_validation = None
+        policy, soap_header, soap_body = shadow_validation
+        # the queue of the executor is bounded so the requests waiting for validation do not pile up in memory
+        if not policy._pending.acquire(blocking=False):
+            policy.count('shadow_dropped')
+            return
+        executor = policy.executor if policy.executor is not None else _shadow_executor()
+        try:
+            executor.submit(self._validate_shadow_input, policy, soap_header, soap_body)
+        except BaseException:
+            policy._pending.release()
+            raise
 
-    def dispatch(self, request):
+    def _validate_shadow_input(self, policy, soap_header, soap_body):
+        try:
+            self._validate_input(soap_header, soap_body)
+        except (etree.DocumentInvalid, etree.XMLSyntaxError) as e:
+            policy.count('shadow_invalid')
+            logger.warning('Shadow validation of %s failed: %s: %s', soap_body.tag, e.__class__.__name__, e)
+        else:
+            policy.count('shadow_validated')
+        finally:
+            policy._pending.release()
+
+    def _select_handler(self, request):
         request_method = request.environ.get('REQUEST_METHOD', '')
-        qs = request.environ.get('QUERY_STRING', '')
-        qs = parse_qs(qs, keep_blank_values=True)
+        qs = _parse_qs(request.environ.get('QUERY_STRING', ''))
         if request_method == 'GET' and qs.keys() & {'wsdl', 'singleWsdl'}:
-            return self.handle_wsdl_request(request)
+            return self.handle_wsdl_request
         elif request_method == 'GET' and 'xsd' in qs:
-            return self.handle_xsd_request(request)
+            return self.handle_xsd_request
         elif request_method == 'POST':
-            return self.handle_soap_request(request)
+            return self.handle_soap_request
         else:
-            return SOAPResponse('bad request', http_status_code=400, http_content='bad_request',
-                                http_headers={'Content-Type': 'text/plain'})
+            return self.handle_bad_request
+
+    def dispatch(self, request):
+        handler = self._select_handler(request)
+        return handler(request)
+
+    async def dispatch_async(self, request, executor=None, offload=False):
+        """
+        Dispatch the request from within an event loop, see `handle_soap_request_async()` for the parameters.
+
+        WSDL and XSD requests are served from memory and do not block so these are handled synchronously.
+        """
+        handler = self._select_handler(request)
+        if handler == self.handle_soap_request:
+            return await self.handle_soap_request_async(request, executor=executor, offload=offload)
+        return handler(request)
+
+    def handle_bad_request(self, request):
+        return SOAPResponse('bad request', http_status_code=400, http_content='bad_request',
+                            http_headers={'Content-Type': 'text/plain'})
 
     def handle_soap_request(self, request):
         request = self._call_hook('soap-request', dispatcher=self, request=request)
         request.dispatcher = self
-        SOAP = self.service.version
 
         try:
             response = self.middleware()(request)
         except SOAPError as e:
             response = e
 
+        response = self._render_soap_response(request, response)
+        self._shadow_validate(request)
+        response = self._call_hook('soap-response', dispatcher=self, request=request, response=response)
+        return self._compress_response(request, response)
+
+    async def handle_soap_request_async(self, request, executor=None, offload=False):
+        """
+        Handle a SOAP request with support for asynchronous handlers and middlewares.
+
+        :param executor: The executor used for blocking work (None: the default executor of the event loop).
+        :param offload: If true, parsing/validating the request and rendering the response (which can take a while
+                        for large messages) runs in the executor so the event loop is not blocked.
+        """
+        request = self._call_hook('soap-request', dispatcher=self, request=request)
+        request.dispatcher = self
+        if offload:
+            loop = asyncio.get_running_loop()
+
+            async def run_blocking(func, *args):
+                return await loop.run_in_executor(executor, functools.partial(func, *args))
+        else:
+            async def run_blocking(func, *args):
+                return func(*args)
+        request._run_blocking = run_blocking
+
+        try:
+            response = await self.async_middleware()(request)
+        except SOAPError as e:
+            response = e
+
+        response = await run_blocking(self._render_soap_response, request, response)
+        self._shadow_validate(request)
+        response = self._call_hook('soap-response', dispatcher=self, request=request, response=response)
+        return await run_blocking(self._compress_response, request, response)
+
+    def _render_soap_response(self, request, response):
+        SOAP = self.service.version
+
         if not isinstance(response, SOAPResponse):
             response = SOAPResponse(response)
 
@@ -195,7 +557,7 @@ class SOAPDispatcher:
         if isinstance(response.soap_body, SOAPError):
             error = response.soap_body
             response.http_content = SOAP.get_error_response(error.code, error.message, header=response.soap_header)
-            response.http_status_code = 500
+            response.http_status_code = error.http_status_code
         else:
             # tagname = uncapitalize(response.soap_body.__class__.__name__)
             # self._validate_response(response.soap_body, tagname)
@@ -204,33 +566,100 @@ class SOAPDispatcher:
                 tagname = request.method.output
             else:
                 tagname = uncapitalize(response.content.__class__.__name__)
-            response.http_content = SOAP.Envelope.response(tagname, response.soap_body, header=response.soap_header)
-
-        return self._call_hook('soap-response', dispatcher=self, request=request, response=response)
+            if _has_iterators(response.soap_body):
+                response.http_content = SOAP.Envelope.iter_response(tagname, response.soap_body,
+                                                                    header=response.soap_header)
+            else:
+                response.http_content = SOAP.Envelope.response(tagname, response.soap_body,
+                                                               header=response.soap_header)
+
+        return response
+
+    def _compress_response(self, request, response):
+        if self.compression_threshold is None:
+            return response
+        response.http_headers['Vary'] = 'Accept-Encoding'
+        content = response.http_content
+        if response.is_streaming:
+            pass  # the size is unknown, streamed responses are expected to be large
+        elif not isinstance(content, bytes) or len(content) < self.compression_threshold:
+            return response
+        if 'Content-Encoding' in response.http_headers:
+            return response
+        encoding = compression.negotiate(request.environ.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is not None:
+            if response.is_streaming:
+                response.http_content = compression.compress_chunks(content, encoding)
+            else:
+                response.http_content = compression.compress(content, encoding)
+            response.http_headers['Content-Encoding'] = encoding
+        return response
 
     def handle_wsdl_request(self, request):
         request = self._call_hook('wsdl-request', dispatcher=self, request=request)
         scheme = request.environ.get('X_FORWARDED_PROTO', request.environ.get('wsgi.url_scheme', 'http'))
         host = request.environ.get('HTTP_HOST')
-        wsdl = self.wsdl
-        if scheme and host:
-            wsdl = string.Template(wsdl.decode()).safe_substitute(scheme=scheme, host=host).encode()
-        response = SOAPResponse('wsdl', http_content=wsdl, http_headers={'Content-Type': 'text/xml'})
-        return self._call_hook('wsdl-response', dispatcher=self, request=request, response=response)
+
+        def render():
+            wsdl = self.wsdl
+            if scheme and host:
+                wsdl = string.Template(wsdl.decode()).safe_substitute(scheme=scheme, host=host).encode()
+            return wsdl
+
+        document = self.documents.get(('wsdl', scheme, host), render)
+        response = self._document_response(request, 'wsdl', document)
+        response = self._call_hook('wsdl-response', dispatcher=self, request=request, response=response)
+        return self._compress_document(request, response, document)
 
     def handle_xsd_request(self, request):
         request = self._call_hook('xsd-request', dispatcher=self, request=request)
-        qs = request.environ.get('QUERY_STRING')
-        qs = parse_qs(qs, keep_blank_values=True)
-        try:
-            xsd = self.xsds[qs['xsd'][0] or 'xsd']
-        except KeyError:
+        qs = _parse_qs(request.environ.get('QUERY_STRING') or '')
+        values = qs.get('xsd')
+        name = (values[0] or 'xsd') if values else None  # without the parameter nothing is found
+        if name in self.xsds:
+            document = self.documents.get(('xsd', name), lambda: self.xsds[name])
+            response = self._document_response(request, 'xsd', document)
+        else:
+            document = None
             response = SOAPResponse('not found', http_status_code=404, http_content='not_found',
                                     http_headers={'Content-Type': 'text/plain'})
-        else:
-            response = SOAPResponse('xsd', http_content=xsd, http_headers={'Content-Type': 'text/xml'})
 
-        return self._call_hook('wsdl-response', dispatcher=self, request=request, response=response)
+        response = self._call_hook('wsdl-response', dispatcher=self, request=request, response=response)
+        return self._compress_document(request, response, document)
+
+    def _document_response(self, request, soap_body, document):
+        # the response is compressed after the 'wsdl-response' hook (see _compress_document()), so hooks get the XML
+        headers = {
+            'Content-Type': 'text/xml',
+            'ETag': document.etag,
+            'Last-Modified': self.last_modified,
+            'Vary': 'Accept-Encoding',
+        }
+        if_none_match = request.environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etags = {etag.strip().replace('W/', '', 1) for etag in if_none_match.split(',')}
+            not_modified = document.etag in etags or '*' in etags
+        else:
+            modified_since = _parse_http_date(request.environ.get('HTTP_IF_MODIFIED_SINCE'))
+            not_modified = modified_since is not None and self._last_modified_time <= modified_since
+        if not_modified:
+            return SOAPResponse(soap_body, http_status_code=304, http_content=b'', http_headers=headers)
+        return SOAPResponse(soap_body, http_content=document.content, http_headers=headers)
+
+    def _compress_document(self, request, response, document):
+        content = response.http_content
+        if document is None or response.http_status_code != 200 or not isinstance(content, bytes):
+            return response
+        if 'Content-Encoding' in response.http_headers:
+            return response
+        if compression.negotiate(request.environ.get('HTTP_ACCEPT_ENCODING'), ('gzip',)):
+            # the pre-compressed document is only used if a hook did not change it
+            if content is document.content:
+                response.http_content = document.gzip_content
+            else:
+                response.http_content = compression.compress(content, 'gzip')
+            response.http_headers['Content-Encoding'] = 'gzip'
+        return response
 
     def _rewrite_locations(self, element):
         for e in element.xpath('//xsd:import|//xsd:include', namespaces=element.nsmap):
@@ -246,14 +675,230 @@ class SOAPDispatcher:
         return obj
 
 
+def _parse_http_date(value):
+    """Return the timestamp of an HTTP date (e.g. of an If-Modified-Since header) or None if it is invalid."""
+    parsed = email.utils.parsedate_tz(value) if value else None
+    return email.utils.mktime_tz(parsed) if parsed is not None else None
+
+
+def _has_iterators(value):
+    """
+    Return whether list fields of a response body are iterators, e.g. generators.
+
+    Only the fields of the body itself are checked, so the check is cheap and does not parse lazily parsed fields.
+    Generated lists of nested elements are rendered without streaming.
+    """
+    if not isinstance(value, xsd.ComplexType):
+        return False
+    meta = value._meta
+    pending = getattr(value, '__dict__', {}).get('_lazy') or ()
+    for i in meta.lists:
+        name = meta.all[i]._name
+        if name in pending:
+            continue
+        item = getattr(value, name)
+        if item is not None and not isinstance(item, list):
+            return True
+    return False
+
+
 class WsgiSoapApplication:
-    def __init__(self, dispatcher):
+    """
+    WSGI application serving a SOAPDispatcher.
+
+    With `streaming` enabled the request body is fed chunk by chunk into an incremental XML parser instead of being
+    buffered completely, so only the parsed tree is kept in memory. Requests with an unknown SOAP action (as far as it
+    is known from the HTTP headers) or a body exceeding `max_body_size` bytes are rejected before reading the rest of
+    the body. Compressed request bodies (`Content-Encoding`) are decompressed while parsing, `max_body_size` then also
+    limits the decompressed size. Note that `soap-request` hooks do not get the raw `http_content` in streaming mode.
+
+    Streamed responses (see `SOAPDispatcher`) are returned as they are, i.e. the server sends the chunks as they are
+    generated.
+    """
+
+    def __init__(self, dispatcher, streaming=False, max_body_size=None, chunk_size=64 * 1024):
         self.dispatcher = dispatcher
+        self.streaming = streaming
+        self.max_body_size = max_body_size
+        self.chunk_size = chunk_size
 
     def __call__(self, req_env, start_response, wsgi_url=None):
-        content_length = int(req_env.get('CONTENT_LENGTH', '') or 0)
-        content = req_env['wsgi.input'].read(content_length)
-        soap_request = SOAPRequest(req_env, content)
-        response = self.dispatcher.dispatch(soap_request)
+        if self.streaming and req_env.get('REQUEST_METHOD') == 'POST':
+            soap_request = self._read_streaming(req_env)
+        else:
+            soap_request = self._read(req_env)
+        if isinstance(soap_request, SOAPResponse):
+            response = soap_request
+        else:
+            response = self.dispatcher.dispatch(soap_request)
         start_response(response.http_status_text, list(response.http_headers.items()))
+        if response.is_streaming:
+            return response.http_content
         return [response.http_content]
+
+    def _read(self, req_env):
+        content_length = self._content_length(req_env)
+        if self.max_body_size is not None and (content_length or 0) > self.max_body_size:
+            return self._error_response(req_env, 413, 'Request body too large')
+        if content_length is not None:
+            content = req_env['wsgi.input'].read(content_length)
+        else:
+            content = bytearray()
+            for chunk in self._iter_input(req_env, None):
+                content += chunk
+                if self.max_body_size is not None and len(content) > self.max_body_size:
+                    return self._error_response(req_env, 413, 'Request body too large')
+            content = bytes(content)
+        soap_request = SOAPRequest(req_env, content)
+        # the decompressed body is limited like the body of streamed requests
+        soap_request._max_decompressed_size = self.max_body_size
+        return soap_request
+
+    def _read_streaming(self, req_env):
+        SOAP = self.dispatcher.service.version
+        content_length = self._content_length(req_env)
+        if self.max_body_size is not None and (content_length or 0) > self.max_body_size:
+            return self._error_response(req_env, 413, 'Request body too large')
+        action = SOAP.determine_soap_action(SOAPRequest(req_env, None))
+        if action and self.dispatcher.index.find_method_by_action(action) is None:
+            return self._error_response(req_env, 500, f'Invalid SOAP action: {action}')
+
+        encoding = req_env.get('HTTP_CONTENT_ENCODING', '').strip()
+        decompressor = None
+        if encoding and encoding.lower() != 'identity':
+            try:
+                decompressor = compression.Decompressor(encoding, max_size=self.max_body_size)
+            except compression.CompressionError as e:
+                return self._error_response(req_env, 415, str(e))
+
+        parser = parsers.get_parser()
+        size = 0
+        try:
+            for chunk in self._iter_input(req_env, content_length):
+                size += len(chunk)
+                if self.max_body_size is not None and size > self.max_body_size:
+                    raise compression.ContentTooLarge()
+                parser.feed(decompressor.decompress(chunk) if decompressor is not None else chunk)
+            if decompressor is not None:
+                parser.feed(decompressor.flush())
+            xmlelement = parser.close()
+        except compression.ContentTooLarge:
+            parsers.discard(parser)
+            return self._error_response(req_env, 413, 'Request body too large')
+        except (etree.XMLSyntaxError, compression.CompressionError) as e:
+            parsers.discard(parser)
+            return self._error_response(req_env, 500, f'{e.__class__.__name__}: {e}')
+        except BaseException:
+            # e.g. the client disconnected, the next request on this thread must start with a new document
+            parsers.discard(parser)
+            raise
+        return SOAPRequest(req_env, None, xmlelement=xmlelement)
+
+    def _content_length(self, req_env):
+        content_length = req_env.get('CONTENT_LENGTH', '')
+        if content_length in ('', None):
+            # e.g. chunked transfer encoding: only safe to read until EOF if the server says so (see PEP 3333)
+            return None if req_env.get('wsgi.input_terminated') else 0
+        return int(content_length)
+
+    def _iter_input(self, req_env, content_length):
+        stream = req_env['wsgi.input']
+        remaining = content_length
+        while remaining is None or remaining > 0:
+            size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+    def _error_response(self, req_env, status_code, message):
+        SOAP = self.dispatcher.service.version
+        request = SOAPRequest(req_env, None)
+        response = self.dispatcher._render_soap_response(request, SOAPError(SOAP.Code.CLIENT, message))
+        response.http_status_code = status_code
+        return response
+
+
+class AsgiSoapApplication:
+    """
+    ASGI application serving a SOAPDispatcher.
+
+    Handlers (and middlewares) may be coroutine functions. Requests with a body of at least `offload_threshold` bytes
+    are parsed, validated and rendered in `executor` so the event loop stays responsive.
+    """
+
+    def __init__(self, dispatcher, executor=None, offload_threshold=64 * 1024):
+        self.dispatcher = dispatcher
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']!r}")
+
+        content = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            content += message.get('body', b'')
+            if not message.get('more_body', False):
+                break
+
+        soap_request = SOAPRequest(self._environ(scope, content), bytes(content))
+        offload = self.offload_threshold is not None and len(content) >= self.offload_threshold
+        response = await self.dispatcher.dispatch_async(soap_request, executor=self.executor, offload=offload)
+
+        http_content = response.http_content
+        if isinstance(http_content, str):
+            http_content = http_content.encode()
+        headers = [(k.lower().encode('latin-1'), str(v).encode('latin-1')) for k, v in response.http_headers.items()]
+        await send({'type': 'http.response.start', 'status': response.http_status_code, 'headers': headers})
+        if response.is_streaming:
+            # chunks are rendered in the executor, a streamed response can take a while to generate
+            loop = asyncio.get_running_loop()
+            chunks = iter(http_content)
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+                if chunk is None:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            http_content = b''
+        await send({'type': 'http.response.body', 'body': http_content or b''})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def _environ(scope, content):
+        """Translate the ASGI scope to a WSGI-style environment as expected by the dispatcher."""
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'],
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'CONTENT_LENGTH': str(len(content)),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'asgi.scope': scope,
+        }
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = name if name == 'CONTENT_TYPE' else f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
@@ -1,3 +1,4 @@
 from .echo_service import *  # NOQA
 from .generated_symbols import *  # NOQA
 from .simpletype_testcase import *  # NOQA
+from .stream_service import *  # NOQA
@@ -2,7 +2,7 @@ import unittest
 
 from lxml import etree
 
-from .. import xsd
+from .. import parsers, xsd
 
 __all__ = ['SimpleTypeTestCase']
 
@@ -42,5 +42,4 @@ class SimpleTypeTestCase(unittest.TestCase):
         return Container.parsexml(xml).foo
 
     def _normalize(self, xml):
-        parser = etree.XMLParser(remove_blank_text=True)
-        return etree.tostring(etree.XML(xml, parser=parser))
+        return etree.tostring(parsers.fromstring(xml, remove_blank_text=True))
@@ -0,0 +1,60 @@
+from .. import xsd
+from ..core import SOAPResponse
+from ..soap import Service, SOAPVersion
+
+__all__ = ['stream_service']
+
+
+class Row(xsd.ComplexType):
+    INHERITANCE = None
+    INDICATOR = xsd.Sequence
+    id = xsd.Element(xsd.Integer)
+    name = xsd.Element(xsd.String)
+
+
+class ReportRequest(xsd.ComplexType):
+    INHERITANCE = None
+    INDICATOR = xsd.Sequence
+    count = xsd.Element(xsd.Integer)
+
+
+class Report(xsd.ComplexType):
+    INHERITANCE = None
+    INDICATOR = xsd.Sequence
+    title = xsd.Element(xsd.String)
+    rows = xsd.ListElement(Row, 'row', minOccurs=0, maxOccurs=xsd.UNBOUNDED)
+
+
+def report_handler(request, input_):
+    # the rows are generated while the response is written
+    rows = (Row(id=i, name=f'row {i}') for i in range(input_.count))
+    return SOAPResponse(Report(title='report', rows=rows))
+
+
+def stream_service(handler=report_handler):
+    """Service with a `report` operation returning `count` rows from a generator (i.e. a streamed response)."""
+    ReportSchema = xsd.Schema(
+        'http://soap.example/report/types',
+        elementFormDefault=xsd.ElementFormDefault.UNQUALIFIED,
+        complexTypes=(Row, ReportRequest, Report),
+        elements={
+            'reportRequest': xsd.Element(ReportRequest),
+            'reportResponse': xsd.Element(Report),
+        },
+    )
+    report_method = xsd.Method(function=handler,
+                               soapAction='report',
+                               input='reportRequest',
+                               inputPartName='input_',
+                               output='reportResponse',
+                               outputPartName='result',
+                               operationName='reportOperation',
+                               )
+    return Service(
+        name='ReportService',
+        targetNamespace='http://soap.example/report',
+        location='http://soap.example/ws',
+        schemas=[ReportSchema],
+        version=SOAPVersion.SOAP11,
+        methods=[report_method],
+    )
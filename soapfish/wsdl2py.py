@@ -6,8 +6,7 @@ import logging
 import os
 import sys
 
-from lxml import etree
-
+from . import parsers
 from .soap import SOAPVersion
 from .utils import find_xsd_namespaces, get_rendering_environment, open_document, resolve_location
 from .wsdl import get_wsdl_classes
@@ -50,7 +49,7 @@ def merge_imports(wsdl, definitions, xsd_namespaces, cwd=None, seen=None):
         seen.add(path)
 
         xml = open_document(path)
-        xml = etree.fromstring(xml)
+        xml = parsers.fromstring(xml)
 
         xsd_namespaces.update(find_xsd_namespaces(xml))
 
@@ -73,7 +72,7 @@ def merge_imports(wsdl, definitions, xsd_namespaces, cwd=None, seen=None):
 def generate_code_from_wsdl(xml, target, use_wsa=False, encoding='utf8', cwd=None):
 
     if isinstance(xml, bytes):
-        xml = etree.fromstring(xml)
+        xml = parsers.fromstring(xml)
 
     if cwd is None:
         cwd = os.getcwd()
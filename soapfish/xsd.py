@@ -32,16 +32,18 @@ import decimal
 import enum
 import functools
 import importlib
+import io
 import itertools
 import logging
+import operator
 import re
-from datetime import datetime, time, timedelta, timezone
+import sys
+import threading
+from datetime import datetime, time, timezone
 
-import iso8601
 from lxml import etree
 
-from . import namespaces as ns
-from .utils import timezone_offset_to_string
+from . import namespaces as ns, parsers, xsd_codecs
 from .xsd_types import XSDDate
 
 logger = logging.getLogger(__name__)
@@ -49,6 +51,9 @@ logger = logging.getLogger(__name__)
 NIL = object()
 UNBOUNDED = decimal.Decimal('infinity')
 
+_WHITESPACE_REGEX = re.compile(r'[\t\r\n\s]')
+_WHITESPACE_RUN_REGEX = re.compile(r'[\t\r\n\s]+')
+
 
 class CallStyle(str, enum.Enum):
     DOCUMENT = 'document'
@@ -91,6 +96,8 @@ class All(Indicator):
 
 
 class Type:
+    __slots__ = ()
+
     def accept(self, value):
         raise NotImplementedError
 
@@ -105,6 +112,19 @@ class Type:
 
 
 class SimpleType(Type):
+    _validate = None  # facets compiled on first use, see String and Decimal
+
+    def __setattr__(self, name, value):
+        if name != '_validate':
+            self.__dict__.pop('_validate', None)  # facets changed, compile them again
+        super().__setattr__(name, value)
+
+    def __getstate__(self):
+        # the compiled facets are closures (which can not be pickled), they are compiled again after unpickling
+        state = dict(self.__dict__)
+        state.pop('_validate', None)
+        return state
+
     def render(self, parent, value, namespace, elementFormDefault):
         parent.text = self.xmlvalue(value)
 
@@ -117,6 +137,14 @@ class SimpleType(Type):
     def pythonvalue(self, xmlvalue):
         raise NotImplementedError
 
+    def trusted_pythonvalue(self, xmlvalue):
+        """
+        Return the accepted value for text of a document which was validated against the schema already.
+
+        Subclasses can skip checking the constraining facets here, the conversion must match `accept()`.
+        """
+        return self.accept(self.pythonvalue(xmlvalue))
+
 
 class String(SimpleType):
     # To be defined in children.
@@ -149,30 +177,25 @@ class String(SimpleType):
         if not isinstance(value, str):
             raise ValueError(f"Value {value!r} for class '{self.__class__.__name__}'.")
 
-        value = self._clean_whitespace(value)
+        validate = self._validate
+        if validate is None:
+            validate = self._validate = self._compile_facets()
+        return validate(value)
 
+    def _compile_facets(self):
+        """Return a function normalizing the whitespace of a value and checking only the facets which are set."""
+        checks = []
         if self.pattern:
-            pattern = self.pattern + '$'
-            if re.match(pattern, value) is None:
-                raise ValueError(f"Value '{value}' doesn't match pattern '{self.pattern}'")
-
+            checks.append(_pattern_check(self.pattern, "Value '{value}' doesn't match pattern '{pattern}'"))
         if self.enumeration:
-            if not (value in self.enumeration):
-                raise ValueError(f"Value '{value}' not in list {self.enumeration}.")
-
+            checks.append(_enumeration_check(self.enumeration, "Value '{value}' not in list {enumeration}."))
         if self.length:
-            if len(value) != self.length:
-                raise ValueError(f"Value '{value}' length {self.length} expected.")
-
+            checks.append(_bound_check(operator.ne, self.length, "Value '{value}' length {bound} expected.", len))
         if self.minLength:
-            if len(value) < self.minLength:
-                raise ValueError(f"Value '{value}' minLength {self.minLength} expected.")
-
+            checks.append(_bound_check(operator.lt, self.minLength, "Value '{value}' minLength {bound} expected.", len))
         if self.maxLength:
-            if len(value) > self.maxLength:
-                raise ValueError(f"Value '{value}' maxLength {self.maxLength} expected.")
-
-        return value
+            checks.append(_bound_check(operator.gt, self.maxLength, "Value '{value}' maxLength {bound} expected.", len))
+        return _validator(checks, clean=self._whitespace_cleaner())
 
     def xmlvalue(self, value):
         return value
@@ -180,18 +203,22 @@ class String(SimpleType):
     def pythonvalue(self, xmlvalue):
         return xmlvalue
 
+    def trusted_pythonvalue(self, xmlvalue):
+        value = self.pythonvalue(xmlvalue)
+        return None if value is None else self._clean_whitespace(value)
+
     def _clean_whitespace(self, value):
-        if self.whiteSpace == 'preserve':
-            # do nothing, just preserve the value
-            pass
-        elif self.whiteSpace == 'replace':
+        clean = self._whitespace_cleaner()
+        return value if clean is None else clean(value)
+
+    def _whitespace_cleaner(self):
+        if self.whiteSpace == 'replace':
             # replace line feeds, tabs, spaces, and carriage returns with whitespaces
-            value = re.sub(r'[\t\r\n\s]', ' ', value)
+            return functools.partial(_WHITESPACE_REGEX.sub, ' ')
         elif self.whiteSpace == 'collapse':
             # clean line feeds, tabs, spaces, and carriage returns with one whitespace
-            value = re.sub(r'[\t\r\n\s]+', ' ', value)
-
-        return value
+            return functools.partial(_WHITESPACE_RUN_REGEX.sub, ' ')
+        return None  # 'preserve' or not set: do nothing, just preserve the value
 
 
 class Boolean(SimpleType):
@@ -246,11 +273,7 @@ class Date(SimpleType):
         raise ValueError(f'Incorrect type value {value!r} for date field.')
 
     def xmlvalue(self, value):
-        timestring_without_tz = value.strftime('%Y-%m-%d')
-        tz = getattr(value, 'tzinfo', None)
-        if not tz:
-            return timestring_without_tz
-        return timestring_without_tz + timezone_offset_to_string(tz.utcoffset(None))
+        return xsd_codecs.format_date(value)
 
     def pythonvalue(self, value):
         if value is None or value == 'nil':
@@ -277,7 +300,7 @@ class Date(SimpleType):
         sign = 1 if match.group('tz_sign') == '+' else -1
         hours = int(match.group('tz_hour'))
         minutes = int(match.group('tz_minute'))
-        return timezone(sign * timedelta(hours=hours, minutes=minutes), name='UTC' + offset)
+        return xsd_codecs.fixed_timezone(sign * (hours * 60 + minutes), 'UTC' + offset)
 
 
 class DateTime(SimpleType):
@@ -289,20 +312,16 @@ class DateTime(SimpleType):
         elif isinstance(value, datetime):
             return value
         elif isinstance(value, str):
-            return iso8601.parse_date(value)
+            return xsd_codecs.parse_datetime(value)
         raise ValueError(f"Incorrect type value '{value}' for DateTime field.")
 
     def xmlvalue(self, value):
         if value is None:
             return 'nil'
-        timestring_without_tz = value.strftime('%Y-%m-%dT%H:%M:%S')
-        tz = value.tzinfo
-        if not tz:
-            return timestring_without_tz
-        return timestring_without_tz + timezone_offset_to_string(tz.utcoffset(value))
+        return xsd_codecs.format_datetime(value)
 
     def pythonvalue(self, value):
-        return None if value is None or value == 'nil' else iso8601.parse_date(value)
+        return None if value is None or value == 'nil' else xsd_codecs.parse_datetime(value)
 
 
 class Time(SimpleType):
@@ -320,24 +339,17 @@ class Time(SimpleType):
     def xmlvalue(self, value):
         if value is None:
             return 'nil'
-        timestring_without_tz = value.strftime('%H:%M:%S')
-        tz = value.tzinfo
-        if not tz:
-            return timestring_without_tz
-        return timestring_without_tz + timezone_offset_to_string(tz.utcoffset(None))
+        return xsd_codecs.format_time(value)
 
     def pythonvalue(self, value):
         return None if value is None or value == 'nil' else self._parse(value)
 
     @staticmethod
     def _parse(value):
-        # Horrible hacky approach to implement this quickly:
         try:
-            dt = iso8601.parse_date('1900-01-01T' + value)
+            return xsd_codecs.parse_time(value)
         except Exception as e:
             raise ValueError(str(e)) from e
-        else:
-            return dt.time().replace(tzinfo=dt.tzinfo)
 
 
 class Decimal(SimpleType):
@@ -355,44 +367,30 @@ class Decimal(SimpleType):
         self.totalDigits = totalDigits
 
     def _check_restrictions(self, value):
-        if self.enumeration is not None and value not in self.enumeration:
-            raise ValueError(f'{value} not in enumeration {self.enumeration}')
-
-        if self.fractionDigits is not None:
-            strvalue = str(value)
-            if self.fractionDigits == 0:
-                if '.' in strvalue:
-                    raise ValueError(f'Wrong fraction digits for value {strvalue} allowed {self.fractionDigits}')
-            else:
-                if '.' not in strvalue:
-                    raise ValueError(f'Wrong fraction digits for value {strvalue} allowed {self.fractionDigits}')
-                fr = strvalue.split('.')[1]
-                if len(fr) != self.fractionDigits:
-                    raise ValueError(f'Wrong fraction digits for value {strvalue} allowed {self.fractionDigits}')
-
-        if self.maxExclusive is not None and value >= self.maxExclusive:
-            raise ValueError(f'Value {value} greater or equal to maxExclusive {self.maxExclusive}')
-        if self.maxInclusive is not None and value > self.maxInclusive:
-            raise ValueError(f'Value {value} greater than maxInclusive {self.maxInclusive}')
-        if self.minExclusive is not None and value <= self.minExclusive:
-            raise ValueError(f'Value {value} smaller or equal to minExclusive {self.minExclusive}')
-        if self.minInclusive is not None and value < self.minInclusive:
-            raise ValueError(f'Value {value} smaller than minInclusive {self.minInclusive}')
-
-        if self.pattern is not None:
-            pattern = self.pattern + '$'
-            if re.match(pattern, str(value)) is None:
-                raise ValueError(f"Value {value} doesn't match pattern {self.pattern}.")
-
-        if self.totalDigits is not None:
-            strvalue = str(value)
-            length = len(strvalue)
-            if '.' in strvalue:
-                length -= 1
-            if length > self.totalDigits:
-                raise ValueError(f'Number of total digits of {strvalue} is bigger than {self.totalDigits}.')
-
-        return value
+        validate = self._validate
+        if validate is None:
+            validate = self._validate = self._compile_facets(self._facets())
+        return validate(value)
+
+    def _facets(self):
+        names = ('enumeration', 'fractionDigits', 'maxExclusive', 'maxInclusive', 'minExclusive', 'minInclusive',
+                 'pattern', 'totalDigits')
+        return {name: getattr(self, name) for name in names if getattr(self, name) is not None}
+
+    def _compile_facets(self, facets):
+        """Return a function checking a value against the given facets only, `str(value)` is computed once."""
+        checks = []
+        if 'enumeration' in facets:
+            checks.append(_enumeration_check(facets['enumeration'], '{value} not in enumeration {enumeration}'))
+        if 'fractionDigits' in facets:
+            checks.append(_fraction_digits_check(facets['fractionDigits']))
+        checks.extend(_range_checks(facets))
+        if 'pattern' in facets:
+            checks.append(_pattern_check(facets['pattern'], "Value {value} doesn't match pattern {pattern}."))
+        if 'totalDigits' in facets:
+            checks.append(_total_digits_check(facets['totalDigits']))
+        as_text = str if facets.keys() & {'fractionDigits', 'pattern', 'totalDigits'} else None
+        return _validator(checks, as_text=as_text)
 
     def accept(self, value):
         if value is None:
@@ -418,6 +416,9 @@ class Decimal(SimpleType):
         else:
             return self.accept(xmlvalue)
 
+    def trusted_pythonvalue(self, xmlvalue):
+        return None if xmlvalue is None or xmlvalue == 'nil' else float(xmlvalue)
+
 
 class Double(Decimal):
     def __init__(self, enumeration=None, maxExclusive=None, maxInclusive=None, minExclusive=None, minInclusive=None,
@@ -443,10 +444,32 @@ class Integer(Decimal):
     def __init__(self, enumeration=None, fractionDigits=None, maxExclusive=None, maxInclusive=None, minExclusive=None,
                  minInclusive=None, pattern=None, totalDigits=None):
         facets = {k: v for k, v in locals().items() if k not in {'self', '__class__'}}
-        for c in itertools.dropwhile(lambda x: x != Integer, reversed(self.__class__.__mro__)):
-            facets.update(c.overrides)
+        facets.update(self._merged_overrides())
         super().__init__(**facets)
 
+    @classmethod
+    def _merged_overrides(cls):
+        """Return the overrides of the class and its bases (up to Integer), merged once per class."""
+        overrides = cls.__dict__.get('_overrides')
+        if overrides is None:
+            overrides = {}
+            for c in itertools.dropwhile(lambda x: x != Integer, reversed(cls.__mro__)):
+                overrides.update(c.overrides)
+            cls._overrides = overrides
+        return overrides
+
+    def _compile_facets(self, facets):
+        validate = super()._compile_facets(facets)
+        if facets.get('fractionDigits') != 0 or facets.get('pattern') != Integer.overrides['pattern']:
+            return validate
+        # str() of an int never has a fraction and always matches the default pattern, so these are only checked for
+        # other values (e.g. booleans)
+        validate_int = super()._compile_facets({k: v for k, v in facets.items() if k not in ('fractionDigits', 'pattern')})
+
+        def validate_value(value):
+            return validate_int(value) if type(value) is int else validate(value)
+        return validate_value
+
     def accept(self, value):
         if value is None:
             return None
@@ -460,6 +483,9 @@ class Integer(Decimal):
         self._check_restrictions(value)
         return value
 
+    def trusted_pythonvalue(self, xmlvalue):
+        return None if xmlvalue is None or xmlvalue == 'nil' else int(xmlvalue)
+
 
 class NonNegativeInteger(Integer):
     overrides = {'minInclusive': 0}
@@ -525,6 +551,116 @@ class MaxOccurs(SimpleType):
         return self.accept(xmlvalue)
 
 
+_DECIMAL_BOUNDS = (
+    ('maxExclusive', operator.ge, 'Value {value} greater or equal to maxExclusive {bound}'),
+    ('maxInclusive', operator.gt, 'Value {value} greater than maxInclusive {bound}'),
+    ('minExclusive', operator.le, 'Value {value} smaller or equal to minExclusive {bound}'),
+    ('minInclusive', operator.lt, 'Value {value} smaller than minInclusive {bound}'),
+)
+
+
+def _validator(checks, clean=None, as_text=None):
+    """
+    Combine facet checks `check(value, text)` into a single function validating (and returning) a value.
+
+    `clean` normalizes the value before it is checked, `as_text` converts it to the text checked by some facets (by
+    default the value is the text).
+    """
+    if clean is None and as_text is None:
+        if len(checks) == 1:
+            check = checks[0]
+
+            def validate(value):
+                check(value, value)
+                return value
+            return validate
+
+        def validate_value(value):
+            for check in checks:
+                check(value, value)
+            return value
+        return validate_value
+
+    def validate(value):
+        if clean is not None:
+            value = clean(value)
+        text = value if as_text is None else as_text(value)
+        for check in checks:
+            check(value, text)
+        return value
+    return validate
+
+
+def _pattern_check(pattern, message):
+    match = re.compile(pattern + '$').match
+
+    def check(value, text):
+        if match(text) is None:
+            raise ValueError(message.format(value=value, pattern=pattern))
+    return check
+
+
+def _enumeration_check(enumeration, message):
+    values = _lookup_set(enumeration)
+
+    def check(value, text):
+        if value not in values:
+            raise ValueError(message.format(value=value, enumeration=enumeration))
+    return check
+
+
+def _bound_check(compare, bound, message, measure=None):
+    """Return a check raising ValueError if `compare(value, bound)` (or `compare(measure(value), bound)`) is true."""
+    if measure is None:
+        def check(value, text):
+            if compare(value, bound):
+                raise ValueError(message.format(value=value, bound=bound))
+        return check
+
+    def check_measure(value, text):
+        if compare(measure(value), bound):
+            raise ValueError(message.format(value=value, bound=bound))
+    return check_measure
+
+
+def _range_checks(facets):
+    """Return the checks of the range facets, a single one for the common case of an inclusive range."""
+    bounds = [(name, compare, message) for name, compare, message in _DECIMAL_BOUNDS if name in facets]
+    if [name for name, _, _ in bounds] != ['maxInclusive', 'minInclusive']:
+        return [_bound_check(compare, facets[name], message) for name, compare, message in bounds]
+    (_, _, max_message), (_, _, min_message) = bounds
+    lower, upper = facets['minInclusive'], facets['maxInclusive']
+
+    def check(value, text):
+        if value > upper:
+            raise ValueError(max_message.format(value=value, bound=upper))
+        if value < lower:
+            raise ValueError(min_message.format(value=value, bound=lower))
+    return [check]
+
+
+def _fraction_digits_check(fractionDigits):
+    def check(value, text):
+        if ('.' in text) if fractionDigits == 0 else ('.' not in text or len(text.split('.')[1]) != fractionDigits):
+            raise ValueError(f'Wrong fraction digits for value {text} allowed {fractionDigits}')
+    return check
+
+
+def _total_digits_check(totalDigits):
+    def check(value, text):
+        if len(text) - ('.' in text) > totalDigits:
+            raise ValueError(f'Number of total digits of {text} is bigger than {totalDigits}.')
+    return check
+
+
+def _lookup_set(values):
+    """Return the enumeration values as a frozenset for fast membership tests (if they are hashable)."""
+    try:
+        return frozenset(values)
+    except TypeError:
+        return tuple(values)
+
+
 def import_type(type_name):
     if '.' not in type_name:
         raise ValueError(f'We need the full namepath to be able to import it: {type_name}')
@@ -580,6 +716,14 @@ class Element:
             else:
                 self._type = self._passed_type()
 
+    def __get__(self, instance, owner=None):
+        # Only called for fields missing from the instance, i.e. fields of lazily parsed instances not accessed yet.
+        if instance is not None:
+            pending = instance.__dict__.get('_lazy')
+            if pending and self._name in pending:
+                return instance._materialize(self._name)
+        return self
+
     def empty_value(self):
         """
         Empty value used when a new object is constructed for a field.
@@ -749,6 +893,8 @@ class Content(Ref):
 
 
 class TypedList(list):  # lgtm [py/missing-equals]
+    __slots__ = ('_list',)
+
     def __init__(self, element):
         super().__init__()
         self._list = element
@@ -765,6 +911,90 @@ class TypedList(list):  # lgtm [py/missing-equals]
             raise ValueError(f'You must not add more than {self._list._maxOccurs} items to this list.')
         super().append(accepted_value)
 
+    def __reduce_ex__(self, protocol):
+        # the items were accepted already, pickle must not append them before the element is restored
+        return (_restore_typed_list, (self._list, list(self)))
+
+
+def _restore_typed_list(element, items):
+    typed_list = TypedList(element)
+    list.extend(typed_list, items)
+    return typed_list
+
+
+class LazyTypedList(TypedList):
+    """
+    TypedList of a lazily parsed ComplexType, the items are parsed from their XML elements on first access.
+
+    Note that operations reading the underlying list of another object directly (e.g. `[] + lazy_list`) only see the
+    items once the list was accessed.
+    """
+
+    __slots__ = ('_pending', '_lock')
+
+    def __init__(self, element, xmlelements, parse_item, trusted=False):
+        super().__init__(element)
+        self._pending = (xmlelements, parse_item, trusted)
+        self._lock = threading.Lock()
+
+    def _materialize(self):
+        # The items are parsed into a scratch list and published at once, so other threads never see a partially
+        # filled list and the pending elements are kept if parsing fails (every access raises the same error).
+        with self._lock:
+            if self._pending is None:  # parsed by another thread in the meantime
+                return
+            xmlelements, parse_item, trusted = self._pending
+            items = TypedList(self._list)
+            append = list.append if trusted else TypedList.append
+            for xmlelement in xmlelements:
+                append(items, parse_item(xmlelement))
+            list.extend(self, items)
+            self._pending = None
+
+
+class FrozenList(list):  # lgtm [py/missing-equals]
+    """List of a frozen ComplexType, rejecting all modifications."""
+
+    __slots__ = ()
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __reduce_ex__(self, protocol):
+        return (FrozenList, (list(self),))
+
+
+def _frozen(name):
+    def method(self, *args, **kwargs):
+        raise TypeError('The list of a frozen instance can not be modified.')
+    method.__name__ = name
+    return method
+
+
+for _name in ('__delitem__', '__iadd__', '__imul__', '__setitem__', 'append', 'clear', 'extend', 'insert', 'pop',
+              'remove', 'reverse', 'sort'):
+    setattr(FrozenList, _name, _frozen(_name))
+del _name
+
+
+def _materializing(name):
+    method = getattr(TypedList, name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._pending is not None:
+            self._materialize()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+for _name in ('__add__', '__contains__', '__delitem__', '__eq__', '__ge__', '__getitem__', '__gt__', '__iadd__',
+              '__imul__', '__iter__', '__le__', '__len__', '__lt__', '__mul__', '__ne__', '__reduce_ex__', '__repr__',
+              '__reversed__', '__rmul__', '__setitem__', 'append', 'clear', 'copy', 'count', 'extend', 'index',
+              'insert', 'pop', 'remove', 'reverse', 'sort'):
+    setattr(LazyTypedList, _name, _materializing(_name))
+del _name
+
 
 class ListElement(Element):
     """
@@ -796,7 +1026,7 @@ class ListElement(Element):
 
     def render(self, parent, field_name, value, namespace=None, elementFormDefault=None):
         self._evaluate_type()
-        items = value  # The value must be list of items.
+        items = value if isinstance(value, list) else list(value)  # e.g. a generator, see iterxml()
         if self._minOccurs and len(items) < self._minOccurs:
             raise ValueError('For %s minOccurs=%d but list length %d.' % (field_name, self._minOccurs, len(items)))
         if self._maxOccurs and len(items) > self._maxOccurs:
@@ -826,14 +1056,25 @@ class ListElement(Element):
 
 class ComplexTypeMetaInfo:
 
-    def __init__(self, cls):
+    def __init__(self, cls, slotted=None):
         self.cls = cls
         self.fields = []
         self.attributes = []
         self.groups = []
+        self.by_name = {}  # field name -> field
+        # fields stored in slots are not class attributes, see Complex_PythonType
+        # (subclasses of slotted classes with `SLOTS = False` still use the slots of their bases)
+        self.slots = any('_frozen_hash' in base.__dict__.get('__slots__', ()) for base in cls.__mro__)
+        self.slotted = {}
+        for base in reversed(cls.__mro__[1:]):
+            if '_meta' in base.__dict__:
+                self.slotted.update(base._meta.slotted)
+        self.slotted.update(slotted or {})
         for attr in dir(cls):
             item = getattr(cls, attr)
-            if isinstance(getattr(cls, attr), Attribute):
+            if attr in self.slotted and not isinstance(item, Element):
+                item = self.slotted[attr]
+            if isinstance(item, Attribute):
                 item._name = attr
                 self.attributes.append(item)
             elif isinstance(item, Ref):
@@ -842,20 +1083,461 @@ class ComplexTypeMetaInfo:
             elif isinstance(item, Element):
                 item._name = attr
                 self.fields.append(item)
+            else:
+                continue
+            self.by_name[attr] = item
         self.fields = sorted(self.fields, key=lambda f: f._creation_number)
         self.attributes = sorted(self.attributes, key=lambda f: f._creation_number)
         self.groups = sorted(self.groups, key=lambda f: f._creation_number)
         self.allelements = sorted(self.fields + self.groups, key=lambda f: f._creation_number)
         self.all = sorted(self.fields + self.groups + self.attributes, key=lambda f: f._creation_number)
+        # field values as a tuple for comparing instances, see ComplexType.__eq__()
+        self.values = _tuple_getter([f._name for f in self.all])
+        self.lists = tuple(i for i, f in enumerate(self.all) if isinstance(f, ListElement))
+        # (name, field, trusted) for initialising new instances, the empty values of lists and groups are always valid
+        self.defaults = [(f._name, f, isinstance(f, (ListElement, Ref))) for f in self.all]
+        # local tag name -> fields (in order) for binding child elements, see fields_for_tag()
+        self.localnames = {}
+        for field in self.fields:
+            for name in dict.fromkeys((field._name, field.tagname)):
+                if name is not None:
+                    self.localnames.setdefault(name, []).append(field)
+        # compiled functions, built on first use (see _compile_renderer() and _compile_binder())
+        self._binders = {}  # (trusted, lean) -> tag -> binders
+        self._lazy_binders = {}
+        self._interners = {}
+        self._render_plans = {}
+        self._write_plans = {}
+
+    def fields_for_tag(self, tag):
+        """Return the fields matching the local name of a tag (in Clark notation)."""
+        return self.localnames.get(tag.rsplit('}', 1)[-1], ())
+
+    def binders_for_tag(self, tag, trusted=False, lean=False):
+        """Return functions binding a child element with the given tag to its fields, memoized per tag."""
+        memo = self._binders.setdefault((trusted, lean), {})
+        binders = memo.get(tag)
+        if binders is None:
+            binders = tuple(_compile_binder(self.cls, field, trusted=trusted, lean=lean)
+                            for field in self.fields_for_tag(tag))
+            if len(memo) < 1024:
+                memo[tag] = binders
+        return binders
+
+    def lazy_binder(self, field, trusted=False):
+        """Return a function binding all child elements of a field for lazily parsed instances."""
+        key = (field._name, trusted)
+        binder = self._lazy_binders.get(key)
+        if binder is None:
+            binder = self._lazy_binders[key] = _compile_lazy_binder(self.cls, field, trusted)
+        return binder
+
+    def interner(self, field):
+        """Return a function replacing parsed values of a field by shared objects (see `_compile_interner()`)."""
+        try:
+            return self._interners[field._name]
+        except KeyError:
+            field._evaluate_type()
+            intern = self._interners[field._name] = _compile_interner(field._type)
+            return intern
+
+    def render_plan(self, namespace, elementFormDefault):
+        """Return (field name, render function) pairs for rendering instances in the given namespace."""
+        key = (namespace, elementFormDefault)
+        plan = self._render_plans.get(key)
+        if plan is None:
+            plan = [(field._name, _compile_renderer(field, namespace, elementFormDefault)) for field in self.all]
+            self._render_plans[key] = plan
+        return plan
+
+    def write_plan(self, namespace, elementFormDefault):
+        """
+        Return (field name, render function) pairs for the attributes and (field name, write function) pairs for the
+        other fields for writing instances in the given namespace incrementally, see `_compile_writer()`.
+        """
+        key = (namespace, elementFormDefault)
+        plan = self._write_plans.get(key)
+        if plan is None:
+            render_plan = dict(self.render_plan(namespace, elementFormDefault))
+            attribute_plan = [(field._name, render_plan[field._name]) for field in self.attributes]
+            element_plan = [(field._name, _compile_writer(field, namespace, elementFormDefault))
+                            for field in self.allelements]
+            plan = self._write_plans[key] = (attribute_plan, element_plan)
+        return plan
+
+
+_XSI_NIL = f'{{{ns.xsi}}}nil'
+
+
+def _compile_renderer(field, namespace, elementFormDefault):
+    """
+    Return a function `render(parent, value)` for a field of a ComplexType.
+
+    Plain elements and lists get specialized functions with the tag name and type resolved upfront, everything else
+    (including subclasses which may override rendering) uses the generic `field.render()`.
+    """
+    field_name = field.tagname or field._name
+    if type(field) not in (Element, ListElement):
+        def render(parent, value):
+            field.render(parent, field_name, value, namespace, elementFormDefault)
+        return render
+
+    field._evaluate_type()
+    _type = field._type
+    if field.namespace is not None:
+        namespace = field.namespace
+    tagname = field.tagname if type(field) is ListElement else field_name
+    if namespace is not None and elementFormDefault == ElementFormDefault.QUALIFIED:
+        tagname = f'{{{namespace}}}{tagname}'
+
+    # simple types are rendered inline unless they override render()
+    simple = isinstance(_type, SimpleType) and type(_type).render is SimpleType.render
+    xmlvalue = _type.xmlvalue if simple else None
+    # Unqualified text-only elements can be created in place, the output is the same.
+    subelement = simple and not tagname.startswith('{')
+
+    if type(field) is Element:
+        def render(parent, value):
+            if value is None:
+                return
+            if subelement and value is not NIL:
+                etree.SubElement(parent, tagname).text = xmlvalue(value)
+                return
+            xmlelement = etree.Element(tagname)
+            if value is NIL:
+                xmlelement.set(_XSI_NIL, 'true')
+            elif simple:
+                xmlelement.text = xmlvalue(value)
+            else:
+                _type.render(xmlelement, value, namespace, elementFormDefault)
+            parent.append(xmlelement)
+        return render
+
+    minOccurs, maxOccurs = field._minOccurs, field._maxOccurs
+
+    def render(parent, items):
+        if not isinstance(items, list):
+            items = list(items)  # e.g. a generator, see iterxml()
+        if minOccurs and len(items) < minOccurs:
+            raise ValueError('For %s minOccurs=%d but list length %d.' % (field_name, minOccurs, len(items)))
+        if maxOccurs and len(items) > maxOccurs:
+            raise ValueError('For %s maxOccurs=%d but list length %d.' % (field_name, maxOccurs, len(items)))
+        for item in items:
+            if subelement and item is not NIL:
+                etree.SubElement(parent, tagname).text = xmlvalue(item)
+                continue
+            xmlelement = etree.Element(tagname)
+            if item is NIL:
+                xmlelement.set(_XSI_NIL, 'true')
+            elif simple:
+                xmlelement.text = xmlvalue(item)
+            else:
+                _type.render(xmlelement, item, namespace, elementFormDefault)
+            parent.append(xmlelement)
+    return render
+
+
+def _compile_writer(field, namespace, elementFormDefault):
+    """
+    Return a generator function `write(xf, value)` writing a field of a ComplexType to an `etree.xmlfile`.
+
+    Plain elements and lists are written element by element (list items may come from any iterable), the generator
+    yields after every list item. Other fields are rendered as usual and written as a whole.
+    """
+    field_name = field.tagname or field._name
+    if type(field) is ClassNamedElement:
+        return _compile_named_writer(field)
+    if type(field) not in (Element, ListElement):
+        return _compile_generic_writer(field, namespace, elementFormDefault)
+
+    field._evaluate_type()
+    _type = field._type
+    if field.namespace is not None:
+        namespace = field.namespace
+    tagname = field.tagname if type(field) is ListElement else field_name
+    if namespace is not None and elementFormDefault == ElementFormDefault.QUALIFIED:
+        tagname = f'{{{namespace}}}{tagname}'
+    simple = isinstance(_type, SimpleType) and type(_type).render is SimpleType.render
+    nested = isinstance(_type, ComplexType) and type(_type).render is ComplexType.render
+    xmlvalue = _type.xmlvalue if simple else None
+
+    def write_value(xf, value):
+        if value is NIL:
+            with xf.element(tagname, {_XSI_NIL: 'true'}):
+                pass
+        elif simple:
+            with xf.element(tagname):
+                text = xmlvalue(value)
+                if text is not None:
+                    xf.write(text)
+        elif nested:
+            yield from _write_instance(xf, value, tagname, namespace, elementFormDefault, _type)
+        else:
+            xmlelement = etree.Element(tagname)
+            _type.render(xmlelement, value, namespace, elementFormDefault)
+            xf.write(xmlelement)
+
+    if type(field) is Element:
+        def write(xf, value):
+            if value is not None:
+                yield from write_value(xf, value)
+        return write
+
+    minOccurs, maxOccurs = field._minOccurs, field._maxOccurs
+
+    def write(xf, items):
+        count = 0
+        for item in items:
+            count += 1
+            if maxOccurs and count > maxOccurs:
+                raise ValueError('For %s maxOccurs=%d but list has more items.' % (field_name, maxOccurs))
+            yield from write_value(xf, item)
+            yield
+        if minOccurs and count < minOccurs:
+            raise ValueError('For %s minOccurs=%d but list length %d.' % (field_name, minOccurs, count))
+    return write
+
+
+def _compile_named_writer(field):
+    field._evaluate_type()
+
+    def write(xf, value):
+        if value is None or value.value is None:
+            return
+        schema = value.value.SCHEMA
+        tagname = f'{{{schema.targetNamespace}}}{value.name}' if schema.targetNamespace else value.name
+        yield from _write_instance(xf, value.value, tagname, schema.targetNamespace, schema.elementFormDefault,
+                                   field._type)
+    return write
+
+
+def _compile_generic_writer(field, namespace, elementFormDefault):
+    render = _compile_renderer(field, namespace, elementFormDefault)
+
+    def write(xf, value):
+        scratch = etree.Element('scratch')
+        render(scratch, value)
+        for xmlelement in scratch:
+            xf.write(xmlelement)
+        yield
+    return write
+
+
+def _write_instance(xf, instance, tagname, namespace, elementFormDefault, _type):
+    """Write a ComplexType instance to an `etree.xmlfile`, see `ComplexType.write()`."""
+    if _type.SCHEMA:
+        namespace = _type.SCHEMA.targetNamespace
+    attribute_plan, element_plan = instance._meta.write_plan(namespace, elementFormDefault)
+    attributes = etree.Element('attributes')
+    for name, render in attribute_plan:
+        render(attributes, getattr(instance, name))
+    with xf.element(tagname, dict(attributes.attrib)):
+        for name, write in element_plan:
+            yield from write(xf, getattr(instance, name))
+
+
+def _compile_value_parser(field, lazy=False, trusted=False, lean=False):
+    """
+    Return a function parsing the value of a (non nil) element for plain elements and lists.
+
+    If `trusted` the function returns the accepted value, skipping the facet checks where possible. If `lean` parsed
+    instances do not keep their source element and values are shared where possible, see `_compile_interner()`.
+    """
+    field._evaluate_type()
+    _type = field._type
+    if isinstance(_type, SimpleType) and type(_type).parse_xmlelement is SimpleType.parse_xmlelement:
+        pythonvalue = _type.trusted_pythonvalue if trusted else _type.pythonvalue
+        intern = _compile_interner(_type) if lean else None
+        if intern is not None:
+            def parse_value(xmlelement):
+                return intern(pythonvalue(xmlelement.text))
+            return parse_value
+
+        def parse_value(xmlelement):
+            return pythonvalue(xmlelement.text)
+        return parse_value
+    if isinstance(_type, ComplexType) and type(_type).parse_xmlelement.__func__ is ComplexType.parse_xmlelement.__func__:
+        if lazy or trusted or lean:
+            return functools.partial(_type.parse_xmlelement, lazy=lazy, trusted=trusted, lean=lean)
+        return _type.parse_xmlelement
+    parse_xmlelement, accept = _type.parse_xmlelement, _type.accept
+    if trusted and lean:
+        def parse_value(xmlelement):
+            return _detach(accept(parse_xmlelement(xmlelement)))
+        return parse_value
+    if trusted:
+        def parse_value(xmlelement):
+            return accept(parse_xmlelement(xmlelement))
+        return parse_value
+    if lean:
+        def parse_value(xmlelement):
+            return _detach(parse_xmlelement(xmlelement))
+        return parse_value
+    return parse_xmlelement
+
+
+def _compile_interner(_type):
+    """
+    Return a function replacing parsed values of a simple type by shared objects or None if the values are not shared.
+
+    Values of an enumeration are replaced by the objects of the enumeration, QNames and NMTOKENs (usually derived from
+    tag names) are interned.
+    """
+    if getattr(_type, 'enumeration', None):
+        shared = {value: value for value in _type.enumeration}
+
+        def intern(value):
+            return shared.get(value, value)
+        return intern
+    if isinstance(_type, (QName, NMTOKEN)):
+        def intern(value):
+            return value if value is None else sys.intern(value)
+        return intern
+    return None
+
+
+def _detach(value):
+    """Remove the source elements from a parsed instance (or list) and its nested instances, returning the value."""
+    if isinstance(value, list):
+        for item in value:
+            _detach(item)
+    elif isinstance(value, ComplexType):
+        if hasattr(value, '_xmlelement'):
+            object.__delattr__(value, '_xmlelement')
+        for field in value._meta.all:
+            _detach(getattr(value, field._name))
+    return value
+
+
+def _compile_binder(cls, field, lazy=False, trusted=False, lean=False):
+    """
+    Return a function `bind(instance, xmlelement)` setting a field of a ComplexType from a child element.
+
+    Like `_compile_renderer()` only plain elements and lists are specialized. If `trusted` the element was validated
+    against the schema already so values are assigned without checking them again.
+    """
+    name = field._name
+    if type(field) not in (Element, ListElement):
+        if lean:
+            def bind(instance, xmlelement):
+                field.parse(instance, name, xmlelement)
+                _detach(getattr(instance, name))
+            return bind
+
+        def bind(instance, xmlelement):
+            field.parse(instance, name, xmlelement)
+        return bind
+
+    parse_value = _compile_value_parser(field, lazy, trusted, lean)
+    _type = field._type
+
+    if type(field) is ListElement:
+        if trusted:
+            def bind(instance, xmlelement):
+                value = NIL if xmlelement.get(_XSI_NIL) else parse_value(xmlelement)
+                list.append(getattr(instance, name), value)
+            return bind
+
+        def bind(instance, xmlelement):
+            value = NIL if xmlelement.get(_XSI_NIL) else parse_value(xmlelement)
+            getattr(instance, name).append(value)
+        return bind
+
+    if cls.__setattr__ is not ComplexType.__setattr__:
+        def bind(instance, xmlelement):
+            value = NIL if xmlelement.get(_XSI_NIL) == 'true' else parse_value(xmlelement)
+            setattr(instance, name, value)
+        return bind
+
+    if trusted:
+        def bind(instance, xmlelement):
+            value = NIL if xmlelement.get(_XSI_NIL) == 'true' else parse_value(xmlelement)
+            object.__setattr__(instance, name, value)
+        return bind
+
+    accept, nillable = _type.accept, field.nillable
+
+    def bind(instance, xmlelement):
+        if xmlelement.get(_XSI_NIL) == 'true':
+            if not nillable:
+                raise ValueError('Nil value for not nillable element.')
+            value = NIL
+        else:
+            value = accept(parse_value(xmlelement))
+        object.__setattr__(instance, name, value)
+    return bind
+
+
+def _compile_lazy_binder(cls, field, trusted=False):
+    """Return a function `bind(instance, xmlelements)` setting a field from all its child elements on first access."""
+    name = field._name
+    if type(field) is ListElement:
+        parse_value = _compile_value_parser(field, lazy=True, trusted=trusted)
+
+        def parse_item(xmlelement):
+            return NIL if xmlelement.get(_XSI_NIL) else parse_value(xmlelement)
+
+        def bind(instance, xmlelements):
+            object.__setattr__(instance, name, LazyTypedList(field, xmlelements, parse_item, trusted))
+        return bind
+
+    bind_element = _compile_binder(cls, field, lazy=True, trusted=trusted)
+
+    def bind(instance, xmlelements):
+        for xmlelement in xmlelements:
+            bind_element(instance, xmlelement)
+    return bind
+
+
+class _PendingFields(dict):
+    """
+    Field name -> child elements of a lazily parsed ComplexType for fields which were not accessed yet.
+
+    Attributes and groups map to None as these are parsed from the element itself. The lock guards binding a field on
+    first access.
+    """
+
+    __slots__ = ('trusted', 'lock')
+
+
+def _tuple_getter(names):
+    """Like operator.attrgetter(), but always returning a tuple."""
+    if len(names) > 1:
+        return operator.attrgetter(*names)
+    return lambda instance: tuple(getattr(instance, name) for name in names)
+
+
+def _sort_key(value):
+    # None and NIL sort before all other values, so optional fields do not make instances unorderable
+    if value is None:
+        return (0,)
+    if value is NIL:
+        return (1,)
+    if isinstance(value, (list, tuple)):
+        return (2, tuple(_sort_key(item) for item in value))
+    return (2, value)
 
 
 class Complex_PythonType(type):
-    """Python type for ComplexType, builds a _meta object for every class that inherit from ComplexType."""
+    """
+    Python type for ComplexType, builds a _meta object for every class that inherit from ComplexType.
+
+    The fields of classes with `SLOTS = True` are stored in `__slots__` instead of an instance dictionary, the field
+    objects are only kept in `_meta` then.
+    """
 
     def __new__(metacls, name, bases, attrs):
+        slotted = None
+        if attrs.get('SLOTS', any(getattr(base, 'SLOTS', False) for base in bases)):
+            slotted = {attr: value for attr, value in attrs.items() if isinstance(value, Element)}
+            attrs = {attr: value for attr, value in attrs.items() if attr not in slotted}
+            attrs.setdefault('__slots__', ())
+            attrs['__slots__'] = (*attrs['__slots__'], *slotted)
+            if not any(getattr(base, 'SLOTS', False) for base in bases):
+                attrs['__slots__'] += ('_xmlelement', '_frozen_hash')
         newcls = super().__new__(metacls, name, bases, attrs)
         if name != 'Complex':
-            newcls._meta = ComplexTypeMetaInfo(newcls)
+            newcls._meta = ComplexTypeMetaInfo(newcls, slotted)
         return newcls
 
 
@@ -866,11 +1548,21 @@ class ComplexType(Type, metaclass=Complex_PythonType):
     INDICATOR = Sequence  # Indicator see: class Indicators. To be defined in sub-type.
     INHERITANCE = None    # Type of inheritance see: class Inheritance, to be defined in sub-type.
     SCHEMA = None
+    SLOTS = False  # Store field values in slots instead of a __dict__, see Complex_PythonType.
+    _frozen_hash = None  # set by freeze()
+
+    __slots__ = ()
 
     def __new__(cls, *args, **kwargs):
         instance = super().__new__(cls)
-        for field in instance._meta.all:
-            setattr(instance, field._name, field.empty_value())
+        if cls._meta.slots:
+            object.__setattr__(instance, '_frozen_hash', None)
+        for name, field, trusted in cls._meta.defaults:
+            value = field.empty_value()
+            if trusted or value is None:
+                object.__setattr__(instance, name, value)
+            else:
+                setattr(instance, name, value)
         return instance
 
     def __init__(self, **kwargs):
@@ -878,33 +1570,123 @@ class ComplexType(Type, metaclass=Complex_PythonType):
             setattr(self, key, value)
 
     def __setattr__(self, attr, value):
+        if self._frozen_hash is not None:
+            raise AttributeError(f'{self.__class__.__name__} instance is frozen')
         if attr == '_xmlelement':
             super().__setattr__(attr, value)
         else:
-            try:
-                field = self._find_field(self._meta.all, attr)
-                super().__setattr__(attr, field.accept(value))
-            except IndexError as e:
-                raise AttributeError(f"Model '{self.__class__.__name__}' doesn't have attribute '{attr}'.") from e
+            field = self._meta.by_name.get(attr)
+            if field is None:
+                raise ValueError(f"{self.__class__.__name__} has no field '{attr}'")
+            super().__setattr__(attr, field.accept(value))
+
+    def __setstate__(self, state):
+        # used by copy and pickle, the state is a dict and/or the values of slots (see object.__getstate__())
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        frozen = state.pop('_frozen', False)
+        for attr, value in state.items():
+            object.__setattr__(self, attr, value)
+        if frozen:
+            # the hash of strings differs between processes, so it is computed again instead of being restored
+            self.freeze()
+
+    def __getstate__(self):
+        # used by copy and pickle: lazily parsed fields are parsed now, their source element is not part of the state
+        attrs = getattr(self, '__dict__', {})
+        excluded = ('_frozen_hash',)
+        if '_lazy' in attrs:
+            for attr in list(attrs['_lazy']):
+                getattr(self, attr)
+            excluded = ('_frozen_hash', '_lazy', '_xmlelement')
+        state = {attr: value for attr, value in attrs.items() if attr not in excluded}
+        state.update((attr, getattr(self, attr)) for attr in self._meta.slotted)
+        if self._meta.slots and hasattr(self, '_xmlelement'):
+            state['_xmlelement'] = self._xmlelement
+        if self._frozen_hash is not None:
+            state['_frozen'] = True
+        return state
+
+    def _materialize(self, attr):
+        # The field is bound on a scratch instance and published at once, so other threads never see a partially
+        # bound value and the pending elements are kept if binding fails (every access raises the same error).
+        pending = self.__dict__['_lazy']
+        with pending.lock:
+            if attr not in pending:  # bound by another thread in the meantime
+                return self.__dict__[attr]
+            field = self._meta.by_name[attr]
+            scratch = object.__new__(self.__class__)
+            value = field.empty_value()
+            if value is None or isinstance(field, (ListElement, Ref)):
+                object.__setattr__(scratch, attr, value)
+            else:
+                setattr(scratch, attr, value)
+            xmlelements = pending[attr]
+            if xmlelements is None:  # attributes and groups
+                field.parse(scratch, attr, self._xmlelement)
+            else:
+                self._meta.lazy_binder(field, pending.trusted)(scratch, xmlelements)
+            value = scratch.__dict__[attr]
+            object.__setattr__(self, attr, value)
+            del pending[attr]
+            return value
 
     def __str__(self):
         fields = {f._name: getattr(self, f._name, '<UNKNOWN FIELD>') for f in self._meta.fields}
         fields = ', '.join('%s=%s' % item for item in fields.items())
         return f'<{self.__class__.__name__}: {fields}>'
 
+    def _hashable_values(self):
+        values = self._meta.values(self)
+        if self._meta.lists:
+            values = list(values)
+            for i in self._meta.lists:
+                if isinstance(values[i], list):
+                    values[i] = tuple(values[i])
+            values = tuple(values)
+        return values
+
     def __hash__(self):
-        # FIXME: We should do this without the conversion back to XML.
-        return hash(etree.tostring(self._xmlelement)) if hasattr(self, '_xmlelement') else id(self)
+        if self._frozen_hash is not None:
+            return self._frozen_hash
+        return hash((self.__class__, self._hashable_values()))
 
     def __eq__(self, other):
-        # FIXME: We should do this without the conversion back to XML.
-        return hasattr(self, '_xmlelement') and hasattr(other, '_xmlelement') \
-            and etree.tostring(self._xmlelement) == etree.tostring(other._xmlelement)
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        if self is other:
+            return True
+        if self._frozen_hash is not None and other._frozen_hash is not None and self._frozen_hash != other._frozen_hash:
+            return False
+        return self._meta.values(self) == self._meta.values(other)
 
     def __lt__(self, other):
-        # FIXME: We should do this without the conversion back to XML.
-        return hasattr(self, '_xmlelement') and hasattr(other, '_xmlelement') \
-            and etree.tostring(self._xmlelement) < etree.tostring(other._xmlelement)
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return _sort_key(self._meta.values(self)) < _sort_key(self._meta.values(other))
+
+    @property
+    def frozen(self):
+        return self._frozen_hash is not None
+
+    def freeze(self):
+        """
+        Make the instance and all nested instances immutable and return it.
+
+        Lists are replaced by read-only lists and the hash is computed only once, so frozen instances are cheap dict
+        and set keys and can be shared between threads.
+        """
+        if self._frozen_hash is None:
+            for field in self._meta.all:
+                name = field._name
+                value = getattr(self, name)
+                if isinstance(value, list):
+                    value = FrozenList(item.freeze() if isinstance(item, ComplexType) else item for item in value)
+                elif isinstance(value, ComplexType):
+                    value.freeze()
+                object.__setattr__(self, name, value)
+            object.__setattr__(self, '_frozen_hash', hash((self.__class__, self._hashable_values())))
+        return self
 
     def accept(self, value):
         """Instance methods that validate other instances."""
@@ -920,13 +1702,8 @@ class ComplexType(Type, metaclass=Complex_PythonType):
             return None
         if self.SCHEMA:
             namespace = self.SCHEMA.targetNamespace
-        for field in instance._meta.all:
-            field.render(
-                parent=parent,
-                field_name=field.tagname or field._name,
-                value=getattr(instance, field._name),
-                namespace=namespace,
-                elementFormDefault=elementFormDefault)
+        for name, render in instance._meta.render_plan(namespace, elementFormDefault):
+            render(parent, getattr(instance, name))
 
     @classmethod
     def _find_field(cls, fields, name):
@@ -958,55 +1735,171 @@ class ComplexType(Type, metaclass=Complex_PythonType):
         return [subelement for subelement in xmlelement if cls._is_matching_element(field, subelement)]
 
     @classmethod
-    def parse_xmlelement(cls, xmlelement):
+    def parse_xmlelement(cls, xmlelement, lazy=False, trusted=False, lean=False):
+        """
+        Bind an XML element to a new instance.
+
+        :param lazy: If true, attributes and child elements are only parsed (and validated) when the corresponding
+                     field is accessed for the first time, the items of lists when the list is accessed. Classes with
+                     `SLOTS` are always parsed eagerly.
+        :param trusted: If true, the element was validated against the schema already so the values of child elements
+                        are converted without checking their facets (enumeration, pattern, length, range) again.
+        :param lean: If true, the instances do not keep a reference to their source element (`_xmlelement`), so the
+                     document can be freed after binding, and values of enumerations and QNames are shared.
+        """
+        if lazy and lean:
+            raise ValueError('Lazy parsing needs the source elements, it can not be combined with lean parsing.')
+        if lazy and cls.INDICATOR != Choice and not cls._meta.slots:
+            return cls._parse_lazily(xmlelement, trusted)
         instance = cls()
-        instance._xmlelement = xmlelement
+        if not lean:
+            instance._xmlelement = xmlelement
         for attribute in instance._meta.attributes:
             attribute.parse(instance, attribute._name, xmlelement)
-
-        is_choice = (instance._meta.cls.INDICATOR == Choice)
-        for field in instance._meta.fields:
-            if is_choice:
-                if not cls._is_matching_element(field, xmlelement):
-                    continue
-                subelements = [xmlelement]
-            else:
-                subelements = cls._find_subelement(field, xmlelement)
-            for subelement in subelements:
-                field.parse(instance, field._name, subelement)
-            if is_choice:
-                break
+            if lean:
+                intern = instance._meta.interner(attribute)
+                if intern is not None:
+                    object.__setattr__(instance, attribute._name, intern(getattr(instance, attribute._name)))
+
+        if instance._meta.cls.INDICATOR == Choice:
+            for field in instance._meta.fields:
+                if cls._is_matching_element(field, xmlelement):
+                    field.parse(instance, field._name, xmlelement)
+                    if lean:
+                        _detach(getattr(instance, field._name))
+                    break
+        else:
+            # Bind every child element to its field(s) in a single pass.
+            binders_for_tag = instance._meta.binders_for_tag
+            for subelement in xmlelement:
+                tag = subelement.tag
+                if not isinstance(tag, str):
+                    continue  # comments and processing instructions
+                for bind in binders_for_tag(tag, trusted, lean):
+                    bind(instance, subelement)
 
         for group in instance._meta.groups:
             group.parse(instance, group._name, xmlelement)
+            if lean:
+                _detach(getattr(instance, group._name))
 
         return instance
 
+    @classmethod
+    def _parse_lazily(cls, xmlelement, trusted=False):
+        meta = cls._meta
+        pending = _PendingFields.fromkeys(f._name for f in meta.attributes + meta.groups)
+        pending.trusted = trusted
+        pending.lock = threading.Lock()
+        last_tag, targets = None, ()
+        for subelement in xmlelement:
+            tag = subelement.tag
+            if tag != last_tag:  # consecutive elements (e.g. list items) usually have the same tag
+                if not isinstance(tag, str):
+                    continue  # comments and processing instructions
+                last_tag = tag
+                targets = [pending.setdefault(f._name, []) for f in meta.fields_for_tag(tag)]
+            for target in targets:
+                target.append(subelement)
+        instance = object.__new__(cls)
+        for name, field, trusted in meta.defaults:
+            if name in pending:
+                continue
+            value = field.empty_value()
+            if trusted or value is None:
+                object.__setattr__(instance, name, value)
+            else:
+                setattr(instance, name, value)
+        object.__setattr__(instance, '_xmlelement', xmlelement)
+        object.__setattr__(instance, '_lazy', pending)
+        return instance
+
     @classmethod
     def __parse_with_validation(cls, xml, schema):
-        from .py2xsd import generate_xsd
-        schema = generate_xsd(schema)
-        schemaelement = etree.XMLSchema(schema)
+        from .py2xsd import compiled_schema
+        schemaelement = compiled_schema(schema)
         if isinstance(xml, str):
-            parser = etree.XMLParser(schema=schemaelement)
-            xmlelement = etree.fromstring(xml, parser)
+            xmlelement = parsers.fromstring(xml, schemaelement)
         else:
             schemaelement.assertValid(xml)
             xmlelement = xml
         return xmlelement
 
     @classmethod
-    def parsexml(cls, xml, schema=None):
-        if schema is None:
-            parser = etree.fromstring
+    def parsexml(cls, xml, schema=None, lazy=False, trusted=False, lean=False, huge_tree=False):
+        """
+        Parse a document (str or bytes), optionally validating it against a schema.
+
+        The document is parsed with the shared parser options of `soapfish.parsers`, see `parse_xmlelement()` for
+        `lazy`, `trusted` and `lean`.
+
+        :param schema: soapfish `Schema` or `lxml.etree.XMLSchema`, compiled soapfish schemas are cached.
+        :param huge_tree: Disable libxml2's security limits for very deep trees and very long text content.
+        """
+        if schema is not None and not isinstance(schema, etree.XMLSchema):
+            from .py2xsd import compiled_schema
+            schema = compiled_schema(schema)
+        if huge_tree:
+            xmlelement = parsers.fromstring(xml, schema, huge_tree=True)
         else:
-            if not isinstance(schema, etree.XMLSchema):
-                from .py2xsd import generate_xsd
-                schema = etree.XMLSchema(generate_xsd(schema))
-            xmlparser = etree.XMLParser(schema=schema)
-            parser = functools.partial(etree.fromstring, parser=xmlparser)
-        xmlelement = parser(xml)
-        return cls.parse_xmlelement(xmlelement)
+            xmlelement = parsers.fromstring(xml, schema)
+        return cls.parse_xmlelement(xmlelement, lazy=lazy, trusted=trusted, lean=lean)
+
+    @classmethod
+    def iterparse(cls, source, tag, trusted=False, lean=False, huge_tree=False):
+        """
+        Parse a (huge) document incrementally, yielding an instance for every element matching `tag`.
+
+        Processed elements are removed from the tree so the memory used does not grow with the size of the document,
+        i.e. the yielded instances do not keep the document alive. Note that the `_xmlelement` of the instances is
+        emptied once the next instance is requested (unless `lean`).
+
+        :param source: Filename or file-like object opened in binary mode.
+        :param tag: Tag name(s) of the repeated element as accepted by `lxml.etree.iterparse()`, e.g.
+                    `'{http://flight.example/}flight'` or `'{*}flight'`.
+        :param trusted: See `parse_xmlelement()`.
+        :param lean: See `parse_xmlelement()`.
+        :param huge_tree: See `parsexml()`.
+        """
+        options = parsers.options(huge_tree=huge_tree)
+        for _, xmlelement in etree.iterparse(source, events=('end',), tag=tag, **options):
+            yield cls.parse_xmlelement(xmlelement, trusted=trusted, lean=lean)
+            # drop the element and everything before it (the preceding siblings of it and its ancestors)
+            xmlelement.clear(keep_tail=True)
+            node, parent = xmlelement, xmlelement.getparent()
+            while parent is not None:
+                while node.getprevious() is not None:
+                    del parent[0]
+                node, parent = parent, parent.getparent()
+
+    def write(self, file, tagname, namespace=None, elementFormDefault=None):
+        """
+        Write the XML of the instance incrementally to `file` (a filename or a file-like object).
+
+        Unlike `xml()` this never builds the complete tree: complex elements are written one by one and the value of a
+        list field may be any iterable, e.g. a generator producing the items while the document is written. This
+        allows writing huge documents in bounded memory.
+        """
+        with etree.xmlfile(file) as xf:
+            for _ in self._write(xf, tagname, namespace, elementFormDefault):
+                pass
+
+    def iterxml(self, tagname, namespace=None, elementFormDefault=None, chunk_size=64 * 1024):
+        """Generate the XML of the instance incrementally as chunks of about `chunk_size` bytes, see `write()`."""
+        buffer = io.BytesIO()
+        with etree.xmlfile(buffer, buffered=False) as xf:
+            for _ in self._write(xf, tagname, namespace, elementFormDefault):
+                if buffer.tell() >= chunk_size:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def _write(self, xf, tagname, namespace, elementFormDefault):
+        if namespace:
+            tagname = f'{{{namespace}}}{tagname}'
+        return _write_instance(xf, self, tagname, namespace, elementFormDefault, self)
 
     def xml(self, tagname, namespace=None, elementFormDefault=None, schema=None, pretty_print=True):
         if namespace:
@@ -1055,7 +1948,7 @@ class Document(ComplexType):
     @classmethod
     def parsexml(cls, xml):
         field = cls._meta.fields[0]  # The only field.
-        xmlelement = etree.fromstring(xml)
+        xmlelement = parsers.fromstring(xml)
         field.parse(cls, field._name, xmlelement)
 
 
@@ -1174,8 +2067,14 @@ class Method:
     """
 
     def __init__(self, operationName, soapAction, input=None, output=None, function=None, inputPartName='body',
-                 outputPartName='body', input_header=None, output_header=None, style=CallStyle.DOCUMENT):
-        """:param function: The function that should be called. Required only for server implementations."""
+                 outputPartName='body', input_header=None, output_header=None, style=CallStyle.DOCUMENT,
+                 validation=None):
+        """
+        Initialise a method.
+
+        :param function: The function that should be called. Required only for server implementations.
+        :param validation: soap_dispatch.ValidationPolicy for incoming messages, overrides the dispatcher's policy.
+        """
         self.operationName = operationName
         self.soapAction = soapAction
         self.input = input
@@ -1186,6 +2085,7 @@ class Method:
         self.input_header = input_header
         self.output_header = output_header
         self.style = style
+        self.validation = validation
 
 
 class NamedType(ComplexType):
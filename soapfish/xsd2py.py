@@ -8,9 +8,7 @@ import os
 import sys
 from urllib.parse import urljoin
 
-from lxml import etree
-
-from . import xsdspec
+from . import parsers, xsdspec
 from .utils import find_xsd_namespaces, get_rendering_environment, open_document, resolve_location
 
 logger = logging.getLogger('soapfish')
@@ -54,7 +52,7 @@ def generate_code_from_xsd(xml, known_paths=None, known_types=None,
                            standalone=True):
 
     if isinstance(xml, bytes):
-        xml = etree.fromstring(xml)
+        xml = parsers.fromstring(xml)
 
     if cwd is None:
         cwd = os.getcwd()
@@ -0,0 +1,100 @@
+"""
+Conversion between the lexical forms of xsd:date, xsd:dateTime and xsd:time and Python values.
+
+Values in the usual form (e.g. `2001-10-26T21:32:52.123+02:00`) are parsed with `fromisoformat()`, iso8601 is used
+for all other forms it accepts, so the results do not depend on the path taken. Time zones and rendered UTC offsets
+are cached, i.e. values with the same offset share their tzinfo object.
+"""
+
+import functools
+import re
+from datetime import date, datetime, time, timedelta, timezone
+
+import iso8601
+
+from .utils import timezone_offset_to_string
+from .xsd_types import XSDDate
+
+__all__ = ['fixed_timezone', 'format_date', 'format_datetime', 'format_offset', 'format_time', 'parse_datetime',
+           'parse_time']
+
+# fractions with 3 or 6 digits and offsets with minutes are accepted by fromisoformat() of all Python versions
+_DATETIME_REGEX = re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{3}(?:\d{3})?)?)(Z|[-+]\d{2}:\d{2})?')
+_TIME_REGEX = re.compile(r'(\d{2}:\d{2}:\d{2}(?:\.\d{3}(?:\d{3})?)?)(Z|[-+]\d{2}:\d{2})?')
+
+
+@functools.lru_cache(maxsize=256)
+def fixed_timezone(minutes, name):
+    """Return a (shared) time zone with a fixed UTC offset in minutes."""
+    return timezone(timedelta(minutes=minutes), name)
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_offset(offset):
+    # same time zones as iso8601: UTC if there is no offset or 'Z', otherwise named after the offset
+    if offset is None or offset == 'Z':
+        return timezone.utc
+    minutes = int(offset[1:3]) * 60 + int(offset[4:6])
+    return fixed_timezone(-minutes if offset[0] == '-' else minutes, offset)
+
+
+def parse_datetime(value):
+    """Parse an xsd:dateTime like `iso8601.parse_date()`, values without time zone are in UTC."""
+    match = _DATETIME_REGEX.fullmatch(value) if isinstance(value, str) else None
+    if match is not None:
+        try:
+            return datetime.fromisoformat(match.group(1)).replace(tzinfo=_parse_offset(match.group(2)))
+        except ValueError:
+            pass  # e.g. day out of range, reported by iso8601
+    return iso8601.parse_date(value)
+
+
+def parse_time(value):
+    """Parse an xsd:time, values without time zone are in UTC."""
+    match = _TIME_REGEX.fullmatch(value) if isinstance(value, str) else None
+    if match is not None:
+        try:
+            return time.fromisoformat(match.group(1)).replace(tzinfo=_parse_offset(match.group(2)))
+        except ValueError:
+            pass
+    dt = iso8601.parse_date('1900-01-01T' + value)
+    return dt.time().replace(tzinfo=dt.tzinfo)
+
+
+@functools.lru_cache(maxsize=256)
+def format_offset(offset):
+    """Return the XSD representation of a UTC offset (timedelta), see `utils.timezone_offset_to_string()`."""
+    return timezone_offset_to_string(offset)
+
+
+def format_date(value):
+    """Return the XSD representation of a date (`XSDDate` or `datetime.date`)."""
+    if isinstance(value, (XSDDate, date)) and value.year >= 1000:
+        text = f'{value.year:04d}-{value.month:02d}-{value.day:02d}'
+    else:
+        text = value.strftime('%Y-%m-%d')  # the platform decides about padding
+    tz = getattr(value, 'tzinfo', None)
+    if not tz:
+        return text
+    return text + format_offset(tz.utcoffset(None))
+
+
+def format_datetime(value):
+    """Return the XSD representation of a datetime (without fractional seconds)."""
+    if type(value) is datetime and value.year >= 1000:
+        text = value.isoformat(timespec='seconds')[:19]
+    else:
+        text = value.strftime('%Y-%m-%dT%H:%M:%S')
+    tz = value.tzinfo
+    if not tz:
+        return text
+    return text + format_offset(tz.utcoffset(value))
+
+
+def format_time(value):
+    """Return the XSD representation of a time (without fractional seconds)."""
+    text = value.isoformat(timespec='seconds')[:8] if type(value) is time else value.strftime('%H:%M:%S')
+    tz = value.tzinfo
+    if not tz:
+        return text
+    return text + format_offset(tz.utcoffset(None))
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import unittest
+
+from soapfish import soap11
+from soapfish.core import SOAPRequest, SOAPResponse
+from soapfish.middlewares import ExceptionToSoapFault
+from soapfish.soap_dispatch import AsgiSoapApplication, SOAPDispatcher
+from soapfish.testutil import echo_handler, echo_service, stream_service
+from soapfish.testutil.echo_service import EchoType
+from soapfish.testutil.stream_service import Report, ReportRequest
+
+SOAP_MESSAGE = (
+    b'<?xml version="1.0" encoding="utf-8"?>'
+    b'<senv:Envelope xmlns:senv="http://schemas.xmlsoap.org/soap/envelope/">'
+    b'<senv:Body>'
+    b'<ns1:echoRequest xmlns:ns1="http://soap.example/echo/types">'
+    b'<value>foobar</value>'
+    b'</ns1:echoRequest>'
+    b'</senv:Body>'
+    b'</senv:Envelope>'
+)
+
+
+class AsgiSoapApplicationTest(unittest.TestCase):
+    def test_can_dispatch_soap_request_with_sync_handler(self):
+        handler, handler_state = echo_handler()
+        app = AsgiSoapApplication(SOAPDispatcher(echo_service(handler)))
+        status, headers, body = self._call(app, SOAP_MESSAGE)
+        self.assertEqual(200, status)
+        self.assertEqual(b'text/xml', headers[b'content-type'])
+        self.assertIn(b'<value>foobar</value>', body)
+        self.assertTrue(handler_state.was_called)
+
+    def test_can_dispatch_soap_request_with_async_handler_and_middleware(self):
+        calls = []
+        service = echo_service()
+
+        @service.route('echoOperation')
+        async def echo(request, input_):
+            await asyncio.sleep(0)
+            calls.append('handler')
+            return SOAPResponse(EchoType.create(input_.value.upper()))
+
+        async def middleware(request, next_call):
+            calls.append('middleware')
+            return await next_call(request)
+
+        app = AsgiSoapApplication(SOAPDispatcher(service, middlewares=[middleware]))
+        status, headers, body = self._call(app, SOAP_MESSAGE)
+        self.assertEqual(200, status)
+        self.assertIn(b'<value>FOOBAR</value>', body)
+        self.assertEqual(['middleware', 'handler'], calls)
+
+    def test_can_handle_concurrent_slow_requests(self):
+        service = echo_service()
+
+        @service.route('echoOperation')
+        async def echo(request, input_):
+            await asyncio.sleep(0.2)
+            return SOAPResponse(EchoType.create(input_.value))
+
+        app = AsgiSoapApplication(SOAPDispatcher(service))
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await asyncio.gather(*(self._request(app, SOAP_MESSAGE) for _ in range(20)))
+            return loop.time() - start, results
+
+        duration, results = asyncio.run(run())
+        self.assertTrue(all(status == 200 for status, _, _ in results))
+        self.assertLess(duration, 2)
+
+    def test_returns_soap_fault_for_exception_in_async_handler(self):
+        service = echo_service()
+
+        @service.route('echoOperation')
+        async def echo(request, input_):
+            raise ValueError('unexpected exception')
+
+        app = AsgiSoapApplication(SOAPDispatcher(service, middlewares=[ExceptionToSoapFault()]))
+        status, headers, body = self._call(app, SOAP_MESSAGE)
+        self.assertEqual(500, status)
+        self.assertIn(b'ValueError: unexpected exception', body)
+
+    def test_offloads_parsing_of_large_requests(self):
+        threads = []
+        dispatcher = SOAPDispatcher(echo_service())
+        prepare_request = dispatcher._prepare_request
+
+        def _prepare_request(request):
+            threads.append(threading.current_thread())
+            return prepare_request(request)
+        dispatcher._prepare_request = _prepare_request
+
+        self._call(AsgiSoapApplication(dispatcher, offload_threshold=None), SOAP_MESSAGE)
+        self._call(AsgiSoapApplication(dispatcher, offload_threshold=0), SOAP_MESSAGE)
+        self.assertIs(threading.main_thread(), threads[0])
+        self.assertIsNot(threading.main_thread(), threads[1])
+
+    def test_can_retrieve_wsdl(self):
+        app = AsgiSoapApplication(SOAPDispatcher(echo_service()))
+        status, headers, body = self._call(app, b'', method='GET', query_string=b'wsdl')
+        self.assertEqual(200, status)
+        self.assertIn(b'<wsdl:definitions', body)
+
+    def test_streams_response_with_generated_list(self):
+        app = AsgiSoapApplication(SOAPDispatcher(stream_service()))
+        request = soap11.Envelope.response('reportRequest', ReportRequest(count=5000))
+        sent = []
+        status, headers, body = self._call(app, request, action=b'report', sent=sent)
+        self.assertEqual(200, status)
+        self.assertGreater(len(sent), 3)
+        self.assertTrue(all(message['more_body'] for message in sent[1:-1]))
+        report = soap11.Envelope.parsexml(body).Body.parse_as(Report)
+        self.assertEqual(list(range(5000)), [row.id for row in report.rows])
+
+    def test_sync_dispatcher_rejects_async_handler(self):
+        service = echo_service()
+
+        @service.route('echoOperation')
+        async def echo(request, input_):
+            pass
+
+        dispatcher = SOAPDispatcher(service)
+        with self.assertRaises(TypeError):
+            dispatcher.dispatch(SOAPRequest({'REQUEST_METHOD': 'POST'}, SOAP_MESSAGE))
+
+    # --- internal helpers ----------------------------------------------------
+
+    def _call(self, app, body, **kwargs):
+        return asyncio.run(self._request(app, body, **kwargs))
+
+    async def _request(self, app, body, method='POST', query_string=b'', action=b'echo', sent=None):
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': '/service',
+            'query_string': query_string,
+            'headers': [(b'content-type', b'text/xml'), (b'soapaction', action)],
+        }
+        chunks = [body[:10], body[10:]]
+        sent = [] if sent is None else sent
+
+        async def receive():
+            chunk = chunks.pop(0)
+            return {'type': 'http.request', 'body': chunk, 'more_body': bool(chunks)}
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+        start, *bodies = sent
+        return start['status'], dict(start['headers']), b''.join(message['body'] for message in bodies)
@@ -0,0 +1,18 @@
+"""
+Micro benchmarks for performance sensitive code paths.
+
+These are not part of the test suite, run them directly, e.g.:
+
+    python -m tests.benchmarks.middlewares
+"""
+
+import timeit
+
+__all__ = ['report']
+
+
+def report(label, stmt, number=10000, repeat=5):
+    """Print the best time per call (in microseconds) of `stmt`."""
+    best = min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+    print(f'{label:<50} {best * 1e6:10.2f} µs')
+    return best
@@ -0,0 +1,35 @@
+"""Per-request overhead of the middleware chain depending on the number of middlewares."""
+
+from soapfish.core import SOAPRequest
+from soapfish.middlewares import ExceptionLogger, ExceptionToSoapFault
+from soapfish.soap_dispatch import SOAPDispatcher
+from soapfish.testutil import echo_service
+
+from . import report
+
+SOAP_MESSAGE = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<senv:Envelope xmlns:senv="http://schemas.xmlsoap.org/soap/envelope/">'
+    b'<senv:Body>'
+    b'<ns1:echoRequest xmlns:ns1="http://soap.example/echo/types"><value>foobar</value></ns1:echoRequest>'
+    b'</senv:Body>'
+    b'</senv:Envelope>'
+)
+
+
+def passthrough(request, next_call):
+    return next_call(request)
+
+
+def main():
+    for count in (0, 2, 10, 50):
+        middlewares = [ExceptionToSoapFault(), ExceptionLogger()] + [passthrough] * count
+        dispatcher = SOAPDispatcher(echo_service(), middlewares=middlewares)
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'}, SOAP_MESSAGE)
+        report(f'middleware chain lookup ({len(middlewares)} middlewares)', dispatcher.middleware, number=100000)
+        report(f'handle_soap_request ({len(middlewares)} middlewares)',
+               lambda: dispatcher.handle_soap_request(request), number=1000)  # noqa: B023
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""Parsing time of a small document with lxml's default parser, a new parser per call and the shared parsers."""
+
+from lxml import etree
+
+from soapfish import parsers
+
+from . import report
+
+XML = b'<container><code>1234</code></container>'
+SCHEMA = etree.XMLSchema(etree.fromstring(
+    b'<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"><xsd:element name="container"/></xsd:schema>'))
+
+
+def main():
+    report('etree.fromstring()', lambda: etree.fromstring(XML), number=50000)
+    report('etree.fromstring() with a new parser', lambda: etree.fromstring(XML, etree.XMLParser()), number=50000)
+    report('parsers.fromstring()', lambda: parsers.fromstring(XML), number=50000)
+    report('etree.fromstring() with a new validating parser',
+           lambda: etree.fromstring(XML, etree.XMLParser(schema=SCHEMA)), number=50000)
+    report('parsers.fromstring() with schema', lambda: parsers.fromstring(XML, SCHEMA), number=50000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Construction, assignment, parsing and rendering time of ComplexType instances."""
+
+import io
+
+from lxml import etree
+
+from soapfish import xsd
+
+from ..xsd_test import Airport, Flight
+from . import report
+
+
+def complex_type(field_count):
+    attrs = {f'field{i}': xsd.Element(xsd.String, minOccurs=0) for i in range(field_count)}
+    attrs['items'] = xsd.ListElement(xsd.Integer, 'item', minOccurs=0)
+    return type(f'Wide{field_count}', (xsd.ComplexType,), attrs)
+
+
+def render(instance):
+    element = etree.Element('root')
+    instance.render(element, instance)
+    return element
+
+
+def main():
+    for field_count in (5, 40, 200):
+        cls = complex_type(field_count)
+        instance = cls()
+        last_field = f'field{field_count - 1}'
+        full = cls(**{f'field{i}': 'value' for i in range(field_count)})
+        element = render(full)
+        report(f'construction ({field_count} fields)', cls, number=2000)
+        report(f'assignment of last field ({field_count} fields)',
+               lambda: setattr(instance, last_field, 'value'), number=100000)  # noqa: B023
+        report(f'parse_xmlelement ({field_count} fields)',
+               lambda: cls.parse_xmlelement(element), number=20)  # noqa: B023
+        report(f'trusted parse_xmlelement ({field_count} fields)',
+               lambda: cls.parse_xmlelement(element, trusted=True), number=20)  # noqa: B023
+        report(f'lazy parse_xmlelement, access last field ({field_count} fields)',
+               lambda: getattr(cls.parse_xmlelement(element, lazy=True), last_field), number=20)  # noqa: B023
+        report(f'render ({field_count} fields)', lambda: render(full), number=200)  # noqa: B023
+
+    for label, _type, value in (('String with pattern', xsd.String(pattern=r'[A-Z]{3}'), 'WAW'),
+                                ('String with enumeration', xsd.String(enumeration=['IATA', 'ICAO', 'FAA']), 'FAA'),
+                                ('Decimal with range', xsd.Decimal(minInclusive=0, maxInclusive=100), 42.5),
+                                ('Int', xsd.Int(), 42)):
+        report(f'accept ({label})', lambda: _type.accept(value), number=100000)  # noqa: B023
+
+    cls = complex_type(5)
+    instance = cls(field0='value', items=list(range(5000)))
+    element = render(instance)
+    report('parse_xmlelement (5 fields, 5000 list items)', lambda: cls.parse_xmlelement(element), number=20)
+    report('trusted parse_xmlelement (5 fields, 5000 list items)',
+           lambda: cls.parse_xmlelement(element, trusted=True), number=20)
+    report('lazy parse_xmlelement, access first field (5 fields, 5000 list items)',
+           lambda: cls.parse_xmlelement(element, lazy=True).field0, number=20)
+    report('render (5 fields, 5000 list items)', lambda: render(instance), number=20)
+
+    item_cls = complex_type(1)
+    export_cls = type('Export', (xsd.ComplexType,), {'entries': xsd.ListElement(item_cls, 'entry')})
+    document = etree.tostring(render(export_cls(entries=[item_cls(field0=str(i)) for i in range(50000)])))
+    report('parsexml, 50000 list items', lambda: len(export_cls.parsexml(document).entries), number=1)
+    report('lean parsexml, 50000 list items', lambda: len(export_cls.parsexml(document, lean=True).entries), number=1)
+    report('iterparse, 50000 items', lambda: sum(1 for _ in item_cls.iterparse(io.BytesIO(document), 'entry')),
+           number=1)
+
+    flight = Flight(tail_number='LN-KKA', takeoff_airport=Airport.create('IATA', 'WAW'),
+                    landing_airport=Airport.create('ICAO', 'EGLL'), passengers=['abc', '123'])
+    element = render(flight)
+    report('parse_xmlelement (tests.xsd_test.Flight)', lambda: Flight.parse_xmlelement(element))
+    report('trusted parse_xmlelement (tests.xsd_test.Flight)', lambda: Flight.parse_xmlelement(element, trusted=True))
+    report('render (tests.xsd_test.Flight)', lambda: render(flight))
+    parsed, other = Flight.parse_xmlelement(element), Flight.parse_xmlelement(element)
+    report('hash (tests.xsd_test.Flight)', lambda: hash(parsed))
+    report('equality (tests.xsd_test.Flight)', lambda: parsed == other)
+    frozen = Flight.parse_xmlelement(element).freeze()
+    report('hash of frozen instance (tests.xsd_test.Flight)', lambda: hash(frozen))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Parsing and rendering time of xsd:date, xsd:dateTime and xsd:time values."""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+from soapfish import xsd
+
+from . import report
+
+TZ = timezone(timedelta(hours=2))
+
+CASES = [
+    (xsd.Date, '2001-10-26', date(2001, 10, 26)),
+    (xsd.Date, '2001-10-26+02:00', xsd.Date().pythonvalue('2001-10-26+02:00')),
+    (xsd.DateTime, '2001-10-26T21:32:52', datetime(2001, 10, 26, 21, 32, 52)),
+    (xsd.DateTime, '2001-10-26T21:32:52.123+02:00', datetime(2001, 10, 26, 21, 32, 52, 123000, tzinfo=TZ)),
+    (xsd.Time, '21:32:52Z', time(21, 32, 52)),
+    (xsd.Time, '21:32:52.123+02:00', time(21, 32, 52, 123000, tzinfo=TZ)),
+]
+
+
+def main():
+    for xsd_type, text, value in CASES:
+        instance = xsd_type()
+        report(f'{xsd_type.__name__}.pythonvalue({text!r})',
+               lambda: instance.pythonvalue(text), number=50000)  # noqa: B023
+        report(f'{xsd_type.__name__}.xmlvalue({text!r})',
+               lambda: instance.xmlvalue(value), number=50000)  # noqa: B023
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import gzip
+import unittest
+import zlib
+
+from soapfish import compression
+
+CONTENT = b'<value>foobar</value>' * 100
+
+
+class CompressionTest(unittest.TestCase):
+    def test_can_compress_and_decompress(self):
+        for encoding in compression.ENCODINGS:
+            compressed = compression.compress(CONTENT, encoding)
+            self.assertLess(len(compressed), len(CONTENT))
+            self.assertEqual(CONTENT, compression.decompress(compressed, encoding))
+        self.assertEqual(CONTENT, gzip.decompress(compression.compress(CONTENT, 'gzip')))
+        self.assertEqual(CONTENT, zlib.decompress(compression.compress(CONTENT, 'deflate')))
+
+    def test_can_compress_incrementally(self):
+        chunks = [CONTENT[i:i + 100] for i in range(0, len(CONTENT), 100)]
+        for encoding in compression.ENCODINGS:
+            compressed = b''.join(compression.compress_chunks(iter(chunks), encoding))
+            self.assertEqual(CONTENT, compression.decompress(compressed, encoding))
+
+    def test_can_decompress_incrementally(self):
+        compressed = gzip.compress(CONTENT)
+        decompressor = compression.Decompressor('x-gzip')
+        data = b''.join(decompressor.decompress(compressed[i:i + 1]) for i in range(len(compressed)))
+        self.assertEqual(CONTENT, data + decompressor.flush())
+
+    def test_can_decompress_raw_deflate(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(CONTENT) + compressor.flush()
+        self.assertEqual(CONTENT, compression.decompress(compressed, 'deflate'))
+
+    def test_rejects_invalid_content(self):
+        with self.assertRaises(compression.CompressionError):
+            compression.decompress(b'garbage', 'gzip')
+        with self.assertRaises(compression.CompressionError):
+            compression.decompress(gzip.compress(CONTENT)[:-10], 'gzip')
+        with self.assertRaises(compression.CompressionError):
+            compression.decompress(CONTENT, 'br')
+
+    def test_limits_decompressed_size(self):
+        compressed = gzip.compress(CONTENT)
+        self.assertEqual(CONTENT, compression.decompress(compressed, 'gzip', max_size=len(CONTENT)))
+        with self.assertRaises(compression.ContentTooLarge):
+            compression.decompress(compressed, 'gzip', max_size=len(CONTENT) - 1)
+
+    def test_negotiate(self):
+        self.assertIsNone(compression.negotiate(None))
+        self.assertIsNone(compression.negotiate('identity'))
+        self.assertIsNone(compression.negotiate('gzip;q=0, deflate;q=0'))
+        self.assertEqual('gzip', compression.negotiate('deflate, gzip'))
+        self.assertEqual('deflate', compression.negotiate('gzip;q=0.5, deflate'))
+        self.assertEqual('gzip', compression.negotiate('*'))
+        self.assertEqual('deflate', compression.negotiate('*, gzip;q=0'))
+        self.assertEqual('gzip', compression.negotiate('x-gzip', ('gzip',)))
@@ -1,9 +1,12 @@
 import collections
 import unittest
+import unittest.mock
 from datetime import datetime
 
+from soapfish import py2wsdl, py2xsd, soap11
 from soapfish.django_ import django_dispatcher
-from soapfish.testutil import echo_service, framework
+from soapfish.testutil import echo_service, framework, stream_service
+from soapfish.testutil.stream_service import Report, ReportRequest
 
 try:
     import django
@@ -54,3 +57,24 @@ class DjangoDispatchTest(framework.DispatchTestMixin, unittest.TestCase):
         self.assertEqual(200, response.status_code)
         body = self._soap_response(response.content)
         self.assertEqual(input_value, body.value)
+
+    def test_builds_dispatcher_only_once(self):
+        with unittest.mock.patch.object(py2wsdl, 'generate_wsdl', wraps=py2wsdl.generate_wsdl) as generate_wsdl, \
+                unittest.mock.patch.object(py2xsd, 'schema_validator', wraps=py2xsd.schema_validator) as validator:
+            for _ in range(3):
+                headers, body = self._soap_request('foo')
+                response = self.client.post('/ws/', body, **self._prepare_extras(headers))
+                self.assertEqual(200, response.status_code)
+            response = self.client.get('/ws/', {'wsdl': ''})
+            self.assertEqual(200, response.status_code)
+        self.assertEqual(1, generate_wsdl.call_count)
+        self.assertEqual(1, validator.call_count)
+
+    def test_streams_response_with_generated_list(self):
+        settings.ROOT_URLCONF = urlconf(urlpatterns=(path('report/', django_dispatcher(stream_service())),))
+        body = soap11.Envelope.response('reportRequest', ReportRequest(count=100))
+        response = self.client.post('/report/', body, content_type='text/xml', HTTP_SOAPACTION='report')
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.streaming)
+        report = soap11.Envelope.parsexml(b''.join(response.streaming_content)).Body.parse_as(Report)
+        self.assertEqual(list(range(100)), [row.id for row in report.rows])
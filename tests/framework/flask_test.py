@@ -1,8 +1,11 @@
 import unittest
+import unittest.mock
 from datetime import datetime
 
+from soapfish import py2wsdl, py2xsd, soap11
 from soapfish.flask_ import flask_dispatcher
-from soapfish.testutil import echo_service, framework
+from soapfish.testutil import echo_service, framework, stream_service
+from soapfish.testutil.stream_service import Report, ReportRequest
 
 try:
     import flask
@@ -32,3 +35,26 @@ class FlaskDispatchTest(framework.DispatchTestMixin, unittest.TestCase):
         self.assertEqual(200, response.status_code)
         body = self._soap_response(response.data)
         self.assertEqual(input_value, body.value)
+
+    def test_builds_dispatcher_only_once(self):
+        with unittest.mock.patch.object(py2wsdl, 'generate_wsdl', wraps=py2wsdl.generate_wsdl) as generate_wsdl, \
+                unittest.mock.patch.object(py2xsd, 'schema_validator', wraps=py2xsd.schema_validator) as validator:
+            for _ in range(3):
+                headers, body = self._soap_request('foo')
+                response = self.client.post('/ws/', data=body, headers=headers)
+                self.assertEqual(200, response.status_code)
+            response = self.client.get('/ws/', query_string='wsdl')
+            self.assertEqual(200, response.status_code)
+        self.assertEqual(1, generate_wsdl.call_count)
+        self.assertEqual(1, validator.call_count)
+
+    def test_streams_response_with_generated_list(self):
+        app = flask.Flask(__name__)
+        app.add_url_rule('/report/', 'report', flask_dispatcher(stream_service()), methods=['POST'])
+        body = soap11.Envelope.response('reportRequest', ReportRequest(count=100))
+        response = app.test_client().post('/report/', data=body, headers={'SOAPAction': 'report'},
+                                          buffered=False)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.is_streamed)
+        report = soap11.Envelope.parsexml(response.get_data()).Body.parse_as(Report)
+        self.assertEqual(list(range(100)), [row.id for row in report.rows])
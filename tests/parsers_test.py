@@ -0,0 +1,56 @@
+import threading
+import unittest
+
+from lxml import etree
+
+from soapfish import parsers, xsd
+
+ENTITY_XML = b'<!DOCTYPE foo [<!ENTITY bar "baz">]><foo>&bar;</foo>'
+
+
+class ParsersTest(unittest.TestCase):
+    def tearDown(self):
+        parsers.configure(**parsers.DEFAULT_OPTIONS)
+
+    def test_reuses_parser_per_thread(self):
+        parser = parsers.get_parser()
+        self.assertIs(parser, parsers.get_parser())
+        self.assertIsNot(parser, parsers.get_parser(remove_blank_text=True))
+        other = []
+        thread = threading.Thread(target=lambda: other.append(parsers.get_parser()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(parser, other[0])
+
+    def test_does_not_resolve_entities(self):
+        element = parsers.fromstring(ENTITY_XML)
+        self.assertIsNone(element.text)
+        self.assertEqual('&bar;', etree.tostring(element[0]).decode())
+
+    def test_per_use_and_process_wide_options(self):
+        xml = b'<foo>\n  <bar/>\n</foo>'
+        self.assertEqual(xml, etree.tostring(parsers.fromstring(xml)))
+        self.assertEqual(b'<foo><bar/></foo>', etree.tostring(parsers.fromstring(xml, remove_blank_text=True)))
+        parser = parsers.get_parser()
+        parsers.configure(remove_blank_text=True)
+        self.assertIsNot(parser, parsers.get_parser())
+        self.assertEqual(b'<foo><bar/></foo>', etree.tostring(parsers.fromstring(xml)))
+        self.assertEqual(xml, etree.tostring(parsers.fromstring(xml, remove_blank_text=False)))
+        with self.assertRaises(TypeError):
+            parsers.get_parser(recover=True)
+
+    def test_discard_aborts_incremental_parsing(self):
+        parser = parsers.get_parser()
+        parser.feed(b'<foo><bar>')
+        parsers.discard(parser)
+        parser.feed(b'<baz/>')
+        self.assertEqual('baz', parser.close().tag)
+
+    def test_parsexml_uses_shared_parser(self):
+        class Container(xsd.ComplexType):
+            foo = xsd.Element(xsd.String)
+        self.assertEqual('baz', Container.parsexml('<container><foo>baz</foo></container>').foo)
+        deep = '<a>' * 300 + '</a>' * 300
+        with self.assertRaises(etree.XMLSyntaxError):
+            Container.parsexml(f'<container><foo>baz</foo>{deep}</container>')
+        self.assertEqual('baz', Container.parsexml(f'<container><foo>baz</foo>{deep}</container>', huge_tree=True).foo)
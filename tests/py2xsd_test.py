@@ -1,8 +1,10 @@
+import threading
 import unittest
+import unittest.mock
 
 from lxml import etree
 
-from soapfish import xsd
+from soapfish import py2xsd, xsd
 from soapfish.py2xsd import generate_xsd
 
 
@@ -33,3 +35,59 @@ class py2xsdTest(unittest.TestCase):
 
         bad_xml = f'<foo xmlns="{ns}"><code>abc</code></foo>'
         self.assertIs(is_valid(bad_xml), False)
+
+
+class SchemaCacheTest(unittest.TestCase):
+    def setUp(self):
+        class Container(xsd.ComplexType):
+            code = xsd.Element(xsd.String(pattern='[0-9]{0,5}'))
+        self.Container = Container
+        self.schema = xsd.Schema('http://soap.example/cache.xsd', elementFormDefault=xsd.ElementFormDefault.QUALIFIED,
+                                 complexTypes=(Container,), elements={'foo': xsd.Element(Container)})
+        self.xml = '<foo xmlns="http://soap.example/cache.xsd"><code>1234</code></foo>'
+        self.cache = py2xsd.SchemaCache()
+
+    def test_compiles_schemas_once(self):
+        with unittest.mock.patch.object(py2xsd, '_compile_schema', wraps=py2xsd._compile_schema) as compile_schema:
+            xmlschema = self.cache.get(self.schema)
+            self.assertIs(xmlschema, self.cache.get([self.schema]))
+            self.assertEqual(1, compile_schema.call_count)
+        self.assertIs(xmlschema.validate(etree.fromstring(self.xml)), True)
+
+    def test_is_shared_by_parsexml_and_schema_validator(self):
+        py2xsd.schema_cache.invalidate(self.schema)
+        with unittest.mock.patch.object(py2xsd, '_compile_schema', wraps=py2xsd._compile_schema) as compile_schema:
+            self.assertEqual('1234', self.Container.parsexml(self.xml, schema=self.schema).code)
+            self.Container.parsexml(self.xml, schema=self.schema)
+            py2xsd.schema_validator([self.schema])(etree.fromstring(self.xml))
+            self.assertEqual(1, compile_schema.call_count)
+        with self.assertRaises(etree.XMLSyntaxError):
+            self.Container.parsexml(self.xml.replace('1234', 'abc'), schema=self.schema)
+
+    def test_invalidate(self):
+        other = xsd.Schema('http://soap.example/other.xsd')
+        xmlschema = self.cache.get(self.schema)
+        self.cache.get(other)
+        self.cache.invalidate(self.schema)
+        self.assertEqual(1, len(self.cache))
+        self.assertIsNot(xmlschema, self.cache.get(self.schema))
+        self.cache.invalidate()
+        self.assertEqual(0, len(self.cache))
+
+    def test_concurrent_first_use(self):
+        barrier = threading.Barrier(8)
+        results = []
+
+        def get():
+            barrier.wait()
+            results.append(self.cache.get(self.schema))
+
+        with unittest.mock.patch.object(py2xsd, '_compile_schema', wraps=py2xsd._compile_schema) as compile_schema:
+            threads = [threading.Thread(target=get) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(1, compile_schema.call_count)
+        self.assertEqual(8, len(results))
+        self.assertEqual({id(results[0])}, {id(r) for r in results})
@@ -2,7 +2,8 @@ import unittest
 
 from lxml import etree
 
-from soapfish.soap11 import Code, get_error_response
+from soapfish import xsd
+from soapfish.soap11 import Code, Envelope, get_error_response
 
 
 class SOAP11Test(unittest.TestCase):
@@ -12,6 +13,22 @@ class SOAP11Test(unittest.TestCase):
         self.assertIn(b'<faultcode>Server</faultcode>', xml)
         self.assertIn(b'<faultactor>me</faultactor>', xml)
 
+    def test_iter_response(self):
+        class Item(xsd.ComplexType):
+            name = xsd.Element(xsd.String)
+
+        class Response(xsd.ComplexType):
+            items = xsd.ListElement(Item, 'item')
+
+        xsd.Schema('http://soap.example/stream', elementFormDefault=xsd.ElementFormDefault.QUALIFIED,
+                   complexTypes=[Item, Response])
+        response = Response(items=(Item(name=str(i)) for i in range(100)))
+        chunks = list(Envelope.iter_response('streamResponse', response, chunk_size=256))
+        self.assertGreater(len(chunks), 1)
+        envelope = Envelope.parsexml(b''.join(chunks))
+        body = envelope.Body.parse_as(Response)
+        self.assertEqual([str(i) for i in range(100)], [item.name for item in body.items])
+
     def _xml_strip(self, xml):
         parser = etree.XMLParser(remove_blank_text=True)
         return etree.tostring(etree.fromstring(xml, parser=parser))
@@ -1,12 +1,19 @@
+import concurrent.futures
+import email.utils
+import gzip
+import threading
 import unittest
+import unittest.mock
 
 from lxml import etree
 
-from soapfish import wsa, xsd
+from soapfish import soap11, soap_dispatch, wsa, xsd
 from soapfish.core import SOAPError, SOAPRequest, SOAPResponse
 from soapfish.middlewares import ExceptionToSoapFault
-from soapfish.soap_dispatch import SOAPDispatcher
-from soapfish.testutil import EchoInputHeader, EchoOutputHeader, echo_handler, echo_service
+from soapfish.soap_dispatch import SOAPDispatcher, ValidationMode, ValidationPolicy, lazy_dispatcher
+from soapfish.testutil import EchoInputHeader, EchoOutputHeader, echo_handler, echo_service, stream_service
+from soapfish.testutil.echo_service import EchoType
+from soapfish.testutil.stream_service import Report, ReportRequest, Row
 
 
 class SOAPDispatcherTest(unittest.TestCase):
@@ -53,6 +60,106 @@ class SOAPDispatcherTest(unittest.TestCase):
         self.assert_is_soap_fault(response, partial_fault_string="Element 'invalid': This element is not expected. "
                                   'Expected is ( value ).')
 
+    def test_can_skip_validation(self):
+        handler, handler_state = echo_handler()
+        policy = ValidationPolicy(ValidationMode.NEVER)
+        dispatcher = SOAPDispatcher(echo_service(handler), validation=policy)
+        soap_message = '<tns:echoRequest><value>foobar</value><invalid>foobar</invalid></tns:echoRequest>'
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                              self._wrap_with_soap_envelope(soap_message))
+        response = dispatcher.dispatch(request)
+        self.assert_is_successful_response(response, handler_state)
+        self.assertEqual({'skipped': 1}, policy.counters)
+
+    def test_parses_validated_messages_as_trusted(self):
+        soap_message = '<tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        for mode, trusted in ((ValidationMode.ALWAYS, True), (ValidationMode.NEVER, False)):
+            dispatcher = SOAPDispatcher(echo_service(), validation=ValidationPolicy(mode))
+            request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                                  self._wrap_with_soap_envelope(soap_message))
+            with unittest.mock.patch.object(dispatcher, '_parse_input', wraps=dispatcher._parse_input) as parse_input:
+                self.assert_is_successful_response(dispatcher.dispatch(request))
+            self.assertEqual(trusted, parse_input.call_args.kwargs['trusted'])
+            self.assertEqual('foobar', request.soap_body.value)
+
+    def test_method_validation_policy_overrides_dispatcher_policy(self):
+        handler, handler_state = echo_handler()
+        service = echo_service(handler)
+        service.methods[0].validation = ValidationPolicy(ValidationMode.ALWAYS)
+        dispatcher = SOAPDispatcher(service, validation=ValidationPolicy(ValidationMode.NEVER))
+        soap_message = '<tns:echoRequest><invalid>foobar</invalid></tns:echoRequest>'
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                              self._wrap_with_soap_envelope(soap_message))
+        response = dispatcher.dispatch(request)
+        self.assertFalse(handler_state.was_called)
+        self.assert_is_soap_fault(response, partial_fault_string='DocumentInvalid')
+        self.assertEqual({'invalid': 1}, service.methods[0].validation.counters)
+        self.assertEqual({}, dispatcher.validation.counters)
+
+    def test_can_validate_samples(self):
+        policy = ValidationPolicy(ValidationMode.SAMPLE, rate=0.5)
+        dispatcher = SOAPDispatcher(echo_service(), validation=policy)
+        soap_message = '<tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        for _ in range(200):
+            request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                                  self._wrap_with_soap_envelope(soap_message))
+            self.assert_is_successful_response(dispatcher.dispatch(request))
+        self.assertEqual(200, policy.counters['validated'] + policy.counters['skipped'])
+        self.assertGreater(policy.counters['validated'], 0)
+        self.assertGreater(policy.counters['skipped'], 0)
+
+    def test_can_validate_in_shadow_mode(self):
+        handler, handler_state = echo_handler()
+        policy = ValidationPolicy(ValidationMode.SHADOW)
+        dispatcher = SOAPDispatcher(echo_service(handler), validation=policy)
+        soap_message = '<tns:echoRequest><value>foobar</value><invalid>foobar</invalid></tns:echoRequest>'
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                              self._wrap_with_soap_envelope(soap_message))
+        threads = []
+        validate = dispatcher._validate_shadow_input
+
+        def validate_shadow_input(*args):
+            threads.append(threading.current_thread())
+            validate(*args)
+        dispatcher._validate_shadow_input = validate_shadow_input
+        with self.assertLogs('soapfish.soap_dispatch', level='WARNING') as logs:
+            response = dispatcher.dispatch(request)
+            # validation runs in the background, not on the request path
+            soap_dispatch._shadow_executor().submit(lambda: None).result()
+        self.assert_is_successful_response(response, handler_state)
+        self.assertIn("Element 'invalid': This element is not expected.", logs.output[0])
+        self.assertEqual({'shadow_invalid': 1}, policy.counters)
+        self.assertIsNot(threading.current_thread(), threads[0])
+
+    def test_drops_shadow_validation_when_it_falls_behind(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        blocked = threading.Event()
+        executor.submit(blocked.wait)
+        policy = ValidationPolicy(ValidationMode.SHADOW, executor=executor, max_pending=2)
+        dispatcher = SOAPDispatcher(echo_service(), validation=policy)
+        soap_message = '<tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        for _ in range(5):
+            request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                                  self._wrap_with_soap_envelope(soap_message))
+            self.assert_is_successful_response(dispatcher.dispatch(request))
+        self.assertEqual({'shadow_dropped': 3}, policy.counters)
+        blocked.set()
+        executor.submit(lambda: None).result()
+        self.assertEqual({'shadow_dropped': 3, 'shadow_validated': 2}, policy.counters)
+        # validation continues once the executor caught up
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                              self._wrap_with_soap_envelope(soap_message))
+        dispatcher.dispatch(request)
+        executor.submit(lambda: None).result()
+        self.assertEqual(3, policy.counters['shadow_validated'])
+
+    def test_rejects_invalid_validation_policy(self):
+        with self.assertRaises(ValueError):
+            ValidationPolicy('sometimes')
+        with self.assertRaises(ValueError):
+            ValidationPolicy(ValidationMode.SAMPLE, rate=2)
+
     def test_can_reject_malformed_xml_soap_message(self):
         request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'}, 'garbage')
         dispatcher = SOAPDispatcher(echo_service())
@@ -136,6 +243,26 @@ class SOAPDispatcherTest(unittest.TestCase):
         response = dispatcher.dispatch(request)
         self.assert_is_successful_response(response, handler_state)
 
+    def test_can_dispatch_requests_based_on_substitution_group(self):
+        handler, handler_state = echo_handler()
+        service = echo_service(handler)
+        schema = service.schemas[0]
+        alias = xsd.Element(EchoType, substitutionGroup='echoRequest', namespace=schema.targetNamespace)
+        alias._evaluate_type()
+        schema.elements['echoAlias'] = alias
+        dispatcher = SOAPDispatcher(service)
+        self.assertIs(service.methods[0], dispatcher.index.find_method_by_tag('{http://soap.example/echo/types}echoAlias'))
+
+        soap_message = (
+            '<ns1:echoAlias xmlns:ns1="http://soap.example/echo/types">'
+            '<value>foobar</value>'
+            '</ns1:echoAlias>'
+        )
+        request_message = self._wrap_with_soap_envelope(soap_message)
+        request = SOAPRequest({'REQUEST_METHOD': 'POST'}, request_message)
+        response = dispatcher.dispatch(request)
+        self.assert_is_successful_response(response, handler_state)
+
     def test_can_use_soap_error_from_handler(self):
         soap_error = SOAPError('code', 'internal data error', 'actor')
 
@@ -202,6 +329,51 @@ class SOAPDispatcherTest(unittest.TestCase):
         response = dispatcher.dispatch(request)
         self.assert_is_successful_response(response, handler_state)
 
+    def test_parses_soap_header_only_when_accessed(self):
+        def handler(request, input_):
+            return SOAPResponse(EchoType.create(input_.value))
+        dispatcher = SOAPDispatcher(echo_service(handler, input_header=EchoInputHeader))
+        soap_header = '<tns:InputVersion>42</tns:InputVersion>'
+        soap_message = '<tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        request_message = self._wrap_with_soap_envelope(soap_message, header=soap_header)
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'}, request_message)
+        with unittest.mock.patch.object(EchoInputHeader, 'parse_xmlelement',
+                                        wraps=EchoInputHeader.parse_xmlelement) as parse_header:
+            response = dispatcher.dispatch(request)
+            self.assert_is_successful_response(response)
+            self.assertFalse(parse_header.called)
+            self.assertEqual('42', request.soap_header.InputVersion)
+            self.assertEqual(1, parse_header.call_count)
+
+    def test_reports_invalid_lazy_soap_header_as_client_fault(self):
+        def handler(request, input_):
+            return SOAPResponse(EchoType.create(request.soap_header.InputVersion))
+        service = echo_service(handler, input_header=EchoInputHeader)
+        dispatcher = SOAPDispatcher(service, validation=ValidationPolicy(ValidationMode.NEVER))
+        soap_header = '<tns:InputVersion xsi:nil="true" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"/>'
+        soap_message = '<tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        request_message = self._wrap_with_soap_envelope(soap_message, header=soap_header)
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'}, request_message)
+        response = dispatcher.dispatch(request)
+        self.assert_is_soap_fault(response, partial_fault_string='Nil value for not nillable element')
+        # later accesses report the same error
+        self.assertRaises(SOAPError, lambda: request.soap_header)
+
+    def test_ignores_comments_in_soap_body(self):
+        handler, handler_state = echo_handler()
+        dispatcher = SOAPDispatcher(echo_service(handler))
+        soap_message = '<!-- comment --><tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                              self._wrap_with_soap_envelope(soap_message))
+        response = dispatcher.dispatch(request)
+        self.assert_is_successful_response(response, handler_state)
+        self.assertEqual('foobar', handler_state.input_.value)
+
+    def test_can_reject_empty_soap_body(self):
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'}, self._wrap_with_soap_envelope(''))
+        response = SOAPDispatcher(echo_service()).dispatch(request)
+        self.assert_is_soap_fault(response, partial_fault_string='Missing SOAP body content')
+
     def test_can_validate_soap_header(self):
         handler, handler_state = echo_handler()
         dispatcher = SOAPDispatcher(echo_service(handler, input_header=EchoInputHeader))
@@ -267,6 +439,45 @@ class SOAPDispatcherTest(unittest.TestCase):
         self.assertEqual('text/xml', response.http_headers['Content-Type'])
         self.assertEqual(500, response.http_status_code)
 
+    def test_compiles_middleware_chain_once(self):
+        calls = []
+
+        def outer(request, next_call):
+            calls.append('outer')
+            return next_call(request)
+
+        def inner(request, next_call):
+            calls.append('inner')
+            return next_call(request)
+
+        middlewares = [outer]
+        dispatcher = SOAPDispatcher(echo_service(), middlewares=middlewares)
+        self.assertIs(middlewares, dispatcher.middlewares)
+        chain = dispatcher.middleware()
+        self.assertIs(chain, dispatcher.middleware())
+
+        middlewares.append(inner)  # the list passed to the dispatcher is used as it is
+        self.assertIsNot(chain, dispatcher.middleware())
+        self.assertIs(dispatcher.middleware(1), dispatcher.middleware(1))
+        self.assertIsNot(dispatcher.middleware(), dispatcher.middleware(1))
+        soap_message = (
+            '<tns:echoRequest xmlns:tns="http://soap.example/echo/types">'
+            '<value>foobar</value>'
+            '</tns:echoRequest>'
+        )
+        request = SOAPRequest({'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST'},
+                              self._wrap_with_soap_envelope(soap_message))
+        self.assert_is_successful_response(dispatcher.dispatch(request))
+        self.assertEqual(['outer', 'inner'], calls)
+
+        dispatcher.middlewares[1] = outer
+        self.assert_is_successful_response(dispatcher.dispatch(request))
+        self.assertEqual(['outer', 'inner', 'outer', 'outer'], calls)
+
+        dispatcher.middlewares = []
+        self.assert_is_successful_response(dispatcher.dispatch(request))
+        self.assertEqual(['outer', 'inner', 'outer', 'outer'], calls)
+
     def test_can_validate_wsa_header(self):
         dispatcher = SOAPDispatcher(echo_service())
         header = wsa.Header.parsexml(
@@ -293,6 +504,191 @@ class SOAPDispatcherTest(unittest.TestCase):
         self.assertNotIn('${scheme}', response.http_content.decode())
         self.assertNotIn('${host}', response.http_content.decode())
 
+    def test_caches_rendered_wsdl_per_host(self):
+        service = echo_service()
+        service.location = '${scheme}://${host}/ws'
+        dispatcher = SOAPDispatcher(service, document_cache_size=1)
+
+        def get_wsdl(host):
+            environ = {'REQUEST_METHOD': 'GET', 'QUERY_STRING': 'wsdl', 'HTTP_HOST': host}
+            return dispatcher.dispatch(SOAPRequest(environ, ''))
+
+        first = get_wsdl('a.example')
+        self.assertIs(first.http_content, get_wsdl('a.example').http_content)
+        self.assertIn(b'http://a.example/ws', first.http_content)
+
+        second = get_wsdl('b.example')
+        self.assertIn(b'http://b.example/ws', second.http_content)
+        self.assertNotEqual(first.http_headers['ETag'], second.http_headers['ETag'])
+        self.assertEqual(1, len(dispatcher.documents))
+
+    def test_wsdl_conditional_request(self):
+        dispatcher = SOAPDispatcher(echo_service())
+        environ = {'REQUEST_METHOD': 'GET', 'QUERY_STRING': 'wsdl', 'HTTP_HOST': 'soap.example'}
+        response = dispatcher.dispatch(SOAPRequest(environ, ''))
+        self.assertEqual(200, response.http_status_code)
+        etag = response.http_headers['ETag']
+        last_modified = response.http_headers['Last-Modified']
+
+        response = dispatcher.dispatch(SOAPRequest(dict(environ, HTTP_IF_NONE_MATCH=etag), ''))
+        self.assertEqual(304, response.http_status_code)
+        self.assertEqual(b'', response.http_content)
+        self.assertEqual(etag, response.http_headers['ETag'])
+
+        response = dispatcher.dispatch(SOAPRequest(dict(environ, HTTP_IF_NONE_MATCH='"other"'), ''))
+        self.assertEqual(200, response.http_status_code)
+
+        response = dispatcher.dispatch(SOAPRequest(dict(environ, HTTP_IF_MODIFIED_SINCE=last_modified), ''))
+        self.assertEqual(304, response.http_status_code)
+
+        # dates are compared as such, not as strings
+        later = email.utils.formatdate(dispatcher._last_modified_time + 60)
+        response = dispatcher.dispatch(SOAPRequest(dict(environ, HTTP_IF_MODIFIED_SINCE=later), ''))
+        self.assertEqual(304, response.http_status_code)
+        earlier = email.utils.formatdate(dispatcher._last_modified_time - 60, usegmt=True)
+        for value in (earlier, 'yesterday'):
+            response = dispatcher.dispatch(SOAPRequest(dict(environ, HTTP_IF_MODIFIED_SINCE=value), ''))
+            self.assertEqual(200, response.http_status_code)
+
+    def test_wsdl_response_hook_gets_uncompressed_document(self):
+        def replace_location(dispatcher, request, response):
+            response.http_content = response.http_content.replace(b'http://soap.example/ws', b'https://a.example/ws')
+            return response
+
+        dispatcher = SOAPDispatcher(echo_service(), hooks={'wsdl-response': replace_location})
+        environ = {'REQUEST_METHOD': 'GET', 'QUERY_STRING': 'wsdl', 'HTTP_ACCEPT_ENCODING': 'gzip'}
+        response = dispatcher.dispatch(SOAPRequest(environ, ''))
+        self.assertEqual('gzip', response.http_headers['Content-Encoding'])
+        wsdl = gzip.decompress(response.http_content)
+        self.assertIn(b'https://a.example/ws', wsdl)
+        self.assertNotIn(b'http://soap.example/ws', wsdl)
+
+    def test_serves_precompressed_documents(self):
+        dispatcher = SOAPDispatcher(echo_service(), xsds={'xsd': b'<schema/>'})
+        environ = {'REQUEST_METHOD': 'GET', 'QUERY_STRING': 'wsdl', 'HTTP_ACCEPT_ENCODING': 'deflate, gzip'}
+        response = dispatcher.dispatch(SOAPRequest(environ, ''))
+        self.assertEqual('gzip', response.http_headers['Content-Encoding'])
+        self.assertEqual('Accept-Encoding', response.http_headers['Vary'])
+        self.assertEqual(dispatcher.wsdl, gzip.decompress(response.http_content))
+
+        environ['HTTP_ACCEPT_ENCODING'] = 'gzip;q=0'
+        response = dispatcher.dispatch(SOAPRequest(environ, ''))
+        self.assertNotIn('Content-Encoding', response.http_headers)
+        self.assertEqual(dispatcher.wsdl, response.http_content)
+
+        environ['QUERY_STRING'] = 'xsd'
+        environ['HTTP_ACCEPT_ENCODING'] = 'gzip'
+        response = dispatcher.dispatch(SOAPRequest(environ, ''))
+        self.assertEqual(b'<schema/>', gzip.decompress(response.http_content))
+
+        environ['QUERY_STRING'] = 'xsd=missing'
+        response = dispatcher.dispatch(SOAPRequest(environ, ''))
+        self.assertEqual(404, response.http_status_code)
+
+        # called directly (e.g. by a framework route) without the query parameter
+        environ['QUERY_STRING'] = ''
+        response = dispatcher.handle_xsd_request(SOAPRequest(environ, ''))
+        self.assertEqual(404, response.http_status_code)
+
+    def test_parsed_query_strings_are_read_only(self):
+        qs = soap_dispatch._parse_qs('xsd=foo&wsdl')
+        self.assertEqual({'xsd': ('foo',), 'wsdl': ('',)}, dict(qs))
+        with self.assertRaises(TypeError):
+            qs['xsd'] = ['bar']
+        self.assertIs(qs, soap_dispatch._parse_qs('xsd=foo&wsdl'))
+
+    def test_can_dispatch_compressed_request(self):
+        handler, handler_state = echo_handler()
+        dispatcher = SOAPDispatcher(echo_service(handler))
+        soap_message = '<tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        request_message = self._wrap_with_soap_envelope(soap_message)
+        environ = {'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST', 'HTTP_CONTENT_ENCODING': 'gzip'}
+        response = dispatcher.dispatch(SOAPRequest(environ, gzip.compress(request_message)))
+        self.assert_is_successful_response(response, handler_state)
+        self.assertEqual('foobar', handler_state.input_.value)
+
+        response = dispatcher.dispatch(SOAPRequest(environ, request_message))
+        self.assert_is_soap_fault(response, partial_fault_string='Invalid gzip data')
+
+    def test_limits_decompressed_size_of_request(self):
+        soap_message = '<tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        request_message = self._wrap_with_soap_envelope(soap_message)
+        environ = {'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST', 'HTTP_CONTENT_ENCODING': 'gzip'}
+        dispatcher = SOAPDispatcher(echo_service(), max_decompressed_size=len(request_message) - 1)
+        response = dispatcher.dispatch(SOAPRequest(environ, gzip.compress(request_message)))
+        self.assert_is_soap_fault(response, partial_fault_string='Decompressed content exceeds', http_status_code=413)
+        # a small body must not inflate to gigabytes by default
+        bomb = gzip.compress(b' ' * (SOAPDispatcher(echo_service()).max_decompressed_size + 1))
+        response = SOAPDispatcher(echo_service()).dispatch(SOAPRequest(environ, bomb))
+        self.assertEqual(413, response.http_status_code)
+
+    def test_compresses_responses_above_threshold(self):
+        soap_message = '<tns:echoRequest><value>foobar</value></tns:echoRequest>'
+        environ = {'SOAPACTION': 'echo', 'REQUEST_METHOD': 'POST', 'HTTP_ACCEPT_ENCODING': 'gzip, deflate'}
+
+        dispatcher = SOAPDispatcher(echo_service())
+        response = dispatcher.dispatch(SOAPRequest(environ, self._wrap_with_soap_envelope(soap_message)))
+        self.assertNotIn('Content-Encoding', response.http_headers)
+        uncompressed = response.http_content
+
+        dispatcher = SOAPDispatcher(echo_service(), compression_threshold=len(uncompressed) + 1)
+        response = dispatcher.dispatch(SOAPRequest(environ, self._wrap_with_soap_envelope(soap_message)))
+        self.assertNotIn('Content-Encoding', response.http_headers)
+        self.assertEqual('Accept-Encoding', response.http_headers['Vary'])
+
+        dispatcher.compression_threshold = len(uncompressed)
+        response = dispatcher.dispatch(SOAPRequest(environ, self._wrap_with_soap_envelope(soap_message)))
+        self.assertEqual('gzip', response.http_headers['Content-Encoding'])
+        self.assertEqual(uncompressed, gzip.decompress(response.http_content))
+
+    def test_streams_response_with_generated_list(self):
+        generated = []
+
+        def rows():
+            for i in range(3):
+                generated.append(i)
+                yield Row(id=i, name=str(i))
+
+        dispatcher = SOAPDispatcher(stream_service(lambda request, input_: Report(title='t', rows=rows())))
+        request_message = soap11.Envelope.response('reportRequest', ReportRequest(count=3))
+        request = SOAPRequest({'SOAPACTION': 'report', 'REQUEST_METHOD': 'POST'}, request_message)
+        response = dispatcher.dispatch(request)
+        self.assertTrue(response.is_streaming)
+        self.assertEqual([], generated)
+        report = soap11.Envelope.parsexml(b''.join(response.http_content)).Body.parse_as(Report)
+        self.assertEqual([0, 1, 2], generated)
+        self.assertEqual(['0', '1', '2'], [row.name for row in report.rows])
+
+    def test_renders_generated_list_in_list_items_without_streaming(self):
+        class Section(xsd.ComplexType):
+            INHERITANCE = None
+            INDICATOR = xsd.Sequence
+            lines = xsd.ListElement(xsd.String, 'line', minOccurs=0, maxOccurs=xsd.UNBOUNDED)
+
+        class Book(xsd.ComplexType):
+            INHERITANCE = None
+            INDICATOR = xsd.Sequence
+            sections = xsd.ListElement(Section, 'section', minOccurs=0, maxOccurs=xsd.UNBOUNDED)
+
+        xsd.Schema('http://soap.example/book/types', elementFormDefault=xsd.ElementFormDefault.UNQUALIFIED,
+                   complexTypes=(Section, Book), elements={'book': xsd.Element(Book)})
+
+        def lines(start):
+            yield from (str(i) for i in range(start, start + 2))
+
+        # only the list fields of the body itself are checked
+        book = Book(sections=[Section(lines=lines(0)), Section(lines=lines(2))])
+        self.assertFalse(soap_dispatch._has_iterators(book))
+        self.assertTrue(soap_dispatch._has_iterators(Book(sections=iter([Section(lines=lines(0))]))))
+
+        dispatcher = SOAPDispatcher(stream_service(lambda request, input_: book))
+        request_message = soap11.Envelope.response('reportRequest', ReportRequest(count=0))
+        request = SOAPRequest({'SOAPACTION': 'report', 'REQUEST_METHOD': 'POST'}, request_message)
+        response = dispatcher.dispatch(request)
+        self.assertFalse(response.is_streaming)
+        parsed = soap11.Envelope.parsexml(response.http_content).Body.parse_as(Book)
+        self.assertEqual([['0', '1'], ['2', '3']], [s.lines for s in parsed.sections])
+
     def test_service_bind_function(self):
         handler, handler_state = echo_handler()
         service = echo_service(handler)
@@ -353,6 +749,18 @@ class SOAPDispatcherTest(unittest.TestCase):
         response = dispatcher.dispatch(request)
         self.assertEqual(response.http_status_code, 999)
 
+    def test_lazy_dispatcher_builds_one_shared_instance(self):
+        get_dispatcher = lazy_dispatcher(echo_service())
+        dispatchers = []
+        threads = [threading.Thread(target=lambda: dispatchers.append(get_dispatcher())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(8, len(dispatchers))
+        self.assertTrue(all(d is dispatchers[0] for d in dispatchers))
+        self.assertIsInstance(dispatchers[0], SOAPDispatcher)
+
     # --- custom assertions ---------------------------------------------------
 
     def assert_is_successful_response(self, response, handler_state=None):
@@ -361,8 +769,8 @@ class SOAPDispatcherTest(unittest.TestCase):
         if handler_state:
             self.assertTrue(handler_state.was_called)
 
-    def assert_is_soap_fault(self, response, fault_code=None, partial_fault_string=None):
-        self.assertEqual(500, response.http_status_code)
+    def assert_is_soap_fault(self, response, fault_code=None, partial_fault_string=None, http_status_code=500):
+        self.assertEqual(http_status_code, response.http_status_code)
         self.assertEqual('text/xml', response.http_headers['Content-Type'])
 
         fault_document = etree.fromstring(response.http_content)
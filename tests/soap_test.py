@@ -1,8 +1,14 @@
+import asyncio
+import gzip
+import threading
 import unittest
+import unittest.mock
 
+import httpx
 from lxml import etree
 
-from soapfish import core, soap, soap11, soap12
+from soapfish import core, soap, soap11, soap12, xsd
+from soapfish.testutil import echo_service
 
 SOAP11_ERROR_MESSAGE = '''
 <SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/">
@@ -173,3 +179,193 @@ class SOAPVersionTest(unittest.TestCase):
 
         v = soap.SOAPVersion.get_version(soap12.BINDING_NAMESPACE)
         self.assertEqual(soap12.NAME, v.NAME)
+
+
+class ServiceIndexTest(unittest.TestCase):
+    def test_can_lookup_methods_and_elements(self):
+        service = echo_service()
+        method = service.methods[0]
+        self.assertIs(method, service.get_method('echoOperation'))
+        self.assertIs(method, service.index.find_method_by_action('echo'))
+        self.assertIs(method, service.index.find_method_by_tag('{http://soap.example/echo/types}echoRequest'))
+        self.assertIs(method, service.index.find_method_by_tag('echoRequest'))
+        self.assertIsNone(service.index.find_method_by_action('invalid'))
+        self.assertIsNone(service.index.find_method_by_tag('{http://soap.example/echo/types}invalid'))
+        self.assertIs(service.schemas[0].elements['echoResponse'], service.find_element_by_name('echoResponse'))
+        self.assertIsNone(service.find_element_by_name('invalid'))
+
+    def test_can_find_methods_added_after_indexing(self):
+        service = echo_service()
+        service.index
+        method = xsd.Method(operationName='other', soapAction='other', input='echoRequest', output='echoResponse')
+        service.methods.append(method)
+        self.assertIs(method, service.get_method('other'))
+        self.assertIsNone(service.index.find_method_by_action('other'))
+        self.assertIs(method, service.reindex().find_method_by_action('other'))
+
+    def test_misses_of_current_index_do_not_scan_methods_and_schemas(self):
+        service = echo_service()
+        self.assertTrue(service.index.is_current(service))
+        with unittest.mock.patch.object(service.schemas[0], 'get_element_by_name') as get_element_by_name:
+            self.assertIsNone(service.find_element_by_name('invalid'))
+        get_element_by_name.assert_not_called()
+        self.assertRaises(StopIteration, service.get_method, 'invalid')
+
+        element = xsd.Element(service.find_element_by_name('echoRequest')._type)
+        service.schemas[0].elements['otherRequest'] = element
+        self.assertFalse(service.index.is_current(service))
+        self.assertIs(element, service.find_element_by_name('otherRequest'))
+        self.assertTrue(service.reindex().is_current(service))
+
+
+class StubTest(unittest.TestCase):
+    def _transport(self, requests):
+        service = echo_service()
+        response_type = service.find_element_by_name('echoResponse')._type
+        envelope = service.version.Envelope.response('echoResponse', response_type.create('foobar'))
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, content=envelope)
+        return httpx.MockTransport(handler)
+
+    def _request(self, service):
+        return service.find_element_by_name('echoRequest')._type.create('foobar')
+
+    def test_reuses_client_for_calls(self):
+        requests = []
+        service = echo_service()
+        stub = soap.Stub(location='http://soap.example/ws', service=service)
+        with unittest.mock.patch.object(stub, '_create_client',
+                                        return_value=httpx.Client(transport=self._transport(requests))) as create:
+            with stub:
+                for _ in range(3):
+                    response = stub.call('echoOperation', self._request(service))
+                    self.assertEqual('foobar', response.soap_body.value)
+                client = stub.client
+            self.assertEqual(1, create.call_count)
+        self.assertEqual(3, len(requests))
+        self.assertTrue(client.is_closed)
+
+    def test_does_not_close_shared_client(self):
+        requests = []
+        service = echo_service()
+        client = httpx.Client(transport=self._transport(requests))
+        with soap.Stub(location='http://soap.example/ws', service=service, client=client) as stub:
+            stub.call('echoOperation', self._request(service))
+        self.assertFalse(client.is_closed)
+        self.assertIs(client, stub.client)
+        self.assertEqual('echo', requests[0].headers['SOAPAction'])
+
+    def test_creates_client_with_options(self):
+        limits = httpx.Limits(max_connections=5, max_keepalive_connections=2)
+        stub = soap.Stub(location='http://soap.example/ws', service=echo_service(), limits=limits, timeout=3)
+        with unittest.mock.patch('httpx.Client') as client_class:
+            stub.client
+            stub.client
+        client_class.assert_called_once_with(http2=False, limits=limits, timeout=3)
+
+    def test_can_send_compressed_request(self):
+        requests = []
+        service = echo_service()
+        client = httpx.Client(transport=self._transport(requests))
+        stub = soap.Stub(location='http://soap.example/ws', service=service, compression='gzip',
+                         accept_encoding='gzip, deflate', client=client)
+        response = stub.call('echoOperation', self._request(service))
+        self.assertEqual('foobar', response.soap_body.value)
+        headers = requests[0].headers
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        self.assertEqual('gzip, deflate', headers['Accept-Encoding'])
+        self.assertIn(b'<value>foobar</value>', gzip.decompress(requests[0].content))
+
+    def test_rejects_unsupported_compression(self):
+        with self.assertRaises(ValueError):
+            soap.Stub(location='http://soap.example/ws', service=echo_service(), compression='br')
+
+
+class AsyncStubTest(unittest.TestCase):
+    def _client(self, delay=0, requests=None):
+        service = echo_service()
+        response_type = service.find_element_by_name('echoResponse')._type
+        envelope = service.version.Envelope.response('echoResponse', response_type.create('foobar'))
+
+        async def handler(request):
+            if requests is not None:
+                requests.append(request)
+            await asyncio.sleep(delay)
+            return httpx.Response(200, content=envelope)
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def _request(self, service):
+        return service.find_element_by_name('echoRequest')._type.create('foobar')
+
+    def test_can_call(self):
+        requests = []
+        service = echo_service()
+
+        stub = soap.AsyncStub(location='http://soap.example/ws', service=service)
+
+        async def run():
+            async with stub:
+                response = await stub.call('echoOperation', self._request(service), timeout=2)
+                client = stub.client
+            return response, client
+
+        with unittest.mock.patch.object(stub, '_create_client', return_value=self._client(requests=requests)):
+            response, client = asyncio.run(run())
+        self.assertEqual('foobar', response.soap_body.value)
+        self.assertTrue(client.is_closed)
+        self.assertEqual('echo', requests[0].headers['SOAPAction'])
+        self.assertEqual(2, requests[0].extensions['timeout']['read'])
+
+    def test_can_fan_out_calls(self):
+        service = echo_service()
+        stubs = [soap.AsyncStub(location=f'http://soap{i}.example/ws', service=service,
+                                client=self._client(delay=0.2)) for i in range(50)]
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            responses = await soap.gather(*(stub.call('echoOperation', self._request(service)) for stub in stubs))
+            return loop.time() - start, responses
+
+        duration, responses = asyncio.run(run())
+        self.assertEqual(50, len(responses))
+        self.assertTrue(all(r.soap_body.value == 'foobar' for r in responses))
+        self.assertLess(duration, 2)
+
+    def test_can_limit_concurrency(self):
+        service = echo_service()
+        stub = soap.AsyncStub(location='http://soap.example/ws', service=service, client=self._client(delay=0.01))
+        active = []
+        max_active = []
+
+        async def call():
+            active.append(None)
+            max_active.append(len(active))
+            try:
+                return await stub.call('echoOperation', self._request(service))
+            finally:
+                active.pop()
+
+        async def run():
+            return await soap.gather(*(call() for _ in range(10)), limit=3)
+
+        self.assertEqual(10, len(asyncio.run(run())))
+        self.assertEqual(3, max(max_active))
+
+    def test_can_parse_response_in_executor(self):
+        service = echo_service()
+        stub = soap.AsyncStub(location='http://soap.example/ws', service=service, client=self._client(),
+                              offload_threshold=0)
+        threads = []
+        handle_response = stub._handle_response
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            return handle_response(*args)
+
+        with unittest.mock.patch.object(stub, '_handle_response', side_effect=record_thread):
+            response = asyncio.run(stub.call('echoOperation', self._request(service)))
+        self.assertEqual('foobar', response.soap_body.value)
+        self.assertIsNot(threading.main_thread(), threads[0])
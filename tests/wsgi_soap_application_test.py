@@ -1,8 +1,22 @@
+import gzip
 import io
 import unittest
 
+from soapfish import soap11
 from soapfish.soap_dispatch import SOAPDispatcher, WsgiSoapApplication
-from soapfish.testutil import echo_service
+from soapfish.testutil import echo_service, stream_service
+from soapfish.testutil.stream_service import Report, ReportRequest
+
+SOAP_MESSAGE = (
+    b'<?xml version="1.0" encoding="utf-8"?>'
+    b'<senv:Envelope xmlns:senv="http://schemas.xmlsoap.org/soap/envelope/">'
+    b'<senv:Body>'
+    b'<ns1:echoRequest xmlns:ns1="http://soap.example/echo/types">'
+    b'<value>foobar</value>'
+    b'</ns1:echoRequest>'
+    b'</senv:Body>'
+    b'</senv:Envelope>'
+)
 
 
 class WsgiSoapApplicationTest(unittest.TestCase):
@@ -34,6 +48,137 @@ class WsgiSoapApplicationTest(unittest.TestCase):
         )
         self.assertEqual(expected_xml, b''.join(response))
 
+    def test_can_dispatch_streamed_soap_request(self):
+        app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=True, chunk_size=16)
+        start_response = self._response_mock()
+        response = app(self._wsgi_env(SOAP_MESSAGE), start_response)
+        self.assertEqual('200 OK', start_response.code)
+        self.assertIn(b'<value>foobar</value>', b''.join(response))
+
+    def test_can_read_request_without_content_length(self):
+        for streaming in (False, True):
+            app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=streaming, chunk_size=16)
+            start_response = self._response_mock()
+            env = self._wsgi_env(SOAP_MESSAGE)
+            del env['CONTENT_LENGTH']
+            env['wsgi.input_terminated'] = True
+            response = app(env, start_response)
+            self.assertEqual('200 OK', start_response.code)
+            self.assertIn(b'<value>foobar</value>', b''.join(response))
+
+    def test_rejects_oversized_request_before_reading_body(self):
+        for streaming in (False, True):
+            app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=streaming, max_body_size=100)
+            start_response = self._response_mock()
+            env = self._wsgi_env(SOAP_MESSAGE)
+            response = app(env, start_response)
+            self.assertEqual('413 Request Entity Too Large', start_response.code)
+            self.assertIn(b'Request body too large', b''.join(response))
+            self.assertEqual(0, env['wsgi.input'].tell())
+
+    def test_rejects_oversized_streamed_request_without_content_length(self):
+        app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=True, max_body_size=100, chunk_size=16)
+        start_response = self._response_mock()
+        env = self._wsgi_env(SOAP_MESSAGE)
+        del env['CONTENT_LENGTH']
+        env['wsgi.input_terminated'] = True
+        app(env, start_response)
+        self.assertEqual('413 Request Entity Too Large', start_response.code)
+        self.assertLess(env['wsgi.input'].tell(), len(SOAP_MESSAGE))
+
+        # the (shared) parser of the aborted request must not leak into the next one
+        app.max_body_size = None
+        start_response = self._response_mock()
+        response = app(self._wsgi_env(SOAP_MESSAGE), start_response)
+        self.assertEqual('200 OK', start_response.code)
+        self.assertIn(b'<value>foobar</value>', b''.join(response))
+
+    def test_recovers_from_disconnected_client_while_streaming(self):
+        class DisconnectingInput(io.BytesIO):
+            def read(self, size=-1):
+                if self.tell() > 0:
+                    raise OSError('client disconnected')
+                return super().read(size)
+
+        app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=True, chunk_size=16)
+        env = self._wsgi_env(SOAP_MESSAGE)
+        env['wsgi.input'] = DisconnectingInput(SOAP_MESSAGE)
+        with self.assertRaises(OSError):
+            app(env, self._response_mock())
+        # the (shared) parser of the aborted request must not leak into the next one
+        start_response = self._response_mock()
+        response = app(self._wsgi_env(SOAP_MESSAGE), start_response)
+        self.assertEqual('200 OK', start_response.code)
+        self.assertIn(b'<value>foobar</value>', b''.join(response))
+
+    def test_rejects_unknown_action_before_reading_body(self):
+        app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=True)
+        start_response = self._response_mock()
+        env = self._wsgi_env(SOAP_MESSAGE)
+        env['SOAPACTION'] = 'invalid'
+        response = app(env, start_response)
+        self.assertEqual('500 Internal Server Error', start_response.code)
+        self.assertIn(b'Invalid SOAP action: invalid', b''.join(response))
+        self.assertEqual(0, env['wsgi.input'].tell())
+
+    def test_rejects_malformed_streamed_request(self):
+        app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=True)
+        start_response = self._response_mock()
+        response = app(self._wsgi_env(b'<garbage'), start_response)
+        self.assertEqual('500 Internal Server Error', start_response.code)
+        self.assertIn(b'XMLSyntaxError', b''.join(response))
+
+    def test_can_dispatch_compressed_request_and_response(self):
+        for streaming in (False, True):
+            dispatcher = SOAPDispatcher(echo_service(), compression_threshold=0)
+            app = WsgiSoapApplication(dispatcher, streaming=streaming, chunk_size=16)
+            start_response = self._response_mock()
+            env = self._wsgi_env(gzip.compress(SOAP_MESSAGE))
+            env['HTTP_CONTENT_ENCODING'] = 'gzip'
+            env['HTTP_ACCEPT_ENCODING'] = 'gzip'
+            response = app(env, start_response)
+            self.assertEqual('200 OK', start_response.code)
+            self.assertEqual('gzip', dict(start_response.headers)['Content-Encoding'])
+            self.assertIn(b'<value>foobar</value>', gzip.decompress(b''.join(response)))
+
+    def test_limits_decompressed_size_of_request(self):
+        for streaming in (False, True):
+            app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=streaming, max_body_size=200,
+                                      chunk_size=16)
+            start_response = self._response_mock()
+            content = SOAP_MESSAGE.replace(b'foobar', b'foobar' * 100)
+            env = self._wsgi_env(gzip.compress(content))
+            env['HTTP_CONTENT_ENCODING'] = 'gzip'
+            app(env, start_response)
+            self.assertEqual('413 Request Entity Too Large', start_response.code)
+
+    def test_rejects_unsupported_content_encoding_before_reading_body(self):
+        app = WsgiSoapApplication(SOAPDispatcher(echo_service()), streaming=True)
+        start_response = self._response_mock()
+        env = self._wsgi_env(SOAP_MESSAGE)
+        env['HTTP_CONTENT_ENCODING'] = 'br'
+        response = app(env, start_response)
+        self.assertEqual('415 Unsupported Media Type', start_response.code)
+        self.assertIn(b'Unsupported content encoding: br', b''.join(response))
+        self.assertEqual(0, env['wsgi.input'].tell())
+
+    def test_streams_response_with_generated_list(self):
+        for threshold in (None, 0):
+            app = WsgiSoapApplication(SOAPDispatcher(stream_service(), compression_threshold=threshold))
+            start_response = self._response_mock()
+            env = self._wsgi_env(soap11.Envelope.response('reportRequest', ReportRequest(count=5000)))
+            env['SOAPACTION'] = 'report'
+            env['HTTP_ACCEPT_ENCODING'] = 'gzip'
+            response = app(env, start_response)
+            self.assertEqual('200 OK', start_response.code)
+            self.assertNotIsInstance(response, list)
+            content = b''.join(response)
+            if threshold is not None:
+                self.assertEqual('gzip', dict(start_response.headers)['Content-Encoding'])
+                content = gzip.decompress(content)
+            report = soap11.Envelope.parsexml(content).Body.parse_as(Report)
+            self.assertEqual(list(range(5000)), [row.id for row in report.rows])
+
     def _response_mock(self):
         class StartResponse():
             self.code = None
@@ -78,3 +78,10 @@ class DateTest(SimpleTypeTestCase):
         parsed_date = self._parse('2012-02-29-02:30')
         self.assertEqual(date(2012, 2, 29), parsed_date.as_datetime_date())
         self.assertEqual(timezone(-timedelta(hours=2, minutes=30)).utcoffset(None), parsed_date.tzinfo.utcoffset(None))
+
+    def test_rendering_early_years(self):
+        self.assertEqual(date(999, 1, 2).strftime('%Y-%m-%d'), self.xsd_type().xmlvalue(date(999, 1, 2)))
+        self.assertEqual('2012-10-26-02:30', self.xsd_type().xmlvalue(self._parse('2012-10-26-02:30')))
+
+    def test_parsing_shares_timezones(self):
+        self.assertIs(self._parse('2012-02-29+01:00').tzinfo, self._parse('2013-03-01+01:00').tzinfo)
@@ -54,3 +54,11 @@ class TimeTest(SimpleTypeTestCase):
         self.assertEqual(time(23, 59, 59, tzinfo=timezone(timedelta(hours=1))), parsed_time)
         parsed_time = self._parse('23:59:59-02:30')
         self.assertEqual(time(23, 59, 59, tzinfo=timezone(-timedelta(hours=2, minutes=30))), parsed_time)
+
+    def test_parsing_fraction_and_basic_offsets(self):
+        self.assertEqual(time(23, 59, 59, 123000, tzinfo=timezone.utc), self._parse('23:59:59.123Z'))
+        self.assertEqual(time(23, 59, 59, 500000, tzinfo=timezone(timedelta(hours=1))), self._parse('23:59:59.5+0100'))
+        self.assertEqual('+01:00', self._parse('23:59:59+01:00').tzname())
+        self.assertIs(self._parse('23:59:59+01:00').tzinfo, self._parse('00:00:00+01:00').tzinfo)
+        with self.assertRaises(ValueError):
+            self.xsd_type().pythonvalue('24:00:01')
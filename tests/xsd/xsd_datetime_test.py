@@ -1,6 +1,7 @@
 import unittest
 from datetime import datetime, timedelta, timezone, tzinfo
 
+import iso8601
 from lxml import etree
 
 from soapfish import xsd
@@ -59,3 +60,28 @@ class DatetimeTest(unittest.TestCase):
         xsd_dt = xsd.DateTime()
         self.assertEqual('2013-11-26T00:00:00+00:00', xsd_dt.xmlvalue(datetime(2013, 11, 26, tzinfo=tz)))
         self.assertEqual('2013-07-26T00:00:00+01:00', xsd_dt.xmlvalue(datetime(2013, 7, 26, tzinfo=tz)))
+
+    def test_parsing_matches_iso8601(self):
+        # the usual forms are parsed with fromisoformat(), all others with iso8601
+        xsd_dt = xsd.DateTime()
+        for value in ('2011-06-30T20:19:00', '2011-06-30T20:19:00Z', '2011-06-30T20:19:00.123-02:30',
+                      '2011-06-30T20:19:00.123456+01:00', '2011-06-30T20:19:00.5+01:00', '2011-06-30T20:19:00+0100',
+                      '2011-06-30 20:19:00+01'):
+            parsed = xsd_dt.pythonvalue(value)
+            expected = iso8601.parse_date(value)
+            self.assertEqual((expected, expected.tzname()), (parsed, parsed.tzname()), value)
+        with self.assertRaises(ValueError):
+            xsd_dt.pythonvalue('2011-02-30T20:19:00')
+
+    def test_parsing_shares_timezones(self):
+        xsd_dt = xsd.DateTime()
+        first = xsd_dt.pythonvalue('2011-06-30T20:19:00+01:00')
+        second = xsd_dt.pythonvalue('2012-01-01T00:00:00.123+01:00')
+        self.assertIs(first.tzinfo, second.tzinfo)
+        self.assertIs(timezone.utc, xsd_dt.pythonvalue('2011-06-30T20:19:00Z').tzinfo)
+
+    def test_rendering_early_years(self):
+        xsd_dt = xsd.DateTime()
+        self.assertEqual(datetime(999, 1, 2, 3, 4, 5).strftime('%Y-%m-%dT%H:%M:%S'),
+                         xsd_dt.xmlvalue(datetime(999, 1, 2, 3, 4, 5)))
+        self.assertEqual('2001-10-26T21:32:52', xsd_dt.xmlvalue(datetime(2001, 10, 26, 21, 32, 52, 123456)))
@@ -1,4 +1,10 @@
+import copy
 import decimal
+import io
+import pickle
+import sys
+import threading
+import tracemalloc
 import unittest
 
 import iso8601
@@ -101,6 +107,51 @@ class ElementTest(unittest.TestCase):
         flight = Flight(takeoff_airport=Airport())
         str(flight)
 
+    def test_structural_equality(self):
+        flight = Flight(tail_number='LN-KKA', takeoff_airport=Airport.create('IATA', 'WAW'),
+                        landing_airport=Airport.create('ICAO', 'EGLL'), passengers=['abc', '123'])
+        parsed = Flight.parsexml(flight.xml('flight'))
+        self.assertEqual(flight, parsed)
+        self.assertEqual(hash(flight), hash(parsed))
+        self.assertEqual({flight: 1}, {parsed: 1})
+        parsed.passengers.append('xyz')
+        self.assertNotEqual(flight, parsed)
+        self.assertNotEqual(Airport(), Aircraft())
+        self.assertEqual([Airport.create('IATA', 'KRK'), Airport.create('IATA', 'WAW'), Airport.create('ICAO', None)],
+                         sorted([Airport.create('ICAO', None), Airport.create('IATA', 'WAW'),
+                                 Airport.create('IATA', 'KRK')]))
+
+    def test_freeze(self):
+        flight = Flight(tail_number='LN-KKA', takeoff_airport=Airport.create('IATA', 'WAW'), passengers=['abc'])
+        parsed = Flight.parsexml(flight.xml('flight'), lazy=True)
+        self.assertIs(parsed, parsed.freeze())
+        self.assertTrue(parsed.frozen)
+        self.assertTrue(parsed.takeoff_airport.frozen)
+        self.assertEqual(flight, parsed)
+        self.assertEqual(hash(flight), hash(parsed))
+        with self.assertRaises(AttributeError):
+            parsed.tail_number = 'LN-KKB'
+        with self.assertRaises(AttributeError):
+            parsed.takeoff_airport.code = 'KRK'
+        self.assertRaises(TypeError, parsed.passengers.append, 'xyz')
+        self.assertEqual(parsed, copy.deepcopy(parsed))
+        self.assertFalse(flight.frozen)
+        flight.tail_number = 'LN-KKB'
+
+    def test_frozen_instances_are_hashed_again_when_unpickled(self):
+        airport = Airport.create('IATA', 'WAW')
+        frozen = Airport.create('IATA', 'WAW').freeze()
+        # a hash computed by another process, i.e. with a different PYTHONHASHSEED
+        object.__setattr__(frozen, '_frozen_hash', hash(frozen) + 1)
+        for copy_ in (copy.copy, copy.deepcopy, lambda value: pickle.loads(pickle.dumps(value))):
+            copied = copy_(frozen)
+            self.assertTrue(copied.frozen)
+            self.assertEqual(hash(airport), hash(copied))
+            self.assertEqual(copied, Airport.create('IATA', 'WAW').freeze())
+            self.assertEqual(airport, copied)
+            self.assertEqual(copied, airport)
+            self.assertIn(copied, {airport})
+
 
 class ListElementTest(unittest.TestCase):
 
@@ -348,6 +399,18 @@ class IntegerTypeTest(unittest.TestCase):
         test1 = Test.parsexml(XML)
         self.assertEqual(22, test1.value)
 
+    def test_facets(self):
+        value = xsd.UnsignedByte()
+        self.assertEqual({'fractionDigits': 0, 'pattern': r'[-+]?[0-9]+', 'minInclusive': 0, 'maxInclusive': 255},
+                         xsd.UnsignedByte._merged_overrides())
+        self.assertEqual(255, value.accept('255'))
+        with self.assertRaises(ValueError) as cm:
+            value.accept(256)
+        self.assertEqual('Value 256 greater than maxInclusive 255', str(cm.exception))
+        self.assertRaises(ValueError, value.accept, -1)
+        self.assertRaises(ValueError, value.accept, True)  # doesn't match the pattern
+        self.assertRaises(ValueError, xsd.Integer(enumeration=[1, 2]).accept, 3)
+
     def test_Int(self):
         class Test(xsd.ComplexType):
             value = xsd.Element(xsd.Int)
@@ -509,6 +572,359 @@ class ComplexTest(unittest.TestCase):
         self.assertEqual(b.name, 'b')
         self.assertEqual(b.type, 'B')
 
+    def test_construction_initialises_fields(self):
+        class A(xsd.ComplexType):
+            code = xsd.Attribute(xsd.String, use=xsd.Use.OPTIONAL, default='abc')
+            name = xsd.Element(xsd.String, minOccurs=0)
+            items = xsd.ListElement(xsd.Integer, 'item', minOccurs=0)
+
+        a = A()
+        self.assertEqual('abc', a.code)
+        self.assertIsNone(a.name)
+        self.assertIsInstance(a.items, xsd.TypedList)
+        self.assertIsNot(a.items, A().items)
+        a.items.append('1')
+        self.assertEqual([1], a.items)
+        self.assertEqual(a.code, A._meta.by_name['code'].default)
+
+        with self.assertRaises(ValueError):
+            a.unknown = 'value'
+        with self.assertRaises(ValueError):
+            A(code=1)
+
+    def test_parsing_binds_children_in_a_single_pass(self):
+        class A(xsd.ComplexType):
+            name = xsd.Element(xsd.String)
+            import_ = xsd.Element(xsd.String, tagname='import', minOccurs=0)
+            items = xsd.ListElement(xsd.Integer, 'item', minOccurs=0)
+
+        xml = (
+            '<a xmlns:x="http://a.example"><item>1</item><!-- comment --><x:name>foo</x:name>'
+            '<unknown/><item>2</item><import>bar</import><?pi?><item>3</item></a>'
+        )
+        a = A.parsexml(xml)
+        self.assertEqual('foo', a.name)
+        self.assertEqual('bar', a.import_)
+        self.assertEqual([1, 2, 3], a.items)
+
+    def test_compiled_rendering_matches_generic_rendering(self):
+        class Item(xsd.ComplexType):
+            code = xsd.Attribute(xsd.String)
+            name = xsd.Element(xsd.String, nillable=True)
+
+        class A(xsd.ComplexType):
+            title = xsd.Element(xsd.String)
+            other = xsd.Element(xsd.String, namespace='http://other.example', minOccurs=0)
+            item = xsd.Element(Item)
+            values = xsd.ListElement(xsd.Integer, 'value', nillable=True)
+            items = xsd.ListElement(Item, 'entry')
+
+        a = A(title='foo', other='bar', item=Item(code='1', name=xsd.NIL), values=[1, xsd.NIL, 3],
+              items=[Item(code='2', name='baz')])
+        for namespace, elementFormDefault in ((None, None), ('http://a.example', xsd.ElementFormDefault.QUALIFIED)):
+            compiled = etree.Element('a')
+            a.render(compiled, a, namespace, elementFormDefault)
+            generic = etree.Element('a')
+            for field in A._meta.all:
+                field.render(generic, field.tagname or field._name, getattr(a, field._name), namespace,
+                             elementFormDefault)
+            self.assertEqual(etree.tostring(generic), etree.tostring(compiled))
+
+            parsed = A.parse_xmlelement(compiled)
+            self.assertEqual('foo', parsed.title)
+            self.assertEqual('bar', parsed.other)
+            self.assertIs(xsd.NIL, parsed.item.name)
+            self.assertEqual([1, xsd.NIL, 3], parsed.values)
+            self.assertEqual('baz', parsed.items[0].name)
+
+    def test_parsing_uses_overridden_element_parse(self):
+        class UpperElement(xsd.Element):
+            def parse(self, instance, field_name, xmlelement):
+                setattr(instance, field_name, xmlelement.text.upper())
+
+        class A(xsd.ComplexType):
+            name = UpperElement(xsd.String)
+
+        self.assertEqual('FOO', A.parsexml('<a><name>foo</name></a>').name)
+
+    def test_lazy_parsing_defers_binding_until_access(self):
+        class Inner(xsd.ComplexType):
+            code = xsd.Element(xsd.Integer(maxInclusive=10))
+
+        class A(xsd.ComplexType):
+            id = xsd.Attribute(xsd.Integer)
+            name = xsd.Element(xsd.String)
+            count = xsd.Element(xsd.Integer(maxInclusive=10))
+            inner = xsd.Element(Inner)
+            items = xsd.ListElement(xsd.Integer, tagname='item', minOccurs=0)
+
+        xml = ('<a id="3"><name>foo</name><count>42</count><inner><code>11</code></inner>'
+               '<item>1</item><item>2</item><item>3</item></a>')
+        a = A.parsexml(xml, lazy=True)
+        self.assertEqual({'_xmlelement', '_lazy'}, set(a.__dict__))
+
+        self.assertEqual('foo', a.name)
+        self.assertEqual(3, a.id)
+        self.assertEqual({'_xmlelement', '_lazy', 'name', 'id'}, set(a.__dict__))
+        # validation errors are raised on first access (and every later one)
+        self.assertRaises(ValueError, lambda: a.count)
+        self.assertRaises(ValueError, lambda: a.count)
+        inner = a.inner
+        self.assertIsInstance(inner, Inner)
+        self.assertRaises(ValueError, lambda: inner.code)
+
+        self.assertIsInstance(a.items, xsd.LazyTypedList)
+        self.assertIsNotNone(a.items._pending)
+        self.assertEqual(3, len(a.items))
+        self.assertEqual([1, 2, 3], a.items)
+        a.items.append(4)
+        self.assertEqual([1, 2, 3, 4], list(a.items))
+
+    def test_lazy_instances_can_be_copied_and_pickled(self):
+        flight = Flight(tail_number='LN-KKU', passengers=['Joe', 'Jane'], takeoff_airport=Airport(type='IATA', code='WAW'))
+        for copy_ in (copy.copy, copy.deepcopy, lambda value: pickle.loads(pickle.dumps(value))):
+            parsed = Flight.parsexml(flight.xml('flight'), lazy=True)
+            self.assertEqual('LN-KKU', parsed.tail_number)
+            copied = copy_(parsed)
+            self.assertNotIn('_lazy', copied.__dict__)
+            self.assertEqual(flight, copied)
+            self.assertEqual(flight, parsed)
+
+    def test_copies_of_eagerly_parsed_instances_keep_source_element(self):
+        parsed = Flight.parsexml(Flight(tail_number='LN-KKU', passengers=['Joe']).xml('flight'))
+        self.assertIs(parsed._xmlelement, copy.copy(parsed)._xmlelement)
+        copied = copy.deepcopy(parsed)
+        self.assertEqual('flight', copied._xmlelement.tag)
+        self.assertEqual(parsed, copied)
+
+    def test_lazy_fields_are_bound_once_by_concurrent_readers(self):
+        xml = Flight(tail_number='LN-KKU', passengers=[f'p{i}' for i in range(10)]).xml('flight')
+        for _ in range(20):
+            parsed = Flight.parsexml(xml, lazy=True)
+            barrier = threading.Barrier(4)
+            results = []
+
+            def read():
+                barrier.wait()  # noqa: B023
+                results.append(parsed.passengers)  # noqa: B023
+
+            threads = [threading.Thread(target=read) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(4, len(results))
+            self.assertEqual(1, len({id(result) for result in results}))
+            self.assertEqual(10, len(results[0]))
+
+    def test_lazy_lists_are_filled_once_by_concurrent_readers(self):
+        class Test(xsd.ComplexType):
+            values = xsd.ListElement(xsd.Int, 'value')
+
+        xml = Test(values=range(2000)).xml('test')
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads while the items are parsed
+        try:
+            for _ in range(5):
+                values = Test.parsexml(xml, lazy=True).values
+                barrier = threading.Barrier(4)
+                results = []
+
+                def read():
+                    barrier.wait()  # noqa: B023
+                    results.append(list(values))  # noqa: B023
+
+                threads = [threading.Thread(target=read) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual([list(range(2000))] * 4, results)
+        finally:
+            sys.setswitchinterval(interval)
+
+    def test_lazy_parsing_matches_eager_parsing(self):
+        xml = Flight(tail_number='LN-KKU', takeoff_pilot='CAPTAIN', passengers=['Joe', 'Jane'],
+                     takeoff_datetime=iso8601.parse_date('2001-10-26T21:32:52+00:00'),
+                     takeoff_airport=Airport(type='IATA', code='WAW'),
+                     landing_airport=Airport(type='ICAO', code='EGLL')).xml('flight')
+        eager, lazy = Flight.parsexml(xml), Flight.parsexml(xml, lazy=True)
+        for field in Flight._meta.fields:
+            self.assertEqual(str(getattr(eager, field._name)), str(getattr(lazy, field._name)))
+        self.assertEqual(eager.xml('flight'), lazy.xml('flight'))
+
+    def test_trusted_parsing_skips_facet_checks(self):
+        class A(xsd.ComplexType):
+            code = xsd.Element(xsd.String(pattern=r'[A-Z]{3}', whiteSpace='collapse'))
+            count = xsd.Element(xsd.Integer(maxInclusive=10))
+            ratio = xsd.Element(xsd.Decimal(maxInclusive=1), minOccurs=0)
+            items = xsd.ListElement(xsd.Integer(maxInclusive=10), tagname='item', minOccurs=0, maxOccurs=1)
+
+        xml = '<a><code>a  b</code><count>42</count><ratio>2.5</ratio><item>11</item><item>12</item></a>'
+        self.assertRaises(ValueError, A.parsexml, xml)
+        for lazy in (False, True):
+            a = A.parsexml(xml, trusted=True, lazy=lazy)
+            self.assertEqual('a b', a.code)
+            self.assertEqual(42, a.count)
+            self.assertEqual(2.5, a.ratio)
+            self.assertEqual([11, 12], a.items)
+        # values assigned later are still checked
+        self.assertRaises(ValueError, setattr, a, 'count', 11)
+
+    def test_trusted_parsing_matches_parsing(self):
+        xml = Flight(tail_number='LN-KKU', takeoff_pilot='CAPTAIN', passengers=['Joe', 'Jane'],
+                     takeoff_datetime=iso8601.parse_date('2001-10-26T21:32:52+00:00'),
+                     takeoff_airport=Airport(type='IATA', code='WAW'),
+                     landing_airport=Airport(type='ICAO', code='EGLL')).xml('flight')
+        self.assertEqual(Flight.parsexml(xml).xml('flight'), Flight.parsexml(xml, trusted=True).xml('flight'))
+
+    def test_lean_parsing_drops_source_elements(self):
+        class Kind(xsd.String):
+            enumeration = ['IATA', 'ICAO']
+
+        class Code(xsd.ComplexType):
+            kind = xsd.Attribute(Kind)
+            value = xsd.Element(xsd.String)
+
+        class Airport(xsd.ComplexType):
+            kind = xsd.Element(Kind)
+            codes = xsd.ListElement(Code, 'code')
+
+        xml = '<airport><kind>IATA</kind><code kind="ICAO"><value>EPWA</value></code></airport>'
+        for trusted in (False, True):
+            airport = Airport.parsexml(xml, lean=True, trusted=trusted)
+            self.assertFalse(hasattr(airport, '_xmlelement'))
+            self.assertFalse(hasattr(airport.codes[0], '_xmlelement'))
+            self.assertEqual('EPWA', airport.codes[0].value)
+            self.assertIs(Kind.enumeration[0], airport.kind)
+            self.assertIs(Kind.enumeration[1], airport.codes[0].kind)
+            self.assertEqual(Airport.parsexml(xml), airport)
+        self.assertRaises(ValueError, Airport.parsexml, xml, lazy=True, lean=True)
+
+    def test_slots(self):
+        class Airport(xsd.ComplexType):
+            SLOTS = True
+            type = xsd.Element(xsd.String)
+            code = xsd.Element(xsd.String, minOccurs=0)
+
+        class Airports(xsd.ComplexType):
+            SLOTS = True
+            airports = xsd.ListElement(Airport, 'airport')
+
+        class NamedAirport(Airport):
+            name = xsd.Attribute(xsd.String)
+
+        airport = Airport(type='IATA', code='WAW')
+        self.assertFalse(hasattr(airport, '__dict__'))
+        self.assertEqual(['type', 'code'], [f._name for f in Airport._meta.fields])
+        self.assertEqual(['type', 'code', 'name'], [f._name for f in NamedAirport._meta.all])
+        self.assertEqual('WAW', NamedAirport.parsexml('<a name="Chopin"><type>IATA</type><code>WAW</code></a>').code)
+        self.assertRaises(ValueError, setattr, airport, 'name', 'Chopin')
+        self.assertEqual(airport, copy.deepcopy(airport))
+
+        xml = Airports(airports=[airport, Airport(type='ICAO')]).xml('airports')
+        for kwargs in ({}, {'lazy': True}, {'lean': True}):
+            airports = Airports.parsexml(xml, **kwargs)
+            self.assertEqual(['WAW', None], [a.code for a in airports.airports])
+        self.assertTrue(airports.freeze().airports[0].frozen)
+        self.assertEqual(hash(airports), hash(copy.deepcopy(airports)))
+        self.assertTrue(copy.deepcopy(airports).airports[0].frozen)
+        self.assertRaises(AttributeError, setattr, airports.airports[0], 'code', 'KRK')
+
+        class UnslottedAirport(Airport):
+            SLOTS = False
+            name = xsd.Element(xsd.String, minOccurs=0)
+
+        unslotted = UnslottedAirport(type='IATA', code='WAW', name='Chopin')
+        self.assertEqual({'name': 'Chopin'}, unslotted.__dict__)
+        self.assertEqual(['type', 'code', 'name'], [f._name for f in UnslottedAirport._meta.fields])
+        self.assertEqual(unslotted, copy.deepcopy(unslotted))
+        xml = unslotted.xml('airport')
+        for kwargs in ({}, {'lazy': True}, {'lean': True}):
+            self.assertEqual(unslotted, UnslottedAirport.parsexml(xml, **kwargs))
+        self.assertTrue(unslotted.freeze().frozen)
+
+    def test_lean_parsing_memory(self):
+        class Kind(xsd.String):
+            enumeration = ['IATA', 'ICAO']
+
+        def bytes_per_element(slots, lean):
+            Airport = type('Airport', (xsd.ComplexType,), {
+                'SLOTS': slots, 'kind': xsd.Element(Kind), 'code': xsd.Element(xsd.String)})
+            Airports = type('Airports', (xsd.ComplexType,), {
+                'SLOTS': slots, 'airports': xsd.ListElement(Airport, 'airport')})
+            xml = b'<airports>%s</airports>' % b''.join(
+                b'<airport><kind>IATA</kind><code>%d</code></airport>' % i for i in range(2000))
+            tracemalloc.start()
+            try:
+                airports = Airports.parsexml(xml, lean=lean)
+                size = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            self.assertEqual(2000, len(airports.airports))
+            return size / 2000
+
+        default, lean = bytes_per_element(False, False), bytes_per_element(True, True)
+        self.assertLess(lean, default * 0.6, f'{lean:.0f} bytes per element (lean), {default:.0f} bytes (default)')
+
+    def test_iterparse_yields_instances_and_clears_tree(self):
+        class Item(xsd.ComplexType):
+            id = xsd.Element(xsd.Integer)
+            name = xsd.Element(xsd.String)
+
+        items = b''.join(b'<t:item><id>%d</id><name>n%d</name></t:item>' % (i, i) for i in range(100))
+        source = io.BytesIO(b'<t:export xmlns:t="http://example.org/t"><t:header>x</t:header>'
+                            b'<t:items>%s</t:items></t:export>' % items)
+        ids = []
+        for item in Item.iterparse(source, '{*}item'):
+            self.assertIsInstance(item, Item)
+            self.assertEqual(f'n{item.id}', item.name)
+            ids.append(item.id)
+            if item.id > 0:
+                # only the previous (emptied) item is left from the elements processed already
+                self.assertEqual(1, len(item._xmlelement.getroottree().getroot()))
+                previous = item._xmlelement.getprevious()
+                self.assertEqual(0, len(previous))
+                self.assertIsNone(previous.getprevious())
+        self.assertEqual(list(range(100)), ids)
+
+    def test_write_matches_xml(self):
+        flight = Flight(tail_number='LN-KKU', takeoff_pilot='CAPTAIN', passengers=['Joe', 'Jane'],
+                        takeoff_datetime=iso8601.parse_date('2001-10-26T21:32:52+00:00'),
+                        takeoff_airport=Airport(type='IATA', code='WAW'),
+                        landing_airport=Airport(type='ICAO', code='EGLL'))
+        output = io.BytesIO()
+        flight.write(output, 'flight')
+        self.assertEqual(flight.xml('flight', pretty_print=False), output.getvalue())
+        self.assertEqual(output.getvalue(), b''.join(flight.iterxml('flight', chunk_size=16)))
+
+    def test_write_streams_list_items_from_generator(self):
+        class Item(xsd.ComplexType):
+            id = xsd.Attribute(xsd.Integer)
+            name = xsd.Element(xsd.String)
+
+        class Export(xsd.ComplexType):
+            title = xsd.Element(xsd.String)
+            items = xsd.ListElement(Item, 'item', minOccurs=1, maxOccurs=xsd.UNBOUNDED)
+            codes = xsd.ListElement(xsd.Integer, 'code', nillable=True)
+
+        def items(count):
+            for i in range(count):
+                yield Item(id=i, name=f'n{i}')
+
+        export = Export(title='t', items=items(1000), codes=[1, xsd.NIL])
+        chunks = list(export.iterxml('export', namespace='http://example.org/export',
+                                     elementFormDefault=xsd.ElementFormDefault.QUALIFIED, chunk_size=1024))
+        self.assertGreater(len(chunks), 10)
+        self.assertTrue(all(len(chunk) < 2048 for chunk in chunks))
+        parsed = Export.parsexml(b''.join(chunks))
+        self.assertEqual('t', parsed.title)
+        self.assertEqual(list(range(1000)), [item.id for item in parsed.items])
+        self.assertEqual([1, xsd.NIL], parsed.codes)
+
+        export.items = iter(())
+        self.assertRaises(ValueError, export.write, io.BytesIO(), 'export')
+
     def test_parsexml_with_soapfish_schema(self):
         # sometimes it comes handy that soapfish can validate some XML against a
         # provided soapfish schema (instead of an etree.XMLSchema) especially in
@@ -918,6 +1334,23 @@ class PatternTest(unittest.TestCase):
         else:
             self.fail('Should not get here.')
 
+    def test_facets_are_compiled_again_when_changed(self):
+        code = xsd.String(pattern=r'[A-Z]{3}', whiteSpace='collapse')
+        self.assertEqual('WAW', code.accept('WAW'))
+        self.assertRaises(ValueError, code.accept, 'W  W')
+        code.pattern = r'[A-Z] [A-Z]'
+        self.assertEqual('W W', code.accept('W  W'))
+        self.assertRaises(ValueError, code.accept, 'WAW')
+
+    def test_types_with_compiled_facets_can_be_pickled(self):
+        code = pickle.loads(pickle.dumps(xsd.String(pattern=r'[A-Z]{3}')))
+        self.assertEqual('WAW', code.accept('WAW'))
+        self.assertRaises(ValueError, code.accept, 'waw')
+        # lists of parsed instances reference their field (and its type)
+        passengers = Flight.parsexml(Flight(tail_number='LN-KKU', passengers=['Joe', 'Jane']).xml('flight')).passengers
+        self.assertIsInstance(passengers, xsd.TypedList)
+        self.assertEqual(['Joe', 'Jane'], pickle.loads(pickle.dumps(passengers)))
+
 
 class MaxOccursTest(unittest.TestCase):
 